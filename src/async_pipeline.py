@@ -0,0 +1,135 @@
+import asyncio
+import random
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+from openai import AsyncOpenAI, RateLimitError
+
+from pipeline import ReportPipeline
+
+
+class RepoResult(NamedTuple):
+    """单个仓库的处理结果"""
+    repo: str
+    filepath: Optional[str]
+    error: Optional[str]
+
+
+class AsyncDailyPipeline:
+    """多仓库每日报告的异步流水线
+
+    每个仓库依次执行ReportPipeline的各个阶段（获取更新 → 生成报告 → AI摘要 → 写入），不同仓库之间相互重叠。
+    获取和摘要分别受独立的并发上限约束：GitHub请求在线程中复用GitHubClient的连接池，
+    摘要通过AsyncOpenAI发送，遇到429时按Retry-After等待后重试。
+    单个仓库失败只记录在结果中，不会中断整批任务。
+    """
+
+    def __init__(self, config, github_client, report_generator, llm_processor):
+        """初始化流水线
+
+        Args:
+            config: 配置对象
+            github_client: GitHub客户端
+            report_generator: 报告生成器
+            llm_processor: LLM处理器，复用其prompt、缓存和请求参数
+        """
+        self.config = config
+        self.github_client = github_client
+        self.report_generator = report_generator
+        self.llm_processor = llm_processor
+        self.pipeline = ReportPipeline(config, github_client, report_generator, llm_processor)
+        daily_config = getattr(config, 'daily_config', {})
+        self.fetch_concurrency = daily_config.get('fetch_concurrency', 4)
+        self.llm_concurrency = daily_config.get('llm_concurrency', 4)
+        self.max_retries = daily_config.get('llm_max_retries', 5)
+        self.backoff_max = daily_config.get('llm_backoff_max', 60)
+
+    def run(self, repos: List[str], since: datetime, until: datetime, client=None) -> List[RepoResult]:
+        """同步入口，执行整批任务并返回各仓库的结果"""
+        return asyncio.run(self.run_async(repos, since, until, client))
+
+    async def run_async(self, repos: List[str], since: datetime, until: datetime,
+                        client=None) -> List[RepoResult]:
+        """并发处理所有仓库，结果顺序与repos一致
+
+        Args:
+            client: 可选，异步OpenAI客户端；默认新建一个并在结束时关闭
+        """
+        fetch_limit = asyncio.Semaphore(self.fetch_concurrency)
+        llm_limit = asyncio.Semaphore(self.llm_concurrency)
+        owns_client = client is None
+        if owns_client:
+            # 重试由流水线按Retry-After处理，关闭SDK自带的重试
+            client = AsyncOpenAI(
+                api_key=self.config.openai_api_key,
+                base_url=self.config.openai_base_url,
+                max_retries=0
+            )
+        try:
+            tasks = [
+                self._process(client, repo, since, until, fetch_limit, llm_limit, f"[{i}/{len(repos)}]")
+                for i, repo in enumerate(repos, 1)
+            ]
+            return await asyncio.gather(*tasks)
+        finally:
+            if owns_client:
+                await client.close()
+
+    async def _process(self, client, repo: str, since: datetime, until: datetime,
+                       fetch_limit: asyncio.Semaphore, llm_limit: asyncio.Semaphore,
+                       progress: str) -> RepoResult:
+        """处理单个仓库，捕获所有异常"""
+        filepath = None
+        try:
+            async with fetch_limit:
+                updates = await asyncio.to_thread(self.pipeline.fetch, [repo], since, until)
+            date = since.strftime('%Y-%m-%d')
+            filepath = self.config.get_export_filepath(repo=repo, since=since)
+            updates, report = await asyncio.to_thread(self.pipeline.write_report, filepath, updates, repo, date)
+            print(f"{progress} {repo}: report exported to {filepath}")
+
+            async with llm_limit:
+                # 条目摘要模式下准备输入本身也会调用LLM，同样受并发上限约束
+                llm_input = await asyncio.to_thread(self.llm_processor.prepare_input, updates, report)
+                summary = await self._summarize(client, llm_input, repo, date)
+
+            summary_file = await asyncio.to_thread(self.pipeline.persist_summary, filepath, report, summary,
+                                                   repo, date)
+            print(f"{progress} {repo}: AI summary exported to {summary_file}")
+            return RepoResult(repo, summary_file, None)
+        except Exception as e:
+            print(f"{progress} {repo}: failed: {str(e)}")
+            return RepoResult(repo, filepath, str(e))
+
+    async def _summarize(self, client, content: str, repo: str, since: str) -> str:
+        """生成摘要，命中缓存时不调用API"""
+        llm = self.llm_processor
+        # 超大报告的分块摘要仍在线程中同步完成，只有最后一次调用走异步客户端
+        request = await asyncio.to_thread(llm.prepare_summary, content, repo, since)
+        if request.cached is not None:
+            return request.title + request.cached
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await client.chat.completions.create(**request.params)
+                break
+            except RateLimitError as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                print(f"{repo}: OpenAI rate limited, retrying in {delay:.1f} seconds...")
+                await asyncio.sleep(delay)
+
+        summary = response.choices[0].message.content
+        llm.save_summary(request, summary)
+        return request.title + summary
+
+    def _retry_delay(self, error: RateLimitError, attempt: int) -> float:
+        """计算429后的等待时间：优先使用Retry-After，否则为带抖动的指数退避"""
+        retry_after = error.response.headers.get('Retry-After') if error.response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, 2 ** attempt))
@@ -0,0 +1,130 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class DiskCache:
+    """基于SQLite的持久化键值缓存
+
+    值以JSON保存，超出容量上限时按最近访问时间（LRU）淘汰，
+    可为单个条目设置过期时间。同一文件可被多个线程和进程共享。
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        """初始化缓存
+
+        Args:
+            path: SQLite数据库文件路径
+            max_bytes: 缓存内容的总大小上限（字节）
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    expires_at REAL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)"
+            )
+        self._size = self._total_size()
+
+    def _total_size(self) -> int:
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return row[0]
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存，未命中或已过期时返回None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                if row is not None:
+                    self._delete(key)
+                self.stats['misses'] += 1
+                return None
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+            self.stats['hits'] += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """写入缓存
+
+        Args:
+            key: 缓存键
+            value: 可JSON序列化的值
+            ttl: 可选，过期秒数，不设置则只受容量淘汰影响
+        """
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            with self._conn:
+                old = self._conn.execute(
+                    "SELECT size FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, accessed_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, data, size, now, expires_at)
+                )
+            self._size += size - (old[0] if old else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str):
+        """删除缓存条目"""
+        with self._lock:
+            self._delete(key)
+
+    def _delete(self, key: str):
+        with self._conn:
+            row = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._size -= row[0]
+
+    def _evict(self):
+        """按最近访问时间淘汰条目，直到总大小降到上限的90%以下"""
+        # 其他进程可能也写入了同一文件，先校准总大小
+        self._size = self._total_size()
+        target = self.max_bytes * 0.9
+        with self._conn:
+            self._conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                               (time.time(),))
+            self._size = self._total_size()
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at"
+            ).fetchall()
+            for key, size in rows:
+                if self._size <= target:
+                    break
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._size -= size
+                self.stats['evictions'] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取命中、未命中、淘汰次数以及当前大小"""
+        with self._lock:
+            return dict(self.stats, size=self._size, max_bytes=self.max_bytes)
@@ -0,0 +1,101 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from models import format_github_time, parse_github_time
+from utils import atomic_write
+
+
+class CheckpointStore:
+    """按仓库持久化的最后一次成功运行时间
+
+    保存在JSON文件中，每次更新都原子写入，进程崩溃或重启后从上次成功的位置继续。
+    时间为不带时区的UTC时间，与GitHub记录的时间一致。
+    """
+
+    def __init__(self, path: str):
+        """初始化检查点存储
+
+        Args:
+            path: JSON文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._checkpoints: Dict[str, str] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._checkpoints = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error loading checkpoints from {path}: {str(e)}")
+
+    def get(self, repo: str) -> Optional[datetime]:
+        """获取仓库的检查点，没有时返回None"""
+        with self._lock:
+            return parse_github_time(self._checkpoints.get(repo))
+
+    def set(self, repo: str, value: datetime):
+        """更新仓库的检查点并写入文件"""
+        with self._lock:
+            self._checkpoints[repo] = format_github_time(value)
+            with atomic_write(self.path) as f:
+                json.dump(self._checkpoints, f, indent=2, ensure_ascii=False)
+
+    def remove(self, repo: str):
+        """删除仓库的检查点"""
+        with self._lock:
+            if self._checkpoints.pop(repo, None) is not None:
+                with atomic_write(self.path) as f:
+                    json.dump(self._checkpoints, f, indent=2, ensure_ascii=False)
+
+
+class SQLiteCheckpointStore:
+    """保存在SQLite中、可由多个节点共享的检查点存储
+
+    接口与CheckpointStore相同。分片模式下所有节点共用同一个数据库（默认与节点租约表同一文件），
+    节点重启或仓库迁移到其他节点后，接管的节点从同一个检查点继续。
+    检查点只会前进，迁移前的节点晚到的写入不会覆盖更新的检查点。
+    """
+
+    def __init__(self, path: str):
+        """初始化检查点存储
+
+        Args:
+            path: SQLite数据库文件路径
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    repo TEXT PRIMARY KEY,
+                    checkpoint TEXT NOT NULL
+                )
+            """)
+
+    def get(self, repo: str) -> Optional[datetime]:
+        """获取仓库的检查点，没有时返回None"""
+        with self._lock:
+            row = self._conn.execute("SELECT checkpoint FROM checkpoints WHERE repo = ?", (repo,)).fetchone()
+        return parse_github_time(row[0]) if row else None
+
+    def set(self, repo: str, value: datetime):
+        """推进仓库的检查点，早于已保存的检查点时保持不变"""
+        with self._lock, self._conn:
+            # 时间格式固定，按字符串比较即按时间比较
+            self._conn.execute(
+                "INSERT INTO checkpoints (repo, checkpoint) VALUES (?, ?) "
+                "ON CONFLICT(repo) DO UPDATE SET checkpoint = MAX(checkpoint, excluded.checkpoint)",
+                (repo, format_github_time(value))
+            )
+
+    def remove(self, repo: str):
+        """删除仓库的检查点"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM checkpoints WHERE repo = ?", (repo,))
@@ -3,12 +3,16 @@ import shlex
 from datetime import datetime, timedelta
 import os
 import json
+import time
 from typing import Dict, Callable, List
-from llm import LLMProcessor
+from async_pipeline import AsyncDailyPipeline
+from export_store import ExportStore
+from pipeline import PipelineResult, ReportPipeline
+from models import utc_now
 from config import Config
 
 class CLI:
-    def __init__(self, github_client, subscription_manager, report_generator, config: Config):
+    def __init__(self, github_client, subscription_manager, report_generator, config: Config, jobs=None):
         """初始化CLI
         
         Args:
@@ -16,12 +20,15 @@ class CLI:
             subscription_manager: 订阅管理器
             report_generator: 报告生成器
             config: 配置对象
+            jobs: 可选，ReportJobs实例；提供时每日报告提交到任务队列执行
         """
         self.github_client = github_client
         self.subscription_manager = subscription_manager
         self.report_generator = report_generator
         self.config = config
-        self.llm_processor = LLMProcessor(config)
+        self.jobs = jobs
+        self.llm_processor = report_generator.llm_processor
+        self.pipeline = ReportPipeline(config, github_client, report_generator, self.llm_processor)
         self.commands: Dict[str, dict] = self._register_commands()
         self.parser = self._create_parser()
 
@@ -35,10 +42,62 @@ class CLI:
                         'name': 'repo',
                         'help': 'The repository to subscribe to (e.g., owner/repo)',
                         'type': str
+                    },
+                    {
+                        'name': '--interval',
+                        'dest': 'interval',
+                        'help': 'Initial polling interval in seconds, defaults to update_interval',
+                        'type': int,
+                        'required': False,
+                        'default': None,
                     }
                 ],
                 'handler': self.add_subscription
             },
+            'interval': {
+                'help': 'Set the polling interval of a subscription, 0 restores the default',
+                'args': [
+                    {
+                        'name': 'repo',
+                        'help': 'The subscribed repository (e.g., owner/repo)',
+                        'type': str
+                    },
+                    {
+                        'name': 'seconds',
+                        'help': 'Initial polling interval in seconds',
+                        'type': int
+                    }
+                ],
+                'handler': self.set_interval
+            },
+            'import-subs': {
+                'help': 'Import subscriptions from a JSON export or a text file with one repository per line',
+                'args': [
+                    {
+                        'name': 'path',
+                        'help': 'File to import',
+                        'type': str
+                    },
+                    {
+                        'name': '--replace',
+                        'dest': 'replace',
+                        'help': 'Replace existing subscriptions instead of merging',
+                        'action': 'store_true',
+                    }
+                ],
+                'handler': self.import_subscriptions
+            },
+            'export-subs': {
+                'help': 'Export subscriptions and their metadata to a JSON file',
+                'args': [
+                    {
+                        'name': 'path',
+                        'help': 'Output file',
+                        'type': str
+                    }
+                ],
+                'handler': self.export_subscriptions
+            },
             'remove': {
                 'help': 'Remove a subscription',
                 'args': [
@@ -94,9 +153,58 @@ class CLI:
                         'type': str,
                         'required': False,
                         'default': None,
+                    },
+                    {
+                        'name': '--queue',
+                        'dest': 'queue',
+                        'help': 'Run through the background job queue instead of streaming to the terminal',
+                        'action': 'store_true',
                     }
                 ],
                 'handler': self.export_daily_progress
+            },
+            'search': {
+                'help': 'Full-text search over exported reports',
+                'args': [
+                    {
+                        'name': 'query',
+                        'help': 'Search text, quote multiple words (e.g., "workflow retry")',
+                        'type': str
+                    },
+                    {
+                        'name': '--repo',
+                        'dest': 'repo',
+                        'help': 'Only search reports of this repository',
+                        'type': str,
+                        'required': False,
+                        'default': None,
+                    },
+                    {
+                        'name': '--kind',
+                        'dest': 'kind',
+                        'help': 'Only search raw or summary reports',
+                        'type': str,
+                        'required': False,
+                        'default': None,
+                    },
+                    {
+                        'name': '--limit',
+                        'dest': 'limit',
+                        'help': 'Maximum number of results, defaults to 10',
+                        'type': int,
+                        'required': False,
+                        'default': 10,
+                    }
+                ],
+                'handler': self.search_reports
+            },
+            'compact': {
+                'help': 'Move old reports into compressed storage and pack them into monthly archives',
+                'handler': self.compact_exports
+            },
+            'stats': {
+                'help': 'Show API request, cache and job queue statistics',
+                'handler': self.show_stats
             }
         }
 
@@ -120,10 +228,12 @@ class CLI:
             if 'args' in cmd_config:
                 for arg in cmd_config['args']:
                     name = arg['name']
-                    kwargs = {
-                        'help': arg['help'],
-                        'type': arg['type']
-                    }
+                    kwargs = {'help': arg['help']}
+                    # 开关参数使用action，没有type
+                    if 'action' in arg:
+                        kwargs['action'] = arg['action']
+                    else:
+                        kwargs['type'] = arg['type']
                     
                     # 区分可选参数和位置参数
                     if name.startswith('--'):
@@ -144,9 +254,32 @@ class CLI:
         return parser
 
     def add_subscription(self, args):
-        self.subscription_manager.add_subscription(args.repo)
+        metadata = {'interval': args.interval} if args.interval else {}
+        self.subscription_manager.add_subscription(args.repo, **metadata)
         print(f"Added subscription: {args.repo}")
 
+    def set_interval(self, args):
+        """设置订阅的轮询间隔，0表示恢复默认"""
+        try:
+            self.subscription_manager.update_metadata(args.repo, interval=args.seconds or None)
+        except KeyError:
+            print(f"Not subscribed: {args.repo}")
+            return
+        print(f"Polling interval of {args.repo}: {args.seconds or 'default'}")
+
+    def import_subscriptions(self, args):
+        """从文件批量导入订阅"""
+        try:
+            added = self.subscription_manager.import_subscriptions(args.path, replace=args.replace)
+            print(f"Imported {added} new subscriptions from {args.path}")
+        except (OSError, ValueError) as e:
+            print(f"Error importing subscriptions: {str(e)}")
+
+    def export_subscriptions(self, args):
+        """导出订阅和元数据"""
+        self.subscription_manager.export_subscriptions(args.path)
+        print(f"Subscriptions exported to: {args.path}")
+
     def remove_subscription(self, args):
         self.subscription_manager.remove_subscription(args.repo)
         print(f"Removed subscription: {args.repo}")
@@ -159,7 +292,7 @@ class CLI:
 
     def fetch_updates(self, _):
         updates = self.github_client.fetch_updates(self.subscription_manager.get_subscriptions())
-        print(f"Updates fetched: {json.dumps(updates, indent=4)}")
+        print(f"Updates fetched: {json.dumps(updates, indent=4, ensure_ascii=False, default=lambda record: record.to_dict())}")
         report = self.report_generator.generate(updates)
         print("Updates fetched:")
         print(report)
@@ -176,25 +309,72 @@ class CLI:
                 until = datetime.strptime(args.until, '%Y-%m-%d')
                 until = until.replace(hour=23, minute=59, second=59)
                 
-            updates = self.github_client.fetch_updates(
-                self.subscription_manager.get_subscriptions(), 
-                since=since,
-                until=until
-            )
-            
             # 使用新的文件命名规则
             filepath = self.config.get_export_filepath(since=since, until=until)
             
-            # 生成并保存报告
-            final_path = self.report_generator.generate_and_save(updates, filepath, with_summary=True)
-            if final_path.endswith('-with-summary.md'):
-                print(f"Report with AI summary exported to: {final_path}")
+            # 获取、生成、摘要并保存报告，每个阶段只执行一次
+            result = self.pipeline.run(
+                self.subscription_manager.get_subscriptions(),
+                since=since,
+                until=until,
+                filepath=filepath,
+                title_since=args.since,
+                title_until=args.until
+            )
+            if result.summary_file:
+                print(f"Report with AI summary exported to: {result.summary_file}")
             else:
-                print(f"Report exported to: {final_path} (without AI summary)")
+                print(f"Report exported to: {result.filepath} (without AI summary)")
+            print(f"Stage timings: {result.describe()}")
             
         except Exception as e:
             print(f"Error exporting updates: {str(e)}")
 
+    def search_reports(self, args):
+        """全文检索已导出的报告"""
+        search_index = self.report_generator.catalog.search_index
+        if search_index is None:
+            print("Search index is not available")
+            return
+        start = time.perf_counter()
+        hits = search_index.search(args.query, repo=args.repo, kind=args.kind, limit=args.limit)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{len(hits)} results for '{args.query}' ({elapsed:.1f} ms):")
+        for hit in hits:
+            dates = hit.since if not hit.until or hit.until == hit.since else f"{hit.since} ~ {hit.until}"
+            print(f"- [{hit.kind}] {hit.filename} ({hit.repo or '-'}, {dates or '-'}, score {hit.score:.2f})")
+            if hit.snippet:
+                print(f"    {hit.snippet}")
+
+    def compact_exports(self, _):
+        """按保留策略压缩和归档旧报告"""
+        try:
+            stats = ExportStore.for_config(self.config, self.report_generator.catalog).compact()
+            print(stats.describe())
+        except Exception as e:
+            print(f"Error compacting exports: {str(e)}")
+
+    def show_stats(self, _):
+        """显示本进程的API请求和缓存命中统计，以及任务队列中各状态的任务数"""
+        http_cache = self.github_client.http_cache
+        fetch_cache = self.github_client.fetch_cache
+        sections = [
+            ('GitHub requests', self.github_client.get_stats()),
+            ('HTTP cache', http_cache.get_stats() if http_cache else None),
+            ('Fetch cache', fetch_cache.get_stats() if fetch_cache else None),
+            ('LLM cache', self.llm_processor.get_cache_stats() if self.llm_processor.cache else None),
+        ]
+        if self.jobs and self.jobs.queue:
+            sections.append(('Jobs', self.jobs.queue.get_stats()))
+        for title, stats in sections:
+            if stats is None:
+                print(f"{title}: disabled")
+            else:
+                print(f"{title}: {', '.join(f'{k}={v}' for k, v in sorted(stats.items())) or 'no data'}")
+        for status in self.github_client.token_pool.get_status():
+            reset = datetime.fromtimestamp(status['reset']).strftime('%H:%M:%S')
+            print(f"Token {status['token']} [{status['resource']}]: {status['remaining']} remaining, resets at {reset}")
+
     def print_help(self, _):
         help_text = ["GitHub Sentinel Command Line Interface\n"]
         help_text.append("Available commands:")
@@ -245,35 +425,68 @@ class CLI:
             if args.date:
                 report_date = datetime.strptime(args.date, '%Y-%m-%d')
             else:
-                report_date = datetime.now()
+                report_date = utc_now()
             
             since = report_date.replace(hour=0, minute=0, second=0, microsecond=0)
             until = since + timedelta(days=1)
             
             subscriptions = self.subscription_manager.get_subscriptions()
-            for repo in subscriptions:
-                self._generate_daily_report(repo, since, until, report_date)
+            if args.queue:
+                if not self.jobs:
+                    print("Job queue is not available")
+                    return
+                self._run_daily_jobs(subscriptions, since, until)
+            elif len(subscriptions) == 1:
+                # 单个仓库时流式输出摘要
+                self._generate_daily_report(subscriptions[0], since, until, report_date)
+            elif subscriptions:
+                # 多个仓库时获取和摘要并发进行
+                pipeline = AsyncDailyPipeline(self.config, self.github_client, self.report_generator,
+                                              self.llm_processor)
+                results = pipeline.run(subscriptions, since, until)
+                failed = [result for result in results if result.error]
+                print(f"Daily reports finished: {len(results) - len(failed)} succeeded, {len(failed)} failed")
+                for result in failed:
+                    print(f"  {result.repo}: {result.error}")
             
         except ValueError as e:
             print(f"Error: Invalid date format. Please use YYYY-MM-DD. ({str(e)})")
         except Exception as e:
             print(f"Error generating daily report: {str(e)}")
 
+    def _run_daily_jobs(self, subscriptions: List[str], since: datetime, until: datetime):
+        """为每个仓库提交每日报告任务链，在jobs.wait_timeout内等待全部结束"""
+        job_ids = {
+            repo: self.jobs.submit_report(repo, since, until, summarize=True, force=True)
+            for repo in subscriptions
+        }
+        failed = 0
+        deadline = time.time() + self.jobs.wait_timeout
+        for repo, job_id in job_ids.items():
+            job = self.jobs.wait(job_id, timeout=max(deadline - time.time(), 0))
+            if job is not None and job.status == 'done':
+                print(f"{repo}: report exported to {job.result.get('filepath')}")
+            else:
+                failed += 1
+                print(f"{repo}: failed: {job.error if job else '任务超时'}")
+        print(f"Daily reports finished: {len(job_ids) - failed} succeeded, {failed} failed")
+
     def _generate_daily_report(self, repo: str, since: datetime, until: datetime, report_date: datetime):
-        """为单个仓库生成每日报告"""
-        # 获取当日更新
-        updates = self.github_client.fetch_updates([repo], since=since)
-        
-        # 使用新的文件命名规则
-        filepath = self.config.get_export_filepath(repo=repo, since=since)
-        
-        # 生成并保存报告
+        """为单个仓库生成每日报告，AI摘要边生成边输出到终端"""
         try:
-            final_path = self.report_generator.generate_and_save(updates, filepath, with_summary=True)
-            if final_path.endswith('-with-summary.md'):
-                print(f"Daily report with AI summary exported to: {final_path}")
+            result = None
+            for item in self.pipeline.stream(repo, since=since, until=until,
+                                             title_since=report_date.strftime('%Y-%m-%d')):
+                if isinstance(item, PipelineResult):
+                    result = item
+                else:
+                    print(item, end='', flush=True)
+            if result.summary_file:
+                print()
+                print(f"Daily report with AI summary exported to: {result.summary_file}")
             else:
-                print(f"Daily report exported to: {final_path} (without AI summary)")
+                print(f"Daily report exported to: {result.filepath} (without AI summary)")
+            print(f"Stage timings: {result.describe()}")
         except Exception as e:
             print(f"Error generating report: {str(e)}")
 
@@ -284,10 +497,7 @@ class CLI:
         
         lines = []
         for commit in commits:
-            sha = commit.get('sha', '')[:7]
-            message = commit.get('commit', {}).get('message', '').split('\n')[0]
-            author = commit.get('commit', {}).get('author', {}).get('name', 'Unknown')
-            lines.append(f"- [`{sha}`] {message} (by {author})")
+            lines.append(f"- [`{commit.sha[:7]}`] {commit.message} (by {commit.author})")
         
         return '\n'.join(lines) + '\n'
 
@@ -298,11 +508,7 @@ class CLI:
         
         lines = []
         for issue in issues:
-            number = issue.get('number')
-            title = issue.get('title')
-            state = issue.get('state')
-            url = issue.get('html_url')
-            lines.append(f"- #{number} [{title}]({url}) ({state})")
+            lines.append(f"- #{issue.number} [{issue.title}]({issue.html_url}) ({issue.state})")
         
         return '\n'.join(lines) + '\n'
 
@@ -313,11 +519,6 @@ class CLI:
         
         lines = []
         for pr in prs:
-            number = pr.get('number')
-            title = pr.get('title')
-            state = pr.get('state')
-            url = pr.get('html_url')
-            user = pr.get('user', {}).get('login', 'Unknown')
-            lines.append(f"- #{number} [{title}]({url}) by @{user} ({state})")
+            lines.append(f"- #{pr.number} [{pr.title}]({pr.html_url}) by @{pr.user} ({pr.state})")
         
         return '\n'.join(lines) + '\n' 
\ No newline at end of file
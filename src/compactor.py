@@ -0,0 +1,230 @@
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from models import Commit, format_github_time
+from utils import estimate_tokens
+
+# 条目优先级，数值越小越先保留
+PRIORITY_RELEASE = 0
+PRIORITY_MERGED_PR = 1
+PRIORITY_OPEN_PR = 2
+PRIORITY_OPEN_ISSUE = 3
+PRIORITY_CLOSED = 4
+PRIORITY_COMMIT = 5
+
+SECTIONS = ('releases', 'commits', 'pull_requests', 'issues')
+SECTION_TITLES = {
+    'releases': 'Latest Release',
+    'commits': 'Commits',
+    'pull_requests': 'Pull Requests',
+    'issues': 'Issues',
+}
+
+
+class CompactionResult(NamedTuple):
+    """压缩结果"""
+    markdown: str
+    original_tokens: int
+    compact_tokens: int
+    omitted_items: int
+    collapsed_items: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.original_tokens - self.compact_tokens, 0)
+
+    def describe(self) -> str:
+        """用于日志输出的一行说明"""
+        line = (f"LLM input compacted: {self.original_tokens} -> {self.compact_tokens} tokens "
+                f"({self.tokens_saved} saved)")
+        if self.collapsed_items:
+            line += f", {self.collapsed_items} duplicate or bot/merge items collapsed"
+        if self.omitted_items:
+            line += f", {self.omitted_items} low-priority items omitted"
+        return line
+
+
+class _Entry(NamedTuple):
+    """待输出的一行条目"""
+    repo: str
+    section: str
+    group: str
+    priority: int
+    recency: float
+    line: str
+
+
+class Compactor:
+    """发送给LLM之前的输入压缩
+
+    在完整报告和摘要调用之间对更新数据做以下处理：
+    去掉/issues接口返回的PR（它们已出现在PR章节）、把机器人提交和合并提交折叠为计数、
+    按标签分组议题和PR。默认不截断，超长的输入交给LLMProcessor的map-reduce分块摘要；
+    配置了token_budget时按优先级截断到预算内。写入文件的完整报告不受影响。
+    """
+
+    def __init__(self, config):
+        """初始化压缩器
+
+        Args:
+            config: 配置对象，读取compaction配置段
+        """
+        compaction_config = getattr(config, 'compaction_config', {})
+        self.enabled = compaction_config.get('enabled', True)
+        # 未配置时不截断，避免预算低于map-reduce阈值导致分块摘要永远不会触发
+        self.token_budget: Optional[int] = compaction_config.get('token_budget')
+        self.bot_authors = tuple(a.lower() for a in compaction_config.get('bot_authors', ['dependabot', 'renovate']))
+
+    def compact(self, updates: Dict[str, Dict], original_markdown: str) -> CompactionResult:
+        """压缩更新数据为LLM输入
+
+        Args:
+            updates: 仓库 -> 更新数据的字典
+            original_markdown: 完整报告，未启用压缩时原样返回，并用于计算节省的token
+
+        Returns:
+            CompactionResult: 压缩后的markdown和token统计
+        """
+        original_tokens = estimate_tokens(original_markdown)
+        if not self.enabled:
+            return CompactionResult(original_markdown, original_tokens, original_tokens, 0)
+
+        entries: List[_Entry] = []
+        notes: Dict[str, List[str]] = {}
+        collapsed = 0
+        for repo, data in updates.items():
+            repo_entries, repo_notes, repo_collapsed = self._repo_entries(repo, data)
+            entries += repo_entries
+            notes[repo] = repo_notes
+            collapsed += repo_collapsed
+
+        kept, omitted = self._truncate(entries, sum(estimate_tokens(n) for ns in notes.values() for n in ns))
+        markdown = self._render(updates.keys(), kept, notes, omitted)
+        return CompactionResult(markdown, original_tokens, estimate_tokens(markdown), sum(omitted.values()),
+                                collapsed)
+
+    def is_bot(self, commit: Commit) -> bool:
+        """是否为机器人提交"""
+        login = (commit.author_login or commit.author or '').lower()
+        return login.endswith('[bot]') or any(bot in login for bot in self.bot_authors)
+
+    @staticmethod
+    def is_merge(commit: Commit) -> bool:
+        """是否为合并提交"""
+        if commit.parent_count and commit.parent_count > 1:
+            return True
+        message = commit.message or ''
+        return message.startswith('Merge pull request') or message.startswith('Merge branch')
+
+    @staticmethod
+    def _recency(value: Optional[datetime]) -> float:
+        # 越新的条目排序越靠前
+        return -value.timestamp() if value else 0.0
+
+    def _repo_entries(self, repo: str, data: Dict) -> Tuple[List[_Entry], List[str], int]:
+        """生成单个仓库的条目、折叠说明和被折叠或去重的条目数"""
+        entries, notes, collapsed = [], [], 0
+
+        for endpoint, error in (data.get('errors') or {}).items():
+            notes.append(f"- Fetch error ({endpoint}): {error}\n")
+
+        release = data.get('releases')
+        if release:
+            line = (f"- {release.tag_name or 'N/A'} {release.name or ''} "
+                    f"({format_github_time(release.published_at) or 'N/A'})\n")
+            entries.append(_Entry(repo, 'releases', '', PRIORITY_RELEASE, 0.0, line))
+
+        # 机器人提交和合并提交只保留计数
+        bots, merges = Counter(), 0
+        for commit in data.get('commits') or []:
+            if self.is_bot(commit):
+                bots[commit.author_login or commit.author] += 1
+            elif self.is_merge(commit):
+                merges += 1
+            else:
+                line = f"- {commit.message} (by {commit.author})\n"
+                entries.append(_Entry(repo, 'commits', '', PRIORITY_COMMIT, self._recency(commit.date), line))
+        collapsed += sum(bots.values()) + merges
+        if bots:
+            detail = ', '.join(f"{author} x{count}" for author, count in bots.most_common())
+            notes.append(f"- {sum(bots.values())} bot commits collapsed ({detail})\n")
+        if merges:
+            notes.append(f"- {merges} merge commits collapsed\n")
+
+        # PR同时出现在/issues结果中，按编号去重
+        prs = data.get('pull_requests') or []
+        pr_numbers = {pr.number for pr in prs}
+        for pr in prs:
+            if pr.merged_at:
+                priority, state = PRIORITY_MERGED_PR, 'merged'
+            elif pr.state == 'open':
+                priority, state = PRIORITY_OPEN_PR, 'open'
+            else:
+                priority, state = PRIORITY_CLOSED, pr.state
+            line = f"- #{pr.number} {pr.title} by @{pr.user} ({state})\n"
+            entries.append(_Entry(repo, 'pull_requests', self._group(pr.labels), priority,
+                                  self._recency(pr.updated_at), line))
+        for issue in data.get('issues') or []:
+            if issue.is_pull_request or issue.number in pr_numbers:
+                collapsed += 1
+                continue
+            priority = PRIORITY_OPEN_ISSUE if issue.state == 'open' else PRIORITY_CLOSED
+            line = f"- #{issue.number} {issue.title} ({issue.state})\n"
+            entries.append(_Entry(repo, 'issues', self._group(issue.labels), priority,
+                                  self._recency(issue.updated_at), line))
+        return entries, notes, collapsed
+
+    @staticmethod
+    def _group(labels) -> str:
+        """按第一个标签分组，避免多标签条目重复出现"""
+        return labels[0] if labels else ''
+
+    def _truncate(self, entries: List[_Entry], reserved: int) -> Tuple[List[_Entry], Counter]:
+        """按优先级和时间保留预算内的条目，返回保留的条目和各仓库省略的数量"""
+        ordered = sorted(entries, key=lambda e: (e.priority, e.recency))
+        if self.token_budget is None:
+            return ordered, Counter()
+        budget = self.token_budget - reserved
+        kept, omitted = [], Counter()
+        for entry in ordered:
+            cost = estimate_tokens(entry.line)
+            if cost <= budget:
+                kept.append(entry)
+                budget -= cost
+            else:
+                omitted[entry.repo] += 1
+        return kept, omitted
+
+    @staticmethod
+    def _render(repos, kept: List[_Entry], notes: Dict[str, List[str]], omitted: Counter) -> str:
+        """按仓库、章节和标签分组输出markdown"""
+        # repo -> section -> group -> lines，保持优先级排序后的顺序
+        tree: Dict[str, Dict[str, Dict[str, List[str]]]] = {}
+        for entry in kept:
+            groups = tree.setdefault(entry.repo, {}).setdefault(entry.section, OrderedDict())
+            groups.setdefault(entry.group, []).append(entry.line)
+
+        parts = []
+        for repo in repos:
+            parts.append(f"\n## {repo}\n\n")
+            sections = tree.get(repo, {})
+            for section in SECTIONS:
+                groups = sections.get(section)
+                if not groups:
+                    continue
+                parts.append(f"### {SECTION_TITLES[section]}\n")
+                for group, lines in groups.items():
+                    if group:
+                        parts.append(f"#### {group}\n")
+                    elif len(groups) > 1:
+                        parts.append("#### Unlabeled\n")
+                    parts.extend(lines)
+                parts.append("\n")
+            if notes.get(repo) or omitted[repo]:
+                parts.append("### Notes\n")
+                parts.extend(notes.get(repo, []))
+                if omitted[repo]:
+                    parts.append(f"- {omitted[repo]} lower-priority items omitted to fit the token budget\n")
+                parts.append("\n")
+        return ''.join(parts)
@@ -15,8 +15,13 @@ class Config:
             
             # GitHub配置
             self.github_token = os.getenv('GITHUB_TOKEN')
+            # 可通过GITHUB_TOKENS配置多个逗号分隔的token，共同分担速率限制
+            extra_tokens = [t.strip() for t in os.getenv('GITHUB_TOKENS', '').split(',') if t.strip()]
+            if not self.github_token and extra_tokens:
+                self.github_token = extra_tokens[0]
             if not self.github_token:
                 raise ValueError("GitHub token not found in environment variables")
+            self.github_tokens = list(dict.fromkeys([self.github_token] + extra_tokens))
             self.github_config = config.get('github', {})
             
             # OpenAI配置
@@ -31,6 +36,12 @@ class Config:
             self.openai_temperature = openai_config.get('temperature', 0.7)
             self.openai_system_prompt = openai_config.get('system_prompt', '')
             self.prompt_dir = openai_config.get('prompt_dir', 'prompt')
+            self.openai_cache_config = openai_config.get('cache', {})
+            self.openai_map_reduce_config = openai_config.get('map_reduce', {})
+            # 摘要模式：report直接摘要整份报告，items先逐条目摘要再汇总
+            self.openai_summary_mode = openai_config.get('summary_mode', 'report')
+            # 发送给LLM之前的输入压缩配置
+            self.compaction_config = config.get('compaction', {})
             
             # 确保prompt目录存在
             os.makedirs(self.prompt_dir, exist_ok=True)
@@ -42,10 +53,27 @@ class Config:
             # 确保导出目录存在
             os.makedirs(self.exports_dir, exist_ok=True)
             
+            # 缓存配置
+            self.cache_config = config.get('cache', {})
+            self.cache_dir = self.cache_config.get('directory', '.cache')
+            
+            # 本地事件存储配置
+            self.store_config = config.get('store', {})
+            
+            # 报告任务队列配置
+            self.jobs_config = config.get('jobs', {})
+            
+            # 多仓库每日报告的并发配置
+            self.daily_config = config.get('daily', {})
+            
             # 其他配置
             self.notification_settings = config.get('notification_settings', {})
             self.subscriptions_file = config.get('subscriptions_file', 'subscriptions.json')
             self.update_interval = config.get('update_interval', 24 * 60 * 60)
+            # 调度器的自适应轮询配置
+            self.scheduler_config = config.get('scheduler', {})
+            # 多节点分片配置
+            self.sharding_config = config.get('sharding', {})
 
     def get_export_filepath(self, repo: str = None, since: datetime = None, until: datetime = None) -> str:
         """生成导出文件路径
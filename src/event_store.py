@@ -0,0 +1,150 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from models import ENDPOINT_MODELS, GITHUB_TIME_FORMAT as TIME_FORMAT, Record, utc_now
+
+# 存储的条目格式版本，版本变化时清空旧数据重新同步
+SCHEMA_VERSION = 1
+
+
+def _format_time(value: datetime) -> str:
+    return value.strftime(TIME_FORMAT)
+
+
+def _item_key(endpoint: str, item: Record) -> Tuple[str, Optional[str]]:
+    """获取记录的唯一标识和用于时间窗口查询的时间"""
+    if endpoint == 'commits':
+        return item.sha, _format_time(item.date) if item.date else None
+    if endpoint == 'releases':
+        return str(item.id), _format_time(item.published_at) if item.published_at else None
+    return str(item.id), _format_time(item.updated_at) if item.updated_at else None
+
+
+class EventStore:
+    """基于SQLite的本地增量事件存储
+
+    按id upsert提交、议题、PR和发布，并按仓库和接口记录已同步的时间区间。
+    同步过的时间窗口直接用索引查询回答，只有未覆盖的区间才需要请求GitHub。
+    """
+
+    ENDPOINTS = ('releases', 'commits', 'issues', 'pull_requests')
+
+    def __init__(self, path: str):
+        """初始化事件存储
+
+        Args:
+            path: SQLite数据库文件路径
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS items")
+                self._conn.execute("DROP TABLE IF EXISTS coverage")
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS items (
+                    repo TEXT NOT NULL,
+                    endpoint TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    ts TEXT,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (repo, endpoint, item_id)
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_items_window ON items (repo, endpoint, ts)"
+            )
+            # 已同步的时间区间，同一仓库和接口的区间互不重叠
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS coverage (
+                    repo TEXT NOT NULL,
+                    endpoint TEXT NOT NULL,
+                    start TEXT NOT NULL,
+                    end TEXT NOT NULL,
+                    synced_at TEXT NOT NULL,
+                    PRIMARY KEY (repo, endpoint, start)
+                )
+            """)
+
+    def upsert(self, repo: str, endpoint: str, items: List[Record]):
+        """按id写入或更新记录"""
+        rows = []
+        for item in items:
+            item_id, ts = _item_key(endpoint, item)
+            rows.append((repo, endpoint, item_id, ts, json.dumps(item.to_dict(), ensure_ascii=False)))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO items (repo, endpoint, item_id, ts, data) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def query(self, repo: str, endpoint: str, since: datetime, until: datetime) -> List[Record]:
+        """查询时间窗口内的记录，按时间倒序"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM items WHERE repo = ? AND endpoint = ? AND ts >= ? AND ts <= ? "
+                "ORDER BY ts DESC",
+                (repo, endpoint, _format_time(since), _format_time(until))
+            ).fetchall()
+        model = ENDPOINT_MODELS[endpoint]
+        return [model.from_dict(json.loads(row[0])) for row in rows]
+
+    def _intervals(self, repo: str, endpoint: str) -> List[Tuple[str, str]]:
+        return self._conn.execute(
+            "SELECT start, end FROM coverage WHERE repo = ? AND endpoint = ? ORDER BY start",
+            (repo, endpoint)
+        ).fetchall()
+
+    def missing_ranges(self, repo: str, endpoint: str, since: datetime,
+                       until: datetime) -> List[Tuple[datetime, datetime]]:
+        """计算时间窗口中尚未同步的区间"""
+        with self._lock:
+            intervals = self._intervals(repo, endpoint)
+        gaps = []
+        cursor = since
+        for start, end in intervals:
+            start = datetime.strptime(start, TIME_FORMAT)
+            end = datetime.strptime(end, TIME_FORMAT)
+            if end < cursor:
+                continue
+            if start > until:
+                break
+            if start > cursor:
+                gaps.append((cursor, start))
+            cursor = max(cursor, end)
+        if cursor < until:
+            gaps.append((cursor, until))
+        return gaps
+
+    def add_coverage(self, repo: str, endpoint: str, since: datetime, until: datetime):
+        """记录已同步的区间，并与相邻或重叠的区间合并"""
+        start, end = _format_time(since), _format_time(until)
+        with self._lock, self._conn:
+            for other_start, other_end in self._intervals(repo, endpoint):
+                if other_end >= start and other_start <= end:
+                    start, end = min(start, other_start), max(end, other_end)
+                    self._conn.execute(
+                        "DELETE FROM coverage WHERE repo = ? AND endpoint = ? AND start = ?",
+                        (repo, endpoint, other_start)
+                    )
+            self._conn.execute(
+                "INSERT INTO coverage (repo, endpoint, start, end, synced_at) VALUES (?, ?, ?, ?, ?)",
+                (repo, endpoint, start, end, _format_time(utc_now()))
+            )
+
+    def get_watermark(self, repo: str, endpoint: str) -> Optional[datetime]:
+        """获取仓库接口已同步到的最新时间（高水位）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(end) FROM coverage WHERE repo = ? AND endpoint = ?", (repo, endpoint)
+            ).fetchone()
+        return datetime.strptime(row[0], TIME_FORMAT) if row and row[0] else None
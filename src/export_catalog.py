@@ -0,0 +1,209 @@
+import os
+import re
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from search_index import SearchIndex
+
+# 导出文件名：{owner_repo}_{YYYYMMDD}[-{YYYYMMDD}][{摘要后缀}].md
+FILENAME_PATTERN = re.compile(r'^(?P<slug>.+)_(?P<since>\d{8})(?:-(?P<until>\d{8}))?(?P<rest>.*)\.md$')
+# 多仓库报告的文件名前缀（见Config.get_export_filepath），不对应任何仓库
+MULTI_REPO_SLUG = 'github_updates'
+
+
+def _date(value: Optional[str]) -> Optional[str]:
+    """YYYYMMDD -> YYYY-MM-DD"""
+    return f"{value[:4]}-{value[4:6]}-{value[6:]}" if value else None
+
+
+class ExportCatalog:
+    """导出文件目录
+
+    在写入报告和摘要文件时登记仓库、日期范围和类型（raw/summary），
+    Gradio的报告列表直接查询索引并分页，不再遍历导出目录和逐个stat文件。
+    目录为空时从导出目录扫描一次进行回填。
+    提供search_index时，登记的文件同时写入全文检索索引。
+    """
+
+    def __init__(self, path: str, exports_dir: str, summary_suffix: str = '-with-summary',
+                 search_index: Optional[SearchIndex] = None, exists: Optional[Callable[[str], bool]] = None):
+        """初始化导出目录
+
+        Args:
+            path: SQLite数据库文件路径
+            exports_dir: 导出目录，用于首次回填
+            summary_suffix: 摘要文件名后缀
+            search_index: 可选，全文检索索引
+            exists: 可选，判断条目对应的报告是否仍然存在，默认检查文件；
+                报告转入导出存储后文件被删除，但条目仍然有效
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.exports_dir = exports_dir
+        self.summary_suffix = summary_suffix
+        self.search_index = search_index
+        self.exists = exists or os.path.exists
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS exports (
+                    path TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    repo TEXT,
+                    since TEXT,
+                    until TEXT,
+                    kind TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_exports_list ON exports (kind, mtime)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_exports_repo ON exports (repo, since)")
+            # 旧版本把多仓库报告登记为仓库github/updates
+            self._conn.execute("UPDATE exports SET repo = NULL WHERE repo = 'github/updates'")
+        if self.count() == 0:
+            self.rebuild()
+        elif search_index is not None and search_index.count() == 0:
+            # 已有目录但检索索引是新建的，补齐索引
+            search_index.sync(self.entries())
+
+    @classmethod
+    def for_config(cls, config) -> 'ExportCatalog':
+        """按配置打开导出目录，检索索引通过导出存储读取已压缩的报告，已转入存储的报告视为仍然存在"""
+        from export_store import ExportStore
+        exports_config = getattr(config, 'exports_config', {})
+        store = ExportStore.for_config(config)
+        return cls(
+            exports_config.get('catalog_path', os.path.join(config.cache_dir, 'exports_catalog.db')),
+            config.exports_dir,
+            exports_config.get('summary_suffix', '-with-summary'),
+            SearchIndex.for_config(config, reader=store.read),
+            store.exists,
+        )
+
+    def _parse_filename(self, filename: str) -> Dict[str, Optional[str]]:
+        """从文件名推断仓库、日期范围和类型"""
+        match = FILENAME_PATTERN.match(filename)
+        kind = 'summary' if filename.endswith(f"{self.summary_suffix}.md") else 'raw'
+        if not match:
+            return {'repo': None, 'since': None, 'until': None, 'kind': kind}
+        # 文件名中的仓库用下划线代替了斜杠；GitHub用户名不含下划线，第一个下划线即为斜杠
+        slug = match.group('slug')
+        return {
+            'repo': None if slug == MULTI_REPO_SLUG else slug.replace('_', '/', 1),
+            'since': _date(match.group('since')),
+            'until': _date(match.group('until')),
+            'kind': kind,
+        }
+
+    def record(self, path: str, repo: Optional[str] = None, since: Optional[str] = None,
+               until: Optional[str] = None, kind: Optional[str] = None):
+        """登记一个刚写入的导出文件，未提供的字段从文件名推断
+
+        Args:
+            path: 文件路径
+            repo: 可选，仓库名称，多仓库报告为None
+            since: 可选，开始日期（YYYY-MM-DD）
+            until: 可选，结束日期（YYYY-MM-DD）
+            kind: 可选，raw或summary
+        """
+        filename = os.path.basename(path)
+        inferred = self._parse_filename(filename)
+        st = os.stat(path)
+        row = (
+            os.path.abspath(path), filename,
+            repo or inferred['repo'], since or inferred['since'], until or inferred['until'],
+            kind or inferred['kind'], st.st_size, st.st_mtime,
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO exports (path, filename, repo, since, until, kind, size, mtime) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row
+            )
+        if self.search_index is not None:
+            # 检索索引失败不影响报告的登记
+            try:
+                self.search_index.add(path, *row[2:6], size=row[6], mtime=row[7])
+            except Exception as e:
+                print(f"Error indexing {path}: {str(e)}")
+
+    def remove(self, path: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM exports WHERE path = ?", (os.path.abspath(path),))
+        if self.search_index is not None:
+            self.search_index.remove(path)
+
+    def rebuild(self) -> int:
+        """扫描导出目录重建索引，返回登记的文件数
+
+        登记在应用之外新增的文件，并移除报告已不存在的条目。
+        """
+        found = set()
+        if os.path.isdir(self.exports_dir):
+            for entry in os.scandir(self.exports_dir):
+                if entry.is_file() and entry.name.endswith('.md'):
+                    self.record(entry.path)
+                    found.add(os.path.abspath(entry.path))
+        for entry in self.entries():
+            if entry['path'] not in found and not self.exists(entry['path']):
+                self.remove(entry['path'])
+        return len(found)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM exports").fetchone()[0]
+
+    def entries(self) -> List[Dict]:
+        """目录中的全部条目"""
+        rows, _ = self.query(kind=None, limit=-1)
+        return rows
+
+    def query(self, repo: Optional[str] = None, date_from: Optional[str] = None,
+              date_to: Optional[str] = None, kind: Optional[str] = 'summary',
+              offset: int = 0, limit: int = 20) -> Tuple[List[Dict], int]:
+        """按条件分页查询，按生成时间倒序
+
+        Args:
+            repo: 可选，仓库名称
+            date_from: 可选，报告结束日期不早于该日期（YYYY-MM-DD）
+            date_to: 可选，报告开始日期不晚于该日期（YYYY-MM-DD）
+            kind: 可选，raw或summary，None表示全部
+            offset: 跳过的条数
+            limit: 返回的条数
+
+        Returns:
+            Tuple[List[Dict], int]: (当前页的条目, 符合条件的总数)
+        """
+        conditions, params = [], []
+        if kind:
+            conditions.append("kind = ?")
+            params.append(kind)
+        if repo:
+            conditions.append("repo = ?")
+            params.append(repo)
+        if date_from:
+            conditions.append("COALESCE(until, since) >= ?")
+            params.append(date_from)
+        if date_to:
+            conditions.append("since <= ?")
+            params.append(date_to)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM exports {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT path, filename, repo, since, until, kind, size, mtime FROM exports {where} "
+                "ORDER BY mtime DESC LIMIT ? OFFSET ?", params + [limit, offset]
+            ).fetchall()
+        columns = ('path', 'filename', 'repo', 'since', 'until', 'kind', 'size', 'mtime')
+        return [dict(zip(columns, row)) for row in rows], total
+
+    def repos(self) -> List[str]:
+        """目录中出现过的仓库"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT repo FROM exports WHERE repo IS NOT NULL ORDER BY repo"
+            ).fetchall()
+        return [row[0] for row in rows]
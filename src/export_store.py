@@ -0,0 +1,306 @@
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zipfile
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from llm import SUMMARY_SEPARATOR
+from utils import atomic_write
+
+try:
+    import zstandard
+except ImportError:  # zstandard是可选依赖，未安装时只能使用gzip
+    zstandard = None
+
+# 压缩格式的魔数，读取时据此选择解压方式
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+class BlobStore:
+    """内容寻址的压缩对象存储
+
+    对象按内容的sha256存放在objects/<前两位>/<摘要>，相同内容只保存一份。
+    写入时默认用gzip压缩，安装了zstandard时可配置为zstd。归档后的对象移入
+    packs/<名称>.zip，读取时先查散列对象再查归档包。其他进程归档后，
+    散列对象会被删除，此时重新扫描归档包目录后再查找。
+    """
+
+    def __init__(self, directory: str, codec: Optional[str] = None):
+        """初始化对象存储
+
+        Args:
+            directory: 存储目录
+            codec: 可选，gzip或zstd，默认gzip；配置为zstd但未安装zstandard时使用gzip
+        """
+        self.directory = directory
+        self.codec = codec or 'gzip'
+        if self.codec == 'zstd' and zstandard is None:
+            print("Warning: zstandard not installed, falling back to gzip")
+            self.codec = 'gzip'
+        self._lock = threading.Lock()
+        self._packs: Dict[str, str] = {}
+        self._load_packs()
+
+    def _load_packs(self):
+        """扫描归档包目录，更新对象所在的归档包"""
+        packs_dir = os.path.join(self.directory, 'packs')
+        if not os.path.isdir(packs_dir):
+            return
+        packs = {}
+        for name in sorted(os.listdir(packs_dir)):
+            if name.endswith('.zip'):
+                with zipfile.ZipFile(os.path.join(packs_dir, name)) as pack:
+                    for digest in pack.namelist():
+                        packs[digest] = name
+        with self._lock:
+            self._packs.update(packs)
+
+    def _pack_for(self, digest: str) -> Optional[str]:
+        """对象所在的归档包，未找到时重新扫描一次归档包目录"""
+        pack_name = self._packs.get(digest)
+        if pack_name is None:
+            self._load_packs()
+            pack_name = self._packs.get(digest)
+        return pack_name
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, 'objects', digest[:2], digest)
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return gzip.compress(data, compresslevel=9, mtime=0)
+
+    @staticmethod
+    def _decompress(data: bytes) -> bytes:
+        if data.startswith(ZSTD_MAGIC):
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read zstd-compressed objects")
+            return zstandard.ZstdDecompressor().decompress(data)
+        if data.startswith(GZIP_MAGIC):
+            return gzip.decompress(data)
+        return data
+
+    def contains(self, digest: str) -> bool:
+        return digest in self._packs or os.path.exists(self._object_path(digest))
+
+    def put(self, data: bytes) -> str:
+        """保存内容并返回摘要，内容已存在时不重复写入"""
+        digest = hashlib.sha256(data).hexdigest()
+        if not self.contains(digest):
+            with atomic_write(self._object_path(digest), binary=True) as f:
+                f.write(self._compress(data))
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """按摘要读取内容，不存在时抛出KeyError"""
+        try:
+            with open(self._object_path(digest), 'rb') as f:
+                return self._decompress(f.read())
+        except FileNotFoundError:
+            # 散列对象不存在或刚被其他进程移入归档包
+            pass
+        pack_name = self._pack_for(digest)
+        if pack_name is None:
+            raise KeyError(digest)
+        with zipfile.ZipFile(os.path.join(self.directory, 'packs', pack_name)) as pack:
+            return self._decompress(pack.read(digest))
+
+    def stored_size(self, digest: str) -> int:
+        """对象压缩后占用的字节数"""
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return os.path.getsize(path)
+        pack_name = self._pack_for(digest)
+        if pack_name is None:
+            raise KeyError(digest)
+        with zipfile.ZipFile(os.path.join(self.directory, 'packs', pack_name)) as pack:
+            return pack.getinfo(digest).compress_size
+
+    def pack(self, digests: Iterable[str], name: str) -> int:
+        """把散列对象移入归档包packs/<name>.zip，返回移入的对象数
+
+        对象已经是压缩后的内容，归档包内不再压缩。已在其他归档包中的对象保持不变。
+        """
+        pack_name = f"{name}.zip"
+        pack_path = os.path.join(self.directory, 'packs', pack_name)
+        os.makedirs(os.path.dirname(pack_path), exist_ok=True)
+        moved = []
+        with self._lock, zipfile.ZipFile(pack_path, 'a', compression=zipfile.ZIP_STORED) as pack:
+            for digest in dict.fromkeys(digests):
+                path = self._object_path(digest)
+                if digest in self._packs or not os.path.exists(path):
+                    continue
+                pack.write(path, digest)
+                moved.append(digest)
+        # 归档包写完并关闭后再删除散列对象
+        for digest in moved:
+            self._packs[digest] = pack_name
+            os.unlink(self._object_path(digest))
+        return len(moved)
+
+
+class StoreStats(NamedTuple):
+    stored: int
+    archived: int
+    markdown_bytes: int
+    store_bytes: int
+
+    def describe(self) -> str:
+        return (f"Stored {self.stored} reports ({self.markdown_bytes / 1024:.1f} KB of markdown), "
+                f"archived {self.archived}; store size {self.store_bytes / 1024:.1f} KB")
+
+
+class ExportStore:
+    """导出报告的去重压缩存储
+
+    带摘要的报告由摘要和原始报告两部分组成，原始报告与同名的原始报告文件内容相同。
+    存储时把两部分分别放入BlobStore，相同内容只保存一份并压缩。
+    超过compress_after_days天的报告转入存储并删除markdown文件；
+    超过archive_after_days天的报告按月打包到归档包。
+    导出目录中已不存在的报告可通过read按需还原为原来的markdown。
+    """
+
+    def __init__(self, directory: str, catalog=None, compress_after_days: int = 7, archive_after_days: int = 30,
+                 codec: Optional[str] = None, clock=time.time):
+        """初始化导出存储
+
+        Args:
+            directory: 存储目录
+            catalog: 可选，导出目录（ExportCatalog），只读取报告时可以为None
+            compress_after_days: 报告生成多少天后转入压缩存储
+            archive_after_days: 报告生成多少天后按月归档
+            codec: 可选，gzip或zstd，默认gzip
+            clock: 可选，返回当前epoch秒数的时钟
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.catalog = catalog
+        self.compress_after_days = compress_after_days
+        self.archive_after_days = archive_after_days
+        self.clock = clock
+        self.blobs = BlobStore(directory, codec)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, 'manifest.db'), check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS stored_exports (
+                    path TEXT PRIMARY KEY,
+                    parts TEXT NOT NULL,
+                    month TEXT NOT NULL,
+                    mtime REAL NOT NULL,
+                    archived INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+
+    @classmethod
+    def for_config(cls, config, catalog=None) -> 'ExportStore':
+        """按配置打开导出存储"""
+        storage = getattr(config, 'exports_config', {}).get('storage', {})
+        return cls(
+            storage.get('directory', os.path.join(config.exports_dir, 'store')),
+            catalog,
+            compress_after_days=storage.get('compress_after_days', 7),
+            archive_after_days=storage.get('archive_after_days', 30),
+            codec=storage.get('codec'),
+        )
+
+    @staticmethod
+    def _split(text: str, kind: str) -> List[str]:
+        """把带摘要的报告拆成摘要（含分隔符）和原始报告两部分"""
+        if kind == 'summary' and SUMMARY_SEPARATOR in text:
+            summary, raw = text.split(SUMMARY_SEPARATOR, 1)
+            return [summary + SUMMARY_SEPARATOR, raw]
+        return [text]
+
+    def _month(self, entry: Dict) -> str:
+        if entry.get('since'):
+            return entry['since'][:7]
+        return datetime.fromtimestamp(entry['mtime']).strftime('%Y-%m')
+
+    def store(self, entry: Dict) -> int:
+        """把一个导出文件转入存储并删除原文件，返回原文件的字节数
+
+        Args:
+            entry: 导出目录的条目，需包含path、kind、since和mtime
+        """
+        path = entry['path']
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        parts = [self.blobs.put(part.encode('utf-8')) for part in self._split(text, entry['kind'])]
+        # 确认能完整还原后才删除原文件
+        if ''.join(self.blobs.get(digest).decode('utf-8') for digest in parts) != text:
+            raise RuntimeError(f"Stored content of {path} does not match the original")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stored_exports (path, parts, month, mtime, archived) VALUES (?, ?, ?, ?, 0)",
+                (os.path.abspath(path), json.dumps(parts), self._month(entry), entry['mtime'])
+            )
+        size = os.path.getsize(path)
+        os.unlink(path)
+        return size
+
+    def exists(self, path: str) -> bool:
+        """报告在导出目录或存储中是否存在"""
+        if os.path.exists(path):
+            return True
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM stored_exports WHERE path = ?",
+                                      (os.path.abspath(path),)).fetchone() is not None
+
+    def read(self, path: str) -> Optional[str]:
+        """读取报告的markdown，文件已转入存储时从对象还原，不存在时返回None"""
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        with self._lock:
+            row = self._conn.execute("SELECT parts FROM stored_exports WHERE path = ?",
+                                     (os.path.abspath(path),)).fetchone()
+        if row is None:
+            return None
+        return ''.join(self.blobs.get(digest).decode('utf-8') for digest in json.loads(row[0]))
+
+    def compact(self) -> StoreStats:
+        """按保留策略转存和归档旧报告"""
+        now = self.clock()
+        compress_before = now - self.compress_after_days * 86400
+        archive_month = (datetime.fromtimestamp(now) - timedelta(days=self.archive_after_days)).strftime('%Y-%m')
+
+        stored, markdown_bytes = 0, 0
+        for entry in self.catalog.entries():
+            if entry['mtime'] >= compress_before or not os.path.exists(entry['path']):
+                continue
+            try:
+                markdown_bytes += self.store(entry)
+                stored += 1
+            except Exception as e:
+                print(f"Error storing {entry['path']}: {str(e)}")
+
+        # 整月都早于归档期限的报告按月打包
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, parts, month FROM stored_exports WHERE archived = 0 AND month < ?", (archive_month,)
+            ).fetchall()
+        months: Dict[str, List] = {}
+        for path, parts, month in rows:
+            months.setdefault(month, []).append((path, json.loads(parts)))
+        archived = 0
+        for month, entries in sorted(months.items()):
+            self.blobs.pack((digest for _, parts in entries for digest in parts), month)
+            with self._lock, self._conn:
+                self._conn.executemany("UPDATE stored_exports SET archived = 1 WHERE path = ?",
+                                       [(path,) for path, _ in entries])
+            archived += len(entries)
+
+        with self._lock:
+            digests = {digest for (parts,) in self._conn.execute("SELECT parts FROM stored_exports")
+                       for digest in json.loads(parts)}
+        store_bytes = sum(self.blobs.stored_size(digest) for digest in digests)
+        return StoreStats(stored, archived, markdown_bytes, store_bytes)
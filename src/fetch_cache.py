@@ -0,0 +1,106 @@
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from cache import DiskCache
+from models import ENDPOINT_MODELS, format_github_time, utc_now
+
+
+class FetchCache:
+    """接口获取结果的共享缓存
+
+    以(仓库, 接口, since, until)为键缓存GitHubClient各REST接口的结果，保存在SQLite中，
+    CLI、Gradio和调度器共用同一个文件。已经结束且完整获取的时间窗口不会再变化，永久缓存；
+    没有结束时间、结束时间接近当前或分页被截断的窗口只缓存open_ttl秒。
+    时间窗口和当前时间均为UTC。
+    同一进程内相同键的并发请求合并为一次获取（single-flight），其余调用方等待同一结果。
+    """
+
+    def __init__(self, cache: DiskCache, open_ttl: float = 300, settle_seconds: float = 600,
+                 clock: Optional[Callable[[], datetime]] = None):
+        """初始化获取结果缓存
+
+        Args:
+            cache: 持久化键值缓存
+            open_ttl: 未结束窗口的缓存秒数
+            settle_seconds: 窗口结束后再等待多少秒才视为不再变化，容忍GitHub的数据延迟
+            clock: 可选，返回当前naive UTC时间的时钟
+        """
+        self.cache = cache
+        self.open_ttl = open_ttl
+        self.settle_seconds = settle_seconds
+        self.clock = clock or utc_now
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+
+    @staticmethod
+    def key(repo: str, endpoint: str, since: Optional[datetime], until: Optional[datetime]) -> str:
+        """缓存键：(仓库, 接口, since, until)"""
+        return f"fetch:{repo}:{endpoint}:{format_github_time(since)}:{format_github_time(until)}"
+
+    def is_closed(self, until: Optional[datetime]) -> bool:
+        """窗口是否已经结束且不会再变化"""
+        return until is not None and until + timedelta(seconds=self.settle_seconds) <= self.clock()
+
+    @staticmethod
+    def _dump(endpoint: str, value: Any) -> Dict:
+        if endpoint == 'releases':
+            return {'value': value.to_dict() if value else None}
+        return {'value': [record.to_dict() for record in value]}
+
+    @staticmethod
+    def _load(endpoint: str, data: Dict) -> Any:
+        model = ENDPOINT_MODELS[endpoint]
+        if endpoint == 'releases':
+            return model.from_dict(data['value']) if data['value'] else None
+        return [model.from_dict(item) for item in data['value']]
+
+    def get_or_fetch(self, repo: str, endpoint: str, since: Optional[datetime], until: Optional[datetime],
+                     fetch: Callable[[str, Optional[datetime], Optional[datetime]], Tuple[Any, bool]]) -> Any:
+        """返回缓存的结果，未命中时调用fetch(repo, since, until)获取并缓存
+
+        fetch返回(结果, 是否完整)，不完整的结果即使窗口已结束也只缓存open_ttl秒。
+        获取失败时异常同时抛给所有等待同一结果的调用方，失败结果不缓存。
+        """
+        key = self.key(repo, endpoint, since, until)
+        cached = self.cache.get(key)
+        if cached is not None:
+            with self._lock:
+                self.stats['hits'] += 1
+            return self._load(endpoint, cached)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            # 上一个获取者可能刚刚写入缓存并离开
+            cached = self.cache.get(key)
+            if cached is not None:
+                value = self._load(endpoint, cached)
+                future.set_result(value)
+                return value
+            value, complete = fetch(repo, since, until)
+            self.cache.set(key, self._dump(endpoint, value),
+                           ttl=None if complete and self.is_closed(until) else self.open_ttl)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
@@ -1,53 +1,334 @@
-import requests
+import httpx
+import importlib.util
+import random
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from functools import partial
+from typing import List, Dict, Any, Optional, Iterator, Callable, NamedTuple, Tuple, Type
+import os
 import time
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
+from cache import DiskCache
+from event_store import EventStore
+from fetch_cache import FetchCache
+from models import Record, Release, Commit, Issue, PullRequest, utc_now
+from token_pool import TokenPool, RateLimitExhausted
+
+
+class GitHubAPIError(Exception):
+    """GitHub API请求失败"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ApiPage(NamedTuple):
+    """一次API请求的结果"""
+    data: Any
+    next_url: Optional[str] = None
+
 
 class GitHubClient:
     """GitHub API客户端"""
     
     BASE_URL = "https://api.github.com"
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, transport: Optional[httpx.BaseTransport] = None):
         """初始化GitHub客户端
         
         Args:
             config: Config对象，包含所有配置信息
+            transport: 可选，自定义httpx传输层，用于离线测试
         """
         self.config = config
         self.token = config.github_token  # 直接使用config对象中的token
         self.headers = {
-            'Authorization': f'Bearer {self.token}',
             'Accept': 'application/vnd.github.v3+json'
         }
+        # 多token额度调度，Authorization头按请求分配
+        self.token_pool = TokenPool(
+            getattr(config, 'github_tokens', None) or [self.token],
+            max_wait=config.github_config.get('rate_limit_max_wait')
+        )
+        self.session = self._create_session(transport)
         self.rate_limit_remaining = None
         self.rate_limit_reset = None
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+        # 每个线程因max_pages截断的分页次数，调用方据此判断结果是否完整
+        self._pagination = threading.local()
+        
+        # 本地增量事件存储
+        self.event_store = None
+        store_config = getattr(config, 'store_config', {})
+        if store_config.get('enabled', False):
+            self.event_store = EventStore(
+                store_config.get('path', os.path.join(config.cache_dir, 'events.db'))
+            )
+        # 最近多少秒内的区间不记为已同步：晚推送的提交带有较早的时间，下次同步时仍会取到
+        self.store_settle_seconds = store_config.get('settle_seconds', 86400)
+        
+        # 条件请求缓存
+        self.http_cache = None
+        if config.cache_config.get('http_enabled', True):
+            self.http_cache = DiskCache(
+                os.path.join(config.cache_dir, 'http_cache.db'),
+                int(config.cache_config.get('http_max_mb', 200) * 1024 * 1024)
+            )
+        
+        # 按(仓库, 接口, 时间窗口)缓存的获取结果，CLI、Gradio和调度器共用；
+        # 与条件请求缓存共用同一个文件和容量上限
+        self.fetch_cache = None
+        if config.cache_config.get('fetch_enabled', True):
+            self.fetch_cache = FetchCache(
+                self.http_cache or DiskCache(
+                    os.path.join(config.cache_dir, 'http_cache.db'),
+                    int(config.cache_config.get('http_max_mb', 200) * 1024 * 1024)
+                ),
+                open_ttl=config.cache_config.get('fetch_open_ttl', 300),
+                settle_seconds=config.cache_config.get('fetch_settle_seconds', 600)
+            )
 
-    def _make_request(self, url: str, params: Optional[Dict] = None) -> Dict:
-        """发送API请求并处理常见错误"""
-        try:
-            response = requests.get(url, headers=self.headers, params=params)
+    def _create_session(self, transport: Optional[httpx.BaseTransport] = None) -> httpx.Client:
+        """创建共享的连接池会话，复用keep-alive连接，安装h2时启用HTTP/2"""
+        pool_size = self.config.github_config.get('pool_size', 20)
+        http2 = (self.config.github_config.get('http2', True)
+                 and importlib.util.find_spec('h2') is not None)
+        return httpx.Client(
+            headers=self.headers,
+            http2=http2,
+            transport=transport,
+            timeout=self.config.github_config.get('timeout', 30),
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+            ),
+        )
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
+
+    def _cache_key(self, url: str, params: Optional[Dict]) -> str:
+        """由URL和排序后的参数生成缓存键
+        
+        键中不含until：它随每次轮询变化，包含时条件请求永远无法命中。
+        不同until的请求共用一个条目是安全的，内容由ETag校验，只有响应完全相同时才会收到304。
+        """
+        parsed = httpx.URL(url)
+        query = [(k, v) for k, v in parsed.params.multi_items() if k != 'until']
+        query += [(k, str(v)) for k, v in (params or {}).items() if k != 'until']
+        base = str(parsed.copy_with(query=None))
+        if not query:
+            return base
+        return f"{base}?{'&'.join(f'{k}={v}' for k, v in sorted(query))}"
+
+    def _count(self, name: str, value: int = 1):
+        """线程安全地累加统计计数"""
+        with self._stats_lock:
+            self.stats[name] += value
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取请求统计信息"""
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def _execute(self, method: str, url: str, headers: Dict, params: Optional[Dict] = None,
+                 json: Optional[Dict] = None, resource: str = 'core') -> httpx.Response:
+        """执行HTTP请求，按token池分配token，并对可重试的失败做退避重试
+        
+        Raises:
+            GitHubAPIError: 请求失败且重试次数用尽
+            RateLimitExhausted: 所有token额度耗尽且等待时间超过上限
+        """
+        self._count('requests')
+        max_retries = self.config.github_config.get('max_retries', 3)
+        attempt = 0
+        # 每个token各有一次因额度耗尽而换用其他token的机会，之后的限流响应计入重试次数
+        rate_limited = 0
+        while True:
+            token = self.token_pool.acquire(resource)
+            headers['Authorization'] = f'Bearer {token}'
+            self._count('attempts')
+            try:
+                response = self.session.request(method, url, headers=headers, params=params, json=json)
+            except httpx.TransportError as e:
+                self._count('network_errors')
+                if attempt >= max_retries:
+                    self._count('errors')
+                    raise GitHubAPIError(f"Error making request to {url}: {str(e)}") from e
+                self._backoff(attempt, url, str(e))
+                attempt += 1
+                continue
+            
+            self._count(f'status_{response.status_code}')
             
             # 更新速率限制信息
+            self.token_pool.update(token, response.headers)
             self.rate_limit_remaining = int(response.headers.get('X-RateLimit-Remaining', 0))
             self.rate_limit_reset = int(response.headers.get('X-RateLimit-Reset', 0))
             
-            # 处理速率限制
-            if response.status_code == 403 and self.rate_limit_remaining == 0:
-                reset_time = datetime.fromtimestamp(self.rate_limit_reset)
-                wait_time = (reset_time - datetime.now()).total_seconds()
-                if wait_time > 0:
-                    print(f"Rate limit exceeded. Waiting {wait_time:.0f} seconds...")
-                    time.sleep(wait_time)
-                    return self._make_request(url, params)  # 重试请求
+            # 当前token额度耗尽，换用其他token，全部耗尽时由token池负责等待
+            if response.status_code in (403, 429) and self.rate_limit_remaining == 0 \
+                    and 'X-RateLimit-Remaining' in response.headers:
+                self._count('rate_limited')
+                rate_limited += 1
+                if rate_limited > len(self.token_pool.tokens):
+                    if attempt >= max_retries:
+                        self._count('errors')
+                        raise GitHubAPIError(
+                            f"Error making request to {url}: rate limited after {attempt} retries",
+                            status_code=response.status_code
+                        )
+                    # 重置时间已过仍被限流时token池不会等待，按退避等待避免空转
+                    self._backoff(attempt, url, f"HTTP {response.status_code} rate limited",
+                                  response.headers.get('Retry-After'))
+                    attempt += 1
+                continue
             
-            response.raise_for_status()
-            return response.json()
+            if self._is_retryable(response) and attempt < max_retries:
+                self._backoff(attempt, url, f"HTTP {response.status_code}",
+                              response.headers.get('Retry-After'))
+                attempt += 1
+                continue
+            break
+        
+        if response.is_error:
+            self._count('errors')
+            raise GitHubAPIError(
+                f"Error making request to {url}: HTTP {response.status_code}",
+                status_code=response.status_code
+            )
+        return response
+
+    def graphql(self, query: str, variables: Optional[Dict] = None) -> Dict:
+        """执行GraphQL查询
+        
+        Returns:
+            Dict: 响应体，包含data以及可能的errors（部分失败时两者同时存在）
+        
+        Raises:
+            GitHubAPIError: 请求失败，或响应中没有任何data
+        """
+        url = self.config.github_config.get(
+            'graphql_url', f"{self.config.github_config['api_base_url']}/graphql"
+        )
+        response = self._execute('POST', url, {}, json={'query': query, 'variables': variables or {}},
+                                 resource='graphql')
+        body = response.json()
+        if not body.get('data') and body.get('errors'):
+            message = '; '.join(error.get('message', '') for error in body['errors'])
+            raise GitHubAPIError(f"GraphQL query failed: {message}")
+        return body
+
+    def _send(self, url: str, params: Optional[Dict] = None) -> ApiPage:
+        """发送API请求，按重试策略处理5xx、二级速率限制和网络错误
+        
+        有ETag或Last-Modified的响应会写入磁盘缓存，之后的请求附带条件请求头，
+        收到304时直接使用缓存内容（304不计入速率限制）。
+        
+        Raises:
+            GitHubAPIError: 请求失败且重试次数用尽
+            RateLimitExhausted: 所有token额度耗尽且等待时间超过上限
+        """
+        key = self._cache_key(url, params)
+        cached = self.http_cache.get(key) if self.http_cache else None
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        
+        response = self._execute('GET', url, headers, params=params)
+        
+        if response.status_code == 304 and cached:
+            self._count('not_modified')
+            return ApiPage(cached['body'], cached.get('next_url'))
+        
+        page = ApiPage(response.json(), response.links.get('next', {}).get('url'))
+        
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if self.http_cache and (etag or last_modified):
+            self.http_cache.set(key, {
+                'etag': etag,
+                'last_modified': last_modified,
+                'next_url': page.next_url,
+                'body': page.data,
+            })
+        return page
+
+    @staticmethod
+    def _is_retryable(response: httpx.Response) -> bool:
+        """判断响应是否应重试：5xx、429以及403二级速率限制"""
+        if response.status_code >= 500 or response.status_code == 429:
+            return True
+        if response.status_code == 403:
+            if 'Retry-After' in response.headers:
+                return True
+            return 'secondary rate limit' in response.text.lower()
+        return False
+
+    def _backoff(self, attempt: int, url: str, reason: str, retry_after: Optional[str] = None):
+        """按带抖动的指数退避等待，服务端给出Retry-After时优先使用"""
+        self._count('retries')
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            base = self.config.github_config.get('backoff_base', 1.0)
+            cap = self.config.github_config.get('backoff_max', 60.0)
+            delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+        print(f"Request to {url} failed ({reason}), retrying in {delay:.1f} seconds...")
+        time.sleep(delay)
+
+    def _make_request(self, url: str, params: Optional[Dict] = None) -> Dict:
+        """发送API请求并返回解析后的JSON"""
+        return self._send(url, params).data
+
+    def _paginate(self, url: str, params: Optional[Dict], model: Type[Record],
+                  is_past: Optional[Callable[[Record], bool]] = None,
+                  max_pages: Optional[int] = None) -> Iterator[Record]:
+        """沿Link头的rel="next"逐页获取列表数据，边到达边产出
+        
+        每个条目在解码后立即投影为紧凑的记录对象，不保留原始JSON。
+        
+        Args:
+            url: 首页地址
+            params: 首页请求参数，后续页的参数已包含在next链接中
+            model: 记录类型
+            is_past: 可选，判断记录是否早于时间窗口；列表按时间倒序时遇到第一个即停止翻页
+            max_pages: 可选，最多获取的页数，默认读取配置中的max_pages；
+                使用配置的上限时超出部分视为截断，记录在truncated_pages中
+        """
+        configured = max_pages is None
+        if configured:
+            max_pages = self.config.github_config.get('max_pages', 10)
+        
+        for _ in range(max_pages):
+            page = self._send(url, params)
             
-        except requests.exceptions.RequestException as e:
-            print(f"Error making request to {url}: {str(e)}")
-            return {}
+            for item in page.data or []:
+                record = model.from_api(item)
+                if is_past and is_past(record):
+                    return
+                yield record
+            
+            url = page.next_url
+            if not url:
+                return
+            params = None
+        
+        if configured:
+            print(f"Warning: stopped paginating {url} after {max_pages} pages, results are truncated")
+            self._pagination.truncated = self.truncated_pages() + 1
+
+    def truncated_pages(self) -> int:
+        """当前线程中因max_pages截断的分页次数，前后两次调用的差值大于0表示期间的结果不完整"""
+        return getattr(self._pagination, 'truncated', 0)
 
     def fetch_updates(self, subscriptions: List[str], since: Optional[datetime] = None, 
                      until: Optional[datetime] = None) -> Dict[str, Any]:
@@ -58,117 +339,210 @@ class GitHubClient:
             since: 可选，开始时间
             until: 可选，结束时间
         """
-        updates = {}
-        for repo in subscriptions:
-            repo_updates = {
-                'releases': {},
-                'commits': [],
-                'issues': [],
-                'pull_requests': []
+        return dict(self.iter_updates(subscriptions, since, until))
+
+    def iter_updates(self, subscriptions: List[str], since: Optional[datetime] = None,
+                     until: Optional[datetime] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """按订阅顺序逐个产出(仓库, 更新信息)，某个仓库获取完成后即可产出
+        
+        所有仓库的各个接口在有界线程池中并发获取，并发数由github.max_workers配置。
+        单个仓库或接口失败只记录在该仓库的errors中，不影响其他仓库。
+        启用本地事件存储且指定了since时，只请求存储中尚未覆盖的区间，再从存储中查询窗口；
+        否则github.backend设置为graphql时改用GraphQL批量查询。
+        REST接口的结果经过获取结果缓存，已结束的窗口不会重复获取；事件存储本身已在本地回答已同步的窗口，不再缓存。
+        
+        Args:
+            subscriptions: 仓库列表
+            since: 可选，开始时间
+            until: 可选，结束时间
+        """
+        if self.event_store and since:
+            fetchers = {
+                endpoint: partial(self._fetch_from_store, endpoint)
+                for endpoint in EventStore.ENDPOINTS
+            }
+        elif self.config.github_config.get('backend', 'rest') == 'graphql':
+            from graphql_client import GraphQLBackend
+            yield from GraphQLBackend(self).fetch_updates(subscriptions, since, until).items()
+            return
+        else:
+            fetchers = {
+                'releases': self._fetch_latest_release,
+                'commits': self.fetch_commits,
+                'issues': self.fetch_issues,
+                'pull_requests': self.fetch_pull_requests,
+            }
+            if self.fetch_cache:
+                fetchers = {
+                    endpoint: partial(self._fetch_cached, endpoint, fetch)
+                    for endpoint, fetch in fetchers.items()
+                }
+        max_workers = max(1, self.config.github_config.get('max_workers', 1))
+        
+        # 订阅列表中的重复仓库只获取和产出一次
+        subscriptions = list(dict.fromkeys(subscriptions))
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='github-fetch')
+        try:
+            futures = {
+                (repo, endpoint): executor.submit(fetch, repo, since, until)
+                for repo in subscriptions
+                for endpoint, fetch in fetchers.items()
             }
             
-            # 获取最新发布
-            releases = self.fetch_releases(repo, since, until)
-            if releases:
-                repo_updates['releases'] = releases[0]  # 只取最新的一个
-            
-            # 获取提交历史
-            repo_updates['commits'] = self.fetch_commits(repo, since, until)
-            
-            # 获取议题
-            repo_updates['issues'] = self.fetch_issues(repo, since, until)
-            
-            # 获取拉取请求
-            repo_updates['pull_requests'] = self.fetch_pull_requests(repo, since, until)
-            
-            updates[repo] = repo_updates
-            
-        return updates
+            for repo in subscriptions:
+                repo_updates = {
+                    'releases': None,
+                    'commits': [],
+                    'issues': [],
+                    'pull_requests': []
+                }
+                
+                for endpoint in fetchers:
+                    try:
+                        repo_updates[endpoint] = futures.pop((repo, endpoint)).result()
+                    except Exception as e:
+                        print(f"Error fetching {endpoint} for {repo}: {str(e)}")
+                        repo_updates.setdefault('errors', {})[endpoint] = str(e)
+                yield repo, repo_updates
+        finally:
+            # 调用方提前停止迭代时取消尚未开始的请求
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch_cached(self, endpoint: str, fetch: Callable, repo: str, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None) -> Any:
+        """经过获取结果缓存调用fetch，相同窗口的并发请求只获取一次"""
+        def fetch_complete(repo, since, until):
+            # 分页被截断的结果不能永久缓存
+            truncated = self.truncated_pages()
+            value = fetch(repo, since, until)
+            return value, self.truncated_pages() == truncated
+        
+        return self.fetch_cache.get_or_fetch(repo, endpoint, since, until, fetch_complete)
+
+    def _fetch_from_store(self, endpoint: str, repo: str, since: datetime,
+                          until: Optional[datetime] = None) -> Any:
+        """先同步存储中缺失的区间，再用索引查询回答时间窗口
+        
+        只有完整获取的区间才记为已同步；分页被max_pages截断的区间和最近store_settle_seconds秒内的部分
+        下次查询时重新获取。
+        """
+        # GitHub时间为UTC，未来的时间不能记为已同步
+        now = utc_now()
+        until = min(until, now) if until else now
+        settled = now - timedelta(seconds=self.store_settle_seconds)
+        
+        fetch = {
+            'releases': self.fetch_releases,
+            'commits': self.fetch_commits,
+            'issues': self.fetch_issues,
+            'pull_requests': self.fetch_pull_requests,
+        }[endpoint]
+        for gap_since, gap_until in self.event_store.missing_ranges(repo, endpoint, since, until):
+            truncated = self.truncated_pages()
+            self.event_store.upsert(repo, endpoint, fetch(repo, gap_since, gap_until))
+            if self.truncated_pages() > truncated:
+                print(f"Warning: {endpoint} for {repo} was truncated, "
+                      f"not marking {gap_since} - {gap_until} as synced")
+            elif gap_since < settled:
+                self.event_store.add_coverage(repo, endpoint, gap_since, min(gap_until, settled))
+        
+        items = self.event_store.query(repo, endpoint, since, until)
+        if endpoint == 'releases':
+            return items[0] if items else None
+        return items
+
+    def _fetch_latest_release(self, repo: str, since: Optional[datetime] = None,
+                              until: Optional[datetime] = None) -> Optional[Release]:
+        """获取时间窗口内最新的一个发布，只取首条，无需翻页"""
+        return next(self.iter_releases(repo, since, until), None)
+
+    def _list_params(self, **params) -> Dict:
+        """生成列表接口的公共请求参数"""
+        params['per_page'] = self.config.github_config['items_per_page']
+        return params
+
+    def iter_releases(self, repo: str, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None) -> Iterator[Release]:
+        """逐条获取仓库的发布记录（按创建时间倒序）"""
+        url = f"{self.config.github_config['api_base_url']}/repos/{repo}/releases"
+        
+        is_past = None
+        if since:
+            is_past = lambda release: release.published_at is not None and release.published_at < since
+        
+        for release in self._paginate(url, self._list_params(), Release, is_past,
+                                      max_pages=None if since else 1):
+            # 草稿没有发布时间
+            if release.published_at is None:
+                continue
+            if until and release.published_at > until:
+                continue
+            yield release
 
     def fetch_releases(self, repo: str, since: Optional[datetime] = None,
-                      until: Optional[datetime] = None) -> List[Dict]:
+                      until: Optional[datetime] = None) -> List[Release]:
         """获取仓库的发布记录"""
-        url = f"{self.config.github_config['api_base_url']}/repos/{repo}/releases"
-        params = {'per_page': self.config.github_config['items_per_page']}
-        
-        releases = self._make_request(url, params) or []
-        
-        # 过滤时间范围
-        if since or until:
-            filtered = []
-            for release in releases:
-                published_at = datetime.strptime(release['published_at'], '%Y-%m-%dT%H:%M:%SZ')
-                if since and published_at < since:
-                    continue
-                if until and published_at > until:
-                    continue
-                filtered.append(release)
-            return filtered
-            
-        return releases
+        return list(self.iter_releases(repo, since, until))
 
-    def fetch_commits(self, repo: str, since: Optional[datetime] = None,
-                     until: Optional[datetime] = None) -> List[Dict]:
-        """获取仓库的提交历史"""
+    def iter_commits(self, repo: str, since: Optional[datetime] = None,
+                     until: Optional[datetime] = None) -> Iterator[Commit]:
+        """逐条获取仓库的提交历史，时间范围由服务端过滤"""
         url = f"{self.config.github_config['api_base_url']}/repos/{repo}/commits"
-        params = {'per_page': self.config.github_config['items_per_page']}
+        params = self._list_params()
         
         if since:
             params['since'] = since.isoformat()
         if until:
             params['until'] = until.isoformat()
-            
-        return self._make_request(url, params) or []
+        
+        # 没有时间窗口时只取最新一页
+        yield from self._paginate(url, params, Commit, max_pages=None if since else 1)
 
-    def fetch_issues(self, repo: str, since: Optional[datetime] = None,
-                    until: Optional[datetime] = None, state: str = 'all') -> List[Dict]:
-        """获取仓库的议题"""
+    def fetch_commits(self, repo: str, since: Optional[datetime] = None,
+                     until: Optional[datetime] = None) -> List[Commit]:
+        """获取仓库的提交历史"""
+        return list(self.iter_commits(repo, since, until))
+
+    def iter_issues(self, repo: str, since: Optional[datetime] = None,
+                    until: Optional[datetime] = None, state: str = 'all') -> Iterator[Issue]:
+        """逐条获取仓库的议题（按更新时间倒序）"""
         url = f"{self.config.github_config['api_base_url']}/repos/{repo}/issues"
-        params = {
-            'state': state,
-            'per_page': self.config.github_config['items_per_page']
-        }
+        params = self._list_params(state=state, sort='updated', direction='desc')
         
         if since:
             params['since'] = since.isoformat()
-            
-        issues = self._make_request(url, params) or []
         
         # GitHub API的issues接口只支持since参数，所以需要手动过滤until
-        if until:
-            filtered = []
-            for issue in issues:
-                updated_at = datetime.strptime(issue['updated_at'], '%Y-%m-%dT%H:%M:%SZ')
-                if updated_at <= until:
-                    filtered.append(issue)
-            return filtered
-            
-        return issues
+        for issue in self._paginate(url, params, Issue, max_pages=None if since else 1):
+            if until and issue.updated_at > until:
+                continue
+            yield issue
 
-    def fetch_pull_requests(self, repo: str, since: Optional[datetime] = None,
-                          until: Optional[datetime] = None, state: str = 'all') -> List[Dict]:
-        """获取仓库的拉取请求"""
+    def fetch_issues(self, repo: str, since: Optional[datetime] = None,
+                    until: Optional[datetime] = None, state: str = 'all') -> List[Issue]:
+        """获取仓库的议题"""
+        return list(self.iter_issues(repo, since, until, state))
+
+    def iter_pull_requests(self, repo: str, since: Optional[datetime] = None,
+                           until: Optional[datetime] = None, state: str = 'all') -> Iterator[PullRequest]:
+        """逐条获取仓库的拉取请求（按更新时间倒序）"""
         url = f"{self.config.github_config['api_base_url']}/repos/{repo}/pulls"
-        params = {
-            'state': state,
-            'per_page': self.config.github_config['items_per_page']
-        }
+        params = self._list_params(state=state, sort='updated', direction='desc')
         
-        prs = self._make_request(url, params) or []
-        
-        # 手动过滤时间范围，因为PR接口不支持since和until参数
-        if since or until:
-            filtered = []
-            for pr in prs:
-                updated_at = datetime.strptime(pr['updated_at'], '%Y-%m-%dT%H:%M:%SZ')
-                if since and updated_at < since:
-                    continue
-                if until and updated_at > until:
-                    continue
-                filtered.append(pr)
-            return filtered
-            
-        return prs
+        # PR接口不支持since和until参数，按更新时间倒序翻页，遇到早于since的条目即停止
+        is_past = None
+        if since:
+            is_past = lambda pr: pr.updated_at < since
+        
+        for pr in self._paginate(url, params, PullRequest, is_past, max_pages=None if since else 1):
+            if until and pr.updated_at > until:
+                continue
+            yield pr
+
+    def fetch_pull_requests(self, repo: str, since: Optional[datetime] = None,
+                          until: Optional[datetime] = None, state: str = 'all') -> List[PullRequest]:
+        """获取仓库的拉取请求"""
+        return list(self.iter_pull_requests(repo, since, until, state))
 
     def get_rate_limit_info(self) -> Dict[str, Any]:
         """获取API速率限制信息"""
@@ -183,7 +557,7 @@ class GitHubClient:
         """
         url = f"{self.BASE_URL}/repos/{repo}"
         try:
-            response = requests.get(url, headers=self.headers)
-            return response.status_code == 200
-        except requests.exceptions.RequestException:
+            self._send(url)
+            return True
+        except (GitHubAPIError, RateLimitExhausted):
             return False
@@ -4,27 +4,53 @@ from config import Config
 from github_client import GitHubClient
 from report_generator import ReportGenerator
 from subscription_manager import SubscriptionManager
-from llm import LLMProcessor
+from llm import SUMMARY_SEPARATOR
+from export_catalog import ExportCatalog
+from export_store import ExportStore
+from report_jobs import ReportJobs, create_job_queue, create_worker_pool, load_updates
+from models import utc_now
+from typing import Iterator
 import os
+import time
+
+# 报告列表每页显示的条数
+SUMMARY_PAGE_SIZE = 20
+# 检索结果最多显示的条数
+SEARCH_RESULT_LIMIT = 50
 
 class GradioUI:
     def __init__(self):
         """初始化Gradio UI"""
         self.config = Config()
         self.github_client = GitHubClient(self.config)
-        self.report_generator = ReportGenerator(self.config)
+        # 导出目录只打开一次，报告生成器、导出存储和报告列表共用
+        self.catalog = ExportCatalog.for_config(self.config)
+        self.report_generator = ReportGenerator(self.config, self.catalog)
         self.subscription_manager = SubscriptionManager(self.config.subscriptions_file)
-        self.llm_processor = LLMProcessor(self.config)
+        self.llm_processor = self.report_generator.llm_processor
+        self.export_store = ExportStore.for_config(self.config, self.catalog)
+        
+        # 报告任务与CLI、调度器共用同一个持久化队列
+        self.jobs = ReportJobs(
+            self.config,
+            queue=create_job_queue(self.config),
+            github_client=self.github_client,
+            report_generator=self.report_generator,
+            llm_processor=self.llm_processor
+        )
+        self.pipeline = self.jobs.pipeline
+        self.worker_pool = create_worker_pool(self.config, self.jobs)
+        self.worker_pool.start()
 
     def load_subscriptions(self) -> list:
         """加载订阅列表"""
         return self.subscription_manager.get_subscriptions()
 
-    def generate_report(self, repo: str, date: str, until_date: str = None) -> tuple[str, list]:
-        """生成报告
+    def generate_report(self, repo: str, date: str, until_date: str = None) -> Iterator[tuple]:
+        """生成报告，AI摘要边生成边显示
         
-        Returns:
-            tuple[str, list]: (报告内容, 更新后的文件列表)
+        Yields:
+            tuple: (报告内容, 文件列表)；生成摘要期间文件列表保持不变，结束后刷新
         """
         try:
             # 验证开始日期格式
@@ -40,42 +66,37 @@ class GradioUI:
             
             # 验证日期范围
             if until <= since:
-                return "结束日期必须大于开始日期。", self.load_summary_files()
+                yield "结束日期必须大于开始日期。", self.load_summary_files()
+                return
             
-            # 获取GitHub更新
-            updates = self.github_client.fetch_updates([repo], since=since, until=until)
-            if not updates:
-                return "该时间段内没有更新。", self.load_summary_files()
+            # 获取更新和生成报告文件提交到任务队列，与CLI、调度器的同一窗口任务去重；摘要在下面流式生成
+            title_until = until_date.strip() if until_date and until_date.strip() else None
+            job = self.jobs.run_report(repo, since=since, until=until, summarize=False, force=True,
+                                       title_since=date, title_until=title_until)
+            if job is None or job.status != 'done':
+                yield f"生成报告失败: {job.error if job else '任务超时'}", self.load_summary_files()
+                return
+            report_file = job.result['filepath']
+            with open(report_file, 'r', encoding='utf-8') as f:
+                content = report = f.read()
             
-            # 生成报告文件
-            report_file = self.config.get_export_filepath(repo=repo, since=since)
-            self.report_generator.generate_and_save(updates, report_file)
+            # 流式生成AI摘要，完成后才写入摘要文件
+            if self.pipeline.can_summarize():
+                updates = load_updates(job.payload['data_file'])
+                summary = ""
+                for part in self.pipeline.stream_summarize(updates, report, repo, date, title_until):
+                    summary += part
+                    yield summary, gr.update()
+                if summary:
+                    self.pipeline.persist_summary(report_file, report, summary, repo, date, title_until)
+                    content = summary + SUMMARY_SEPARATOR + report
             
-            # 生成AI摘要
-            summary_file = self.llm_processor.append_summary(
-                report_file,
-                repo=repo,
-                since=date,
-                until=until_date if until_date and until_date.strip() else None
-            )
-            
-            # 读取内容并返回更新后的文件列表
-            content = ""
-            if summary_file and os.path.exists(summary_file):
-                with open(summary_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-            elif os.path.exists(report_file):
-                with open(report_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-            else:
-                content = "生成报告失败：无法找到生成的文件。"
-            
-            return content, self.load_summary_files()
+            yield content, self.load_summary_files()
                     
         except ValueError:
-            return "日期格式错误，请使用YYYY-MM-DD格式。", self.load_summary_files()
+            yield "日期格式错误，请使用YYYY-MM-DD格式。", self.load_summary_files()
         except Exception as e:
-            return f"生成报告时发生错误: {str(e)}", self.load_summary_files()
+            yield f"生成报告时发生错误: {str(e)}", self.load_summary_files()
 
     def add_subscription(self, repo: str) -> tuple[list, str]:
         """添加订阅仓库"""
@@ -97,45 +118,77 @@ class GradioUI:
         except Exception as e:
             return self.load_subscriptions(), f"删除仓库失败: {str(e)}"
 
-    def load_summary_files(self) -> list:
-        """加载已生成的摘要文件列表"""
+    def load_summary_files(self, repo: str = None, date_from: str = None, date_to: str = None,
+                           page: int = 1) -> list:
+        """从导出目录索引分页加载摘要文件列表，按生成时间倒序
+        
+        Args:
+            repo: 可选，按仓库过滤
+            date_from: 可选，报告日期不早于该日期（YYYY-MM-DD）
+            date_to: 可选，报告日期不晚于该日期（YYYY-MM-DD）
+            page: 页码，从1开始
+        """
         try:
-            # 获取导出目录下的所有摘要文件
-            export_dir = self.config.exports_dir
-            summary_files = []
-            if os.path.exists(export_dir):
-                for filename in os.listdir(export_dir):
-                    # print filename
-                    if filename.endswith('-summary.md'):
-                        # 从文件名中提取信息
-                        file_path = os.path.join(export_dir, filename)
-                        # 获取文件修改时间
-                        mtime = os.path.getmtime(file_path)
-                        mtime_str = datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S')
-                        summary_files.append([filename, mtime_str, file_path])
-            
-            # 按修改时间倒序排序
-            summary_files.sort(key=lambda x: x[1], reverse=True)
-            return summary_files
+            rows, _ = self.catalog.query(
+                repo=repo or None,
+                date_from=(date_from or '').strip() or None,
+                date_to=(date_to or '').strip() or None,
+                kind='summary',
+                offset=(max(int(page or 1), 1) - 1) * SUMMARY_PAGE_SIZE,
+                limit=SUMMARY_PAGE_SIZE
+            )
+            return [
+                [row['filename'], datetime.fromtimestamp(row['mtime']).strftime('%Y-%m-%d %H:%M:%S'), row['path']]
+                for row in rows
+            ]
         except Exception as e:
             print(f"Error loading summary files: {str(e)}")
             return []
 
+    def summary_page_info(self, repo: str = None, date_from: str = None, date_to: str = None,
+                          page: int = 1) -> tuple[int, str]:
+        """返回(修正后的页码, 分页说明)"""
+        _, total = self.catalog.query(
+            repo=repo or None,
+            date_from=(date_from or '').strip() or None,
+            date_to=(date_to or '').strip() or None,
+            kind='summary',
+            limit=0
+        )
+        pages = max((total + SUMMARY_PAGE_SIZE - 1) // SUMMARY_PAGE_SIZE, 1)
+        page = min(max(int(page or 1), 1), pages)
+        return page, f"Page {page} / {pages} ({total} reports)"
+
+    def search_reports(self, query: str, repo: str = None, kind: str = None) -> tuple[list, str]:
+        """全文检索报告，返回(结果表格行, 说明)"""
+        search_index = self.catalog.search_index
+        if search_index is None or not (query or '').strip():
+            return [], ""
+        start = time.perf_counter()
+        hits = search_index.search(query, repo=repo or None, kind=None if kind in (None, "all") else kind,
+                                   limit=SEARCH_RESULT_LIMIT)
+        elapsed = (time.perf_counter() - start) * 1000
+        rows = [
+            [round(hit.score, 2), hit.filename, hit.repo or "", hit.since or "", hit.snippet, hit.path]
+            for hit in hits
+        ]
+        return rows, f"{len(hits)} results ({elapsed:.1f} ms)"
+
     def load_summary_content(self, filename: str) -> str:
-        """加载摘要文件内容"""
+        """加载摘要文件内容，已转入压缩存储的报告按需还原"""
         try:
             file_path = os.path.join(self.config.exports_dir, filename)
-            if not file_path or not os.path.exists(file_path):
+            content = self.export_store.read(file_path) if file_path else None
+            if content is None:
                 return "文件不存在或已被删除。"
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            return content
         except Exception as e:
             return f"读取文件失败: {str(e)}"
 
     def create_ui(self):
         """创建Gradio界面"""
         # 获取默认日期（昨天）
-        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        yesterday = (utc_now() - timedelta(days=1)).strftime('%Y-%m-%d')
         
         # 获取订阅列表并设置默认值
         subscriptions = self.load_subscriptions()
@@ -181,12 +234,25 @@ class GradioUI:
                             
                             # 摘要文件列表
                             gr.Markdown("### Generated Reports")
+                            with gr.Row():
+                                list_repo_filter = gr.Dropdown(
+                                    choices=[""] + self.catalog.repos(),
+                                    value="",
+                                    label="Repository"
+                                )
+                                list_date_from = gr.Textbox(label="From", placeholder="YYYY-MM-DD")
+                                list_date_to = gr.Textbox(label="To", placeholder="YYYY-MM-DD")
                             summary_list = gr.Dataframe(
                                 headers=["File Name", "Generated Time", "Path"],
                                 value=self.load_summary_files(),
                                 interactive=False,
                                 elem_classes="summary-list"
                             )
+                            with gr.Row():
+                                prev_btn = gr.Button("Previous", size="sm")
+                                list_page = gr.Number(value=1, precision=0, label="Page", minimum=1)
+                                next_btn = gr.Button("Next", size="sm")
+                            page_info = gr.Markdown(self.summary_page_info()[1])
                             refresh_btn = gr.Button("Refresh List", size="sm")
                         
                         # 右侧输出面板
@@ -229,6 +295,38 @@ class GradioUI:
                             
                             # 操作结果提示
                             result_info = gr.Markdown("Repository management results will be shown here...")
+
+                # Search标签页
+                with gr.Tab("Search"):
+                    with gr.Row():
+                        with gr.Column(scale=1):
+                            search_input = gr.Textbox(
+                                label="Search Reports",
+                                placeholder="e.g. workflow retry / 工作流重试"
+                            )
+                            with gr.Row():
+                                search_repo_filter = gr.Dropdown(
+                                    choices=[""] + self.catalog.repos(),
+                                    value="",
+                                    label="Repository"
+                                )
+                                search_kind = gr.Radio(
+                                    choices=["all", "summary", "raw"],
+                                    value="all",
+                                    label="Kind"
+                                )
+                            search_btn = gr.Button("Search", variant="primary")
+                            search_info = gr.Markdown("")
+                            search_results = gr.Dataframe(
+                                headers=["Score", "File Name", "Repository", "Date", "Snippet", "Path"],
+                                value=[],
+                                interactive=False
+                            )
+                        with gr.Column(scale=2):
+                            search_output = gr.Markdown(
+                                value="Select a result to view the report...",
+                                elem_classes="output-markdown"
+                            )
             
             # 添加自定义CSS
             gr.HTML("""
@@ -323,15 +421,26 @@ class GradioUI:
                 outputs=[repo_dropdown, date_picker, until_picker, output]
             )
             
-            # 绑定摘要列表事件
-            def refresh_summary_list():
-                return self.load_summary_files()
+            # 绑定摘要列表事件，分页和过滤在服务端完成
+            def refresh_summary_list(repo, date_from, date_to, page, offset=0):
+                page, info = self.summary_page_info(repo, date_from, date_to, (page or 1) + offset)
+                return [
+                    self.load_summary_files(repo, date_from, date_to, page),
+                    page,
+                    info,
+                    gr.update(choices=[""] + self.catalog.repos())
+                ]
             
-            refresh_btn.click(
-                fn=refresh_summary_list,
-                inputs=[],
-                outputs=summary_list
-            )
+            list_inputs = [list_repo_filter, list_date_from, list_date_to, list_page]
+            list_outputs = [summary_list, list_page, page_info, list_repo_filter]
+            refresh_btn.click(fn=refresh_summary_list, inputs=list_inputs, outputs=list_outputs)
+            prev_btn.click(fn=lambda *args: refresh_summary_list(*args, offset=-1),
+                           inputs=list_inputs, outputs=list_outputs)
+            next_btn.click(fn=lambda *args: refresh_summary_list(*args, offset=1),
+                           inputs=list_inputs, outputs=list_outputs)
+            for component in (list_repo_filter, list_date_from, list_date_to):
+                component.change(fn=lambda repo, date_from, date_to: refresh_summary_list(repo, date_from, date_to, 1),
+                                 inputs=list_inputs[:3], outputs=list_outputs)
             
             # 点击摘要列表加载内容
             def load_selected_summary(evt: gr.SelectData) -> str:
@@ -347,6 +456,21 @@ class GradioUI:
                 outputs=output
             )
             
+            # 绑定Search标签页事件
+            search_btn.click(fn=self.search_reports, inputs=[search_input, search_repo_filter, search_kind],
+                             outputs=[search_results, search_info])
+            search_input.submit(fn=self.search_reports, inputs=[search_input, search_repo_filter, search_kind],
+                                outputs=[search_results, search_info])
+            
+            def load_search_result(evt: gr.SelectData, rows) -> str:
+                try:
+                    # 无论点击哪一列都加载该行最后一列的完整路径
+                    return self.load_summary_content(rows.values[evt.index[0]][-1])
+                except Exception as e:
+                    return f"加载文件失败: {str(e)}"
+            
+            search_results.select(fn=load_search_result, inputs=[search_results], outputs=search_output)
+            
             # 绑定RepoLib标签页事件
             def update_repo_components(repos):
                 return [
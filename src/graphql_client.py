@@ -0,0 +1,286 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from github_client import GitHubAPIError
+from models import Commit, Issue, PullRequest, Record, Release, format_github_time, parse_github_time
+from token_pool import RateLimitExhausted
+
+# 每个仓库需要获取的连接，名称与updates字典中的键一致
+CONNECTIONS = ('releases', 'commits', 'issues', 'pull_requests')
+
+PAGE_INFO = 'pageInfo { hasNextPage endCursor }'
+ISSUE_FIELDS = ('databaseId number title state url createdAt updatedAt '
+                'author { login } labels(first: 20) { nodes { name } }')
+
+
+def _connection_field(name: str, after: Optional[str] = None) -> str:
+    """生成单个连接的查询片段
+
+    Args:
+        name: 连接名称
+        after: 可选，游标变量名，用于翻页
+    """
+    after_arg = f', after: ${after}' if after else ''
+    if name == 'releases':
+        return (f'releases(first: $first{after_arg}, orderBy: {{field: CREATED_AT, direction: DESC}}) '
+                f'{{ {PAGE_INFO} nodes {{ databaseId tagName name publishedAt url isDraft }} }}')
+    if name == 'commits':
+        return ('defaultBranchRef { target { ... on Commit { '
+                f'history(first: $first{after_arg}, since: $since, until: $until) '
+                f'{{ {PAGE_INFO} nodes {{ oid url message committedDate '
+                'author { name date user { login } } parents { totalCount } } } } } }')
+    if name == 'issues':
+        return (f'issues(first: $first{after_arg}, orderBy: {{field: UPDATED_AT, direction: DESC}}, '
+                f'filterBy: {{since: $issuesSince}}) {{ {PAGE_INFO} nodes {{ {ISSUE_FIELDS} }} }}')
+    if name == 'pull_requests':
+        return (f'pullRequests(first: $first{after_arg}, orderBy: {{field: UPDATED_AT, direction: DESC}}) '
+                f'{{ {PAGE_INFO} nodes {{ {ISSUE_FIELDS} mergedAt }} }}')
+    raise ValueError(f"Unknown connection: {name}")
+
+
+def _extract_connection(name: str, repository: Dict) -> Optional[Dict]:
+    """从仓库节点中取出连接数据"""
+    if name == 'commits':
+        branch = repository.get('defaultBranchRef') or {}
+        return (branch.get('target') or {}).get('history')
+    key = 'pullRequests' if name == 'pull_requests' else name
+    return repository.get(key)
+
+
+def _node_time(name: str, node: Dict) -> Optional[datetime]:
+    """获取节点用于时间窗口判断的时间"""
+    if name == 'releases':
+        value = node.get('publishedAt')
+    elif name == 'commits':
+        value = node.get('committedDate')
+    else:
+        value = node.get('updatedAt')
+    return parse_github_time(value)
+
+
+def _to_record(name: str, node: Dict) -> Record:
+    """将GraphQL节点投影为记录对象"""
+    if name == 'releases':
+        return Release(
+            id=node.get('databaseId'),
+            tag_name=node.get('tagName'),
+            name=node.get('name'),
+            published_at=parse_github_time(node.get('publishedAt')),
+            html_url=node.get('url'),
+        )
+    if name == 'commits':
+        author = node.get('author') or {}
+        return Commit(
+            sha=node.get('oid'),
+            message=(node.get('message') or '').split('\n')[0],
+            author=author.get('name') or 'Unknown',
+            author_login=(author.get('user') or {}).get('login'),
+            date=parse_github_time(node.get('committedDate')),
+            parent_count=(node.get('parents') or {}).get('totalCount', 0),
+            html_url=node.get('url'),
+        )
+    fields = dict(
+        id=node.get('databaseId'),
+        number=node.get('number'),
+        title=node.get('title'),
+        state='open' if node.get('state') == 'OPEN' else 'closed',
+        html_url=node.get('url'),
+        user=(node.get('author') or {}).get('login') or 'Unknown',
+        labels=tuple(label['name'] for label in (node.get('labels') or {}).get('nodes', [])),
+        created_at=parse_github_time(node.get('createdAt')),
+        updated_at=parse_github_time(node.get('updatedAt')),
+    )
+    if name == 'pull_requests':
+        return PullRequest(merged_at=parse_github_time(node.get('mergedAt')), **fields)
+    return Issue(is_pull_request=False, **fields)
+
+
+class GraphQLBackend:
+    """基于GraphQL API的批量更新获取后端
+
+    每次查询通过别名打包多个仓库，一次取回发布、提交、议题和PR；
+    需要翻页的连接在后续轮次中同样按批次打包，直到超出时间窗口。
+    返回与GitHubClient.fetch_updates相同结构的updates字典，节点直接投影为记录对象。
+    注意GraphQL的issues连接不包含PR，这与REST的/issues接口不同。
+    """
+
+    def __init__(self, github_client):
+        """初始化GraphQL后端
+
+        Args:
+            github_client: GitHubClient实例，复用其连接池、token池和重试策略
+        """
+        self.client = github_client
+        github_config = github_client.config.github_config
+        self.batch_size = github_config.get('graphql_batch_size', 10)
+        self.page_size = min(github_config.get('items_per_page', 100), 100)
+        self.max_pages = github_config.get('max_pages', 10)
+
+    def _build_query(self, requests: List[Tuple[str, Tuple[str, ...], Optional[str]]]) -> Tuple[str, Dict]:
+        """构建一个批量查询
+
+        Args:
+            requests: (仓库, 连接名称列表, 游标)列表；游标为None时获取首页
+        """
+        names = {name for _, connections, _ in requests for name in connections}
+        declarations = ['$first: Int!']
+        if 'commits' in names:
+            declarations += ['$since: GitTimestamp', '$until: GitTimestamp']
+        if 'issues' in names:
+            declarations.append('$issuesSince: DateTime')
+
+        variables = {}
+        fields = []
+        for i, (repo, connections, cursor) in enumerate(requests):
+            owner, name = repo.split('/', 1)
+            variables[f'o{i}'] = owner
+            variables[f'n{i}'] = name
+            declarations += [f'$o{i}: String!', f'$n{i}: String!']
+            after = None
+            if cursor:
+                after = f'a{i}'
+                variables[after] = cursor
+                declarations.append(f'${after}: String')
+            # 翻页请求的别名带上连接名称，首页请求包含全部连接
+            alias = f'r{i}' if cursor is None else f'r{i}_{connections[0]}'
+            body = ' '.join(_connection_field(c, after) for c in connections)
+            fields.append(f'{alias}: repository(owner: $o{i}, name: $n{i}) {{ {body} }}')
+
+        query = f"query RepoUpdates({', '.join(declarations)}) {{ {' '.join(fields)} }}"
+        return query, variables
+
+    def fetch_updates(self, subscriptions: List[str], since: Optional[datetime] = None,
+                      until: Optional[datetime] = None) -> Dict[str, Any]:
+        """批量获取仓库的所有更新信息
+
+        Args:
+            subscriptions: 仓库列表
+            since: 可选，开始时间
+            until: 可选，结束时间
+        """
+        window = {
+            'first': self.page_size,
+            'since': format_github_time(since),
+            'until': format_github_time(until),
+            'issuesSince': format_github_time(since),
+        }
+        nodes = {(repo, name): [] for repo in subscriptions for name in CONNECTIONS}
+        pages = {key: 0 for key in nodes}
+        errors: Dict[str, Dict[str, str]] = {}
+
+        pending = [(repo, CONNECTIONS, None) for repo in subscriptions]
+        while pending:
+            next_round = []
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                next_round += self._run_batch(batch, window, since, until, nodes, pages, errors)
+            pending = next_round
+
+        updates = {}
+        for repo in subscriptions:
+            repo_updates = self._assemble(repo, nodes, since, until)
+            if repo in errors:
+                repo_updates['errors'] = errors[repo]
+            updates[repo] = repo_updates
+        return updates
+
+    def _run_batch(self, batch, window, since, until, nodes, pages, errors) -> List:
+        """执行一个批次，收集节点并返回需要继续翻页的请求"""
+        query, variables = self._build_query(batch)
+        variables.update({k: v for k, v in window.items() if f'${k}:' in query})
+        try:
+            body = self.client.graphql(query, variables)
+        except (GitHubAPIError, RateLimitExhausted) as e:
+            print(f"Error fetching GraphQL batch: {str(e)}")
+            for repo, connections, _ in batch:
+                for name in connections:
+                    errors.setdefault(repo, {})[name] = str(e)
+            return []
+
+        # 部分失败时按别名记录错误，例如仓库不存在
+        alias_errors = {}
+        for error in body.get('errors') or []:
+            path = error.get('path') or []
+            if path:
+                alias_errors[path[0]] = error.get('message', 'unknown error')
+
+        follow_ups = []
+        data = body.get('data') or {}
+        for i, (repo, connections, cursor) in enumerate(batch):
+            alias = f'r{i}' if cursor is None else f'r{i}_{connections[0]}'
+            repository = data.get(alias)
+            if repository is None:
+                message = alias_errors.get(alias, 'repository not found')
+                for name in connections:
+                    errors.setdefault(repo, {})[name] = message
+                continue
+
+            for name in connections:
+                connection = _extract_connection(name, repository)
+                if not connection:
+                    continue
+                page_nodes = connection.get('nodes') or []
+                nodes[(repo, name)].extend(page_nodes)
+                pages[(repo, name)] += 1
+                if self._needs_next_page(name, connection, page_nodes, since, until, pages[(repo, name)]):
+                    follow_ups.append((repo, (name,), connection['pageInfo']['endCursor']))
+        return follow_ups
+
+    def _needs_next_page(self, name: str, connection: Dict, page_nodes: List[Dict],
+                         since: Optional[datetime], until: Optional[datetime], page_count: int) -> bool:
+        """判断连接是否需要继续翻页；没有时间窗口时只取首页"""
+        if not since or page_count >= self.max_pages:
+            return False
+        if not connection.get('pageInfo', {}).get('hasNextPage'):
+            return False
+        if name == 'commits':
+            # 提交历史由服务端按窗口过滤
+            return True
+        if name == 'releases':
+            # 只需要窗口内最新的一个发布，晚于until的发布不算
+            for node in page_nodes:
+                node_time = _node_time(name, node)
+                if node.get('isDraft') or node_time is None:
+                    continue
+                if node_time >= since and (until is None or node_time <= until):
+                    return False
+        # 按时间倒序，最后一个节点仍在窗口内才继续
+        last_time = _node_time(name, page_nodes[-1]) if page_nodes else None
+        return last_time is None or last_time >= since
+
+    def _assemble(self, repo: str, nodes: Dict, since: Optional[datetime],
+                  until: Optional[datetime]) -> Dict[str, Any]:
+        """按时间窗口过滤节点并组装成记录"""
+        repo_updates = {
+            'releases': None,
+            'commits': [],
+            'issues': [],
+            'pull_requests': []
+        }
+
+        def in_window(name, node):
+            node_time = _node_time(name, node)
+            if node_time is None:
+                return False
+            if since and node_time < since:
+                return False
+            if until and node_time > until:
+                return False
+            return True
+
+        for node in nodes[(repo, 'releases')]:
+            if not node.get('isDraft') and in_window('releases', node):
+                repo_updates['releases'] = _to_record('releases', node)
+                break
+
+        # 提交由服务端按窗口过滤，议题由服务端过滤since
+        repo_updates['commits'] = [_to_record('commits', node) for node in nodes[(repo, 'commits')]]
+        repo_updates['issues'] = [
+            _to_record('issues', node) for node in nodes[(repo, 'issues')]
+            if not until or parse_github_time(node['updatedAt']) <= until
+        ]
+        repo_updates['pull_requests'] = [
+            _to_record('pull_requests', node) for node in nodes[(repo, 'pull_requests')]
+            if in_window('pull_requests', node)
+        ]
+        return repo_updates
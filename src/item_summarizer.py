@@ -0,0 +1,132 @@
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from compactor import Compactor
+from models import Issue, PullRequest, Record, Release, format_github_time
+
+ITEM_KINDS = {
+    Release: '发布',
+    PullRequest: 'PR',
+    Issue: '议题',
+}
+
+
+class ItemSummarizer:
+    """逐条目的增量摘要
+
+    为每个发布、PR和议题生成一行结构化摘要，按(条目id, 更新时间)缓存。
+    重叠的时间窗口（例如七份日报之后的周报）只需为新增或有变化的条目调用LLM，
+    仓库级摘要再由这些条目摘要汇总生成。
+    """
+
+    def __init__(self, llm_processor):
+        """初始化条目摘要器
+
+        Args:
+            llm_processor: LLMProcessor实例，复用其客户端、缓存和prompt目录
+        """
+        self.llm = llm_processor
+        map_reduce = getattr(llm_processor.config, 'openai_map_reduce_config', {})
+        self.max_workers = max(1, map_reduce.get('max_workers', 4))
+        self.compactor = Compactor(llm_processor.config)
+
+    def _item_key(self, item: Record, prompt: str) -> str:
+        """条目摘要的缓存键：条目类型、id和更新时间，以及渲染后的prompt和所有请求参数"""
+        updated = item.published_at if isinstance(item, Release) else item.updated_at
+        payload = json.dumps([
+            'item',
+            type(item).__name__,
+            item.id,
+            format_github_time(updated),
+            self.llm.cache_key(prompt),
+        ], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _describe(item: Record) -> str:
+        """条目送给LLM的文本"""
+        if isinstance(item, Release):
+            return (f"版本: {item.tag_name}\n标题: {item.name or ''}\n"
+                    f"发布时间: {format_github_time(item.published_at)}")
+        lines = [f"#{item.number} {item.title}", f"作者: @{item.user}", f"状态: {item.state}"]
+        if item.labels:
+            lines.append(f"标签: {', '.join(item.labels)}")
+        if isinstance(item, PullRequest) and item.merged_at:
+            lines.append(f"合并时间: {format_github_time(item.merged_at)}")
+        return '\n'.join(lines)
+
+    def summarize_item(self, item: Record, use_cache: bool = True) -> Tuple[str, bool]:
+        """生成单个条目的摘要，命中缓存时不调用API
+
+        Returns:
+            Tuple[str, bool]: (条目摘要, 是否调用了LLM)
+        """
+        prompt = self.llm.load_prompt('summarize_item.txt').format(
+            kind=ITEM_KINDS[type(item)], content=self._describe(item)
+        )
+        key = self._item_key(item, prompt)
+        if use_cache and self.llm.cache:
+            cached = self.llm.cache.get(key)
+            if cached is not None:
+                return cached.strip(), False
+        return self.llm.complete(prompt, use_cache=False, key=key).strip(), True
+
+    def _items(self, data: Dict) -> List[Record]:
+        """取出需要摘要的条目，去掉同时出现在PR中的议题"""
+        items: List[Record] = []
+        if data.get('releases'):
+            items.append(data['releases'])
+        prs = data.get('pull_requests') or []
+        pr_numbers = {pr.number for pr in prs}
+        items += prs
+        items += [issue for issue in data.get('issues') or []
+                  if not issue.is_pull_request and issue.number not in pr_numbers]
+        return items
+
+    def build_input(self, updates: Dict[str, Dict], use_cache: bool = True) -> Tuple[str, int]:
+        """为所有条目生成摘要并组装成仓库级摘要的输入
+
+        Returns:
+            Tuple[str, int]: (由条目摘要组成的markdown, 实际调用LLM的条目数)
+        """
+        items = [(repo, item) for repo, data in updates.items() for item in self._items(data)]
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='llm-item') as executor:
+            results = list(executor.map(lambda pair: self._safe_summary(pair[1], use_cache), items))
+        misses = sum(1 for _, called in results if called)
+
+        by_repo: Dict[str, List[str]] = {}
+        for (repo, item), (summary, _) in zip(items, results):
+            if isinstance(item, Release):
+                label = f"发布 {item.tag_name}"
+            else:
+                label = f"{ITEM_KINDS[type(item)]} #{item.number}"
+            by_repo.setdefault(repo, []).append(f"- {label}: {summary}\n")
+
+        parts = []
+        for repo, data in updates.items():
+            parts.append(f"\n## {repo}\n\n")
+            parts.extend(by_repo.get(repo, []))
+            parts.extend(self._commit_lines(data))
+        return ''.join(parts), misses
+
+    def _safe_summary(self, item: Record, use_cache: bool) -> Tuple[str, bool]:
+        try:
+            return self.summarize_item(item, use_cache)
+        except Exception as e:
+            # 单个条目失败时退回到标题，不影响整体摘要；失败的请求同样计入LLM调用
+            print(f"Error summarizing item: {str(e)}")
+            return getattr(item, 'title', None) or getattr(item, 'tag_name', '') or '', True
+
+    def _commit_lines(self, data: Dict) -> List[str]:
+        """提交不单独摘要，保留首行并折叠机器人和合并提交"""
+        lines, collapsed = [], 0
+        for commit in data.get('commits') or []:
+            if self.compactor.is_bot(commit) or self.compactor.is_merge(commit):
+                collapsed += 1
+            else:
+                lines.append(f"- 提交: {commit.message}\n")
+        if collapsed:
+            lines.append(f"- 另有{collapsed}个机器人或合并提交\n")
+        return lines
@@ -0,0 +1,333 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class Job(NamedTuple):
+    """队列中的一个任务"""
+    id: int
+    type: str
+    payload: Dict[str, Any]
+    key: Optional[str]
+    status: str
+    attempts: int
+    max_attempts: int
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+
+
+class JobQueue:
+    """基于SQLite的本地持久化任务队列
+
+    任务在提交时写入数据库，进程崩溃后未完成的任务在下次打开队列时重新排队。
+    相同幂等键的任务在排队、执行或已完成时不会重复提交。
+    多个线程和进程可以共享同一个数据库文件，领取任务在写事务中完成，同一任务只会被领取一次。
+    领取任务时记录节点id，多节点共享队列时只回收已失去租约的节点遗留的任务。
+    """
+
+    def __init__(self, path: str, backoff_base: float = 2.0, backoff_max: float = 300.0,
+                 node_id: Optional[str] = None):
+        """初始化任务队列
+
+        Args:
+            path: SQLite数据库文件路径
+            backoff_base: 重试退避的基数（秒）
+            backoff_max: 重试退避的上限（秒）
+            node_id: 可选，领取任务的节点id，记录在任务的claimed_by中
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.node_id = node_id
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        # 同一进程内提交任务时唤醒等待的worker
+        self._wakeup = threading.Condition()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                type TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                key TEXT UNIQUE,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                run_after REAL NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if 'claimed_by' not in columns:
+            # 旧版本创建的数据库没有claimed_by列
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN claimed_by TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, run_after)")
+
+    def _row_to_job(self, row) -> Job:
+        return Job(
+            id=row[0], type=row[1], payload=json.loads(row[2]), key=row[3], status=row[4],
+            attempts=row[5], max_attempts=row[6],
+            result=json.loads(row[8]) if row[8] else None, error=row[9],
+        )
+
+    def submit(self, job_type: str, payload: Dict[str, Any], key: Optional[str] = None,
+               max_attempts: int = 3, force: bool = False) -> int:
+        """提交任务
+
+        Args:
+            job_type: 任务类型
+            payload: 可JSON序列化的任务参数
+            key: 可选，幂等键；已有相同键的任务时返回已有任务的id
+            max_attempts: 最多执行次数
+            force: 已有相同键的任务已完成时是否重新执行；排队或执行中的任务不受影响
+
+        Returns:
+            int: 任务id
+        """
+        now = time.time()
+        data = json.dumps(payload, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = None
+                if key is not None:
+                    row = self._conn.execute("SELECT id, status FROM jobs WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    job_id = self._conn.execute(
+                        "INSERT INTO jobs (type, payload, key, status, max_attempts, run_after, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (job_type, data, key, PENDING, max_attempts, now, now, now)
+                    ).lastrowid
+                else:
+                    job_id, status = row
+                    # 失败的任务总是可以重新提交，已完成的任务需要force
+                    if status == FAILED or (status == DONE and force):
+                        self._conn.execute(
+                            "UPDATE jobs SET type = ?, payload = ?, status = ?, attempts = 0, max_attempts = ?, "
+                            "run_after = ?, result = NULL, error = NULL, updated_at = ? WHERE id = ?",
+                            (job_type, data, PENDING, max_attempts, now, now, job_id)
+                        )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        with self._wakeup:
+            self._wakeup.notify_all()
+        return job_id
+
+    def claim(self, job_types: Optional[List[str]] = None) -> Optional[Job]:
+        """领取一个到期的待执行任务并标记为执行中，没有时返回None"""
+        now = time.time()
+        query = "SELECT * FROM jobs WHERE status = ? AND run_after <= ?"
+        params: List[Any] = [PENDING, now]
+        if job_types:
+            query += f" AND type IN ({', '.join('?' * len(job_types))})"
+            params += job_types
+        query += " ORDER BY run_after, id LIMIT 1"
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(query, params).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, claimed_by = ?, updated_at = ? "
+                        "WHERE id = ?",
+                        (RUNNING, self.node_id, now, row[0])
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = self._row_to_job(row)
+        return job._replace(status=RUNNING, attempts=job.attempts + 1)
+
+    def complete(self, job_id: int, result: Optional[Dict[str, Any]] = None):
+        """标记任务完成"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, updated_at = ? WHERE id = ?",
+                (DONE, json.dumps(result or {}, ensure_ascii=False), time.time(), job_id)
+            )
+
+    def fail(self, job: Job, error: str) -> bool:
+        """记录任务失败；未超过最大次数时按带抖动的指数退避重新排队
+
+        Returns:
+            bool: 任务是否已重新排队，为False时任务最终失败
+        """
+        now = time.time()
+        with self._lock:
+            if job.attempts < job.max_attempts:
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (job.attempts - 1))))
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, run_after = ?, error = ?, updated_at = ? WHERE id = ?",
+                    (PENDING, now + delay, error, now, job.id)
+                )
+                return True
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (FAILED, error, now, job.id)
+            )
+            return False
+
+    def recover(self, live_nodes: Optional[Iterable[str]] = None) -> int:
+        """将异常退出的进程遗留的执行中任务重新排队，返回数量
+
+        Args:
+            live_nodes: 可选，仍在运行的节点id。提供时只回收由其他节点领取的任务；
+                未提供时回收所有执行中的任务，只应在没有其他进程正在执行任务时调用，例如单节点服务启动时
+        """
+        query = "UPDATE jobs SET status = ?, run_after = ?, claimed_by = NULL, updated_at = ? WHERE status = ?"
+        now = time.time()
+        params: List[Any] = [PENDING, now, now, RUNNING]
+        if live_nodes is not None:
+            live_nodes = list(live_nodes)
+            query += " AND (claimed_by IS NULL"
+            if live_nodes:
+                query += f" OR claimed_by NOT IN ({', '.join('?' * len(live_nodes))})"
+                params += live_nodes
+            query += ")"
+        with self._lock:
+            return self._conn.execute(query, params).rowcount
+
+    def get(self, job_id: int) -> Optional[Job]:
+        """按id查询任务"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def wait(self, job_id: int, timeout: Optional[float] = None, poll_interval: float = 0.2) -> Optional[Job]:
+        """等待任务及其后续任务全部结束，返回任务链中的最后一个任务
+
+        任务结果中的next_job指向执行成功后提交的下一个任务。超时时返回None。
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                return None
+            if job.status == DONE and job.result and job.result.get('next_job'):
+                job_id = job.result['next_job']
+                continue
+            if job.status in (DONE, FAILED):
+                return job
+            if deadline is not None and time.time() >= deadline:
+                return None
+            time.sleep(poll_interval)
+
+    def wait_for_work(self, timeout: float):
+        """等待新任务提交或超时"""
+        with self._wakeup:
+            self._wakeup.wait(timeout)
+
+    def get_stats(self) -> Dict[str, int]:
+        """各状态的任务数量"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+class WorkerPool:
+    """任务队列的worker池
+
+    worker线程从队列领取任务并调用对应的处理函数。I/O密集的任务直接在线程中执行，
+    CPU密集的任务类型交给进程池执行，此时处理函数必须是模块级函数，参数和返回值可序列化。
+    处理函数返回的结果中可以包含next，描述成功后要提交的下一个任务。
+    任务失败时调用on_failure，由调用方决定如何上报，例如最终失败时发送通知。
+    """
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Callable[[Dict], Optional[Dict]]],
+                 threads: int = 4, processes: int = 0,
+                 process_handler: Optional[Callable[[str, Dict], Optional[Dict]]] = None,
+                 process_job_types: Optional[List[str]] = None, poll_interval: float = 1.0,
+                 on_failure: Optional[Callable[[Job, str, bool], None]] = None):
+        """初始化worker池
+
+        Args:
+            queue: 任务队列
+            handlers: 任务类型 -> 处理函数
+            threads: worker线程数
+            processes: 进程池大小，0表示所有任务都在线程中执行
+            process_handler: 可选，进程中执行的模块级函数，参数为(任务类型, 参数)
+            process_job_types: 可选，交给进程池执行的任务类型
+            poll_interval: 没有任务时的轮询间隔（秒）
+            on_failure: 可选，任务失败时的回调，参数为(任务, 错误信息, 是否最终失败)
+        """
+        self.queue = queue
+        self.handlers = handlers
+        self.threads = max(1, threads)
+        self.poll_interval = poll_interval
+        self.on_failure = on_failure
+        self.process_job_types = set(process_job_types or []) if processes and process_handler else set()
+        self.process_handler = process_handler
+        self._process_pool = ProcessPoolExecutor(max_workers=processes) if self.process_job_types else None
+        self._stop = threading.Event()
+        self._workers: List[threading.Thread] = []
+
+    def start(self):
+        """启动worker线程"""
+        self._stop.clear()
+        for i in range(self.threads):
+            worker = threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self, timeout: Optional[float] = None):
+        """停止领取新任务，等待正在执行的任务结束"""
+        self._stop.set()
+        with self.queue._wakeup:
+            self.queue._wakeup.notify_all()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+        if self._process_pool:
+            self._process_pool.shutdown(wait=True)
+
+    def _work(self):
+        while not self._stop.is_set():
+            if not self.run_once():
+                self.queue.wait_for_work(self.poll_interval)
+
+    def run_once(self) -> bool:
+        """领取并执行一个任务，没有可执行的任务时返回False"""
+        job = self.queue.claim(list(self.handlers))
+        if job is None:
+            return False
+        try:
+            if job.type in self.process_job_types:
+                result = self._process_pool.submit(self.process_handler, job.type, job.payload).result()
+            else:
+                result = self.handlers[job.type](job.payload)
+            result = dict(result or {})
+            following = result.pop('next', None)
+            if following:
+                result['next_job'] = self.queue.submit(
+                    following['type'], following['payload'], following.get('key'),
+                    following.get('max_attempts', job.max_attempts), following.get('force', False)
+                )
+            self.queue.complete(job.id, result)
+        except Exception as e:
+            print(f"Job {job.id} ({job.type}) failed on attempt {job.attempts}: {str(e)}")
+            retrying = self.queue.fail(job, str(e))
+            if self.on_failure:
+                try:
+                    self.on_failure(job, str(e), not retrying)
+                except Exception as callback_error:
+                    print(f"Error reporting failure of job {job.id}: {str(callback_error)}")
+        return True
@@ -1,7 +1,26 @@
 from openai import OpenAI
-from typing import Optional
+from typing import Dict, Iterator, List, NamedTuple, Optional
 from config import Config
+from cache import DiskCache
+from compactor import Compactor
+from item_summarizer import ItemSummarizer
+from utils import estimate_tokens
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
 import os
+import re
+
+# 带摘要的报告中，摘要与原始报告之间的分隔
+SUMMARY_SEPARATOR = "\n\n---\n\n# 详细内容\n\n"
+
+
+class SummaryRequest(NamedTuple):
+    """一次摘要调用所需的全部信息，供自行发送请求的调用方（如异步流水线）使用"""
+    title: str
+    key: str
+    params: Dict
+    cached: Optional[str]
 
 class LLMProcessor:
     def __init__(self, config: Config):
@@ -19,8 +38,258 @@ class LLMProcessor:
         except Exception as e:
             print(f"Warning: Failed to initialize OpenAI client: {str(e)}")
             self.client = None
+        
+        self.compactor = Compactor(config)
+        self.item_summarizer = ItemSummarizer(self)
+        
+        # 按内容寻址的摘要缓存，历史时间窗口的内容不会变化，重复请求无需再调用API
+        self.cache = None
+        cache_config = getattr(config, 'openai_cache_config', {})
+        if cache_config.get('enabled', True):
+            self.cache = DiskCache(
+                os.path.join(config.cache_dir, 'llm_cache.db'),
+                int(cache_config.get('max_mb', 50) * 1024 * 1024)
+            )
+
+    def cache_key(self, prompt: str) -> str:
+        """由渲染后的prompt和所有影响输出的参数计算缓存键"""
+        payload = json.dumps([
+            prompt,
+            self.config.openai_model,
+            self.config.openai_temperature,
+            self.config.openai_system_prompt,
+            self.config.openai_max_tokens,
+        ], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
-    def generate_daily_report(self, markdown_content: str, repo: str, since: str, until: Optional[str] = None) -> str:
+    def complete(self, prompt: str, use_cache: bool = True, key: Optional[str] = None) -> str:
+        """调用OpenAI生成回复，命中缓存时直接返回
+        
+        Args:
+            prompt: 渲染后的用户prompt
+            use_cache: 是否读取缓存；为False时强制调用API，并用新结果刷新缓存
+            key: 可选，缓存键，默认由prompt计算
+        """
+        key = key or self.cache_key(prompt)
+        if use_cache and self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        response = self.client.chat.completions.create(**self._request_params(prompt))
+        content = response.choices[0].message.content
+        
+        if self.cache:
+            self.cache.set(key, content)
+        return content
+
+    def _request_params(self, prompt: str) -> Dict:
+        """生成chat completions请求参数"""
+        return dict(
+            model=self.config.openai_model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": self.config.openai_system_prompt,
+                },
+                {"role": "user", "content": prompt},
+            ],
+            temperature=self.config.openai_temperature,
+            max_tokens=self.config.openai_max_tokens,
+        )
+
+    def _stream_complete(self, prompt: str, use_cache: bool = True) -> Iterator[str]:
+        """以流式方式调用OpenAI，逐段产出回复；完整结束后才写入缓存
+        
+        命中缓存时一次性产出缓存内容。
+        """
+        key = self.cache_key(prompt)
+        if use_cache and self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        
+        parts = []
+        stream = self.client.chat.completions.create(stream=True, **self._request_params(prompt))
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+        
+        if self.cache:
+            self.cache.set(key, ''.join(parts))
+
+    def load_prompt(self, name: str) -> str:
+        """读取prompt模板"""
+        prompt_path = os.path.join(getattr(self.config, 'prompt_dir', 'prompt'), name)
+        with open(prompt_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    @staticmethod
+    def split_report(markdown_content: str, max_tokens: int) -> List[str]:
+        """按仓库和章节把报告切分成不超过token预算的块
+        
+        每块都带上所属仓库的标题以保留上下文；单个章节超出预算时再按行切分。
+        
+        Args:
+            markdown_content: 原始markdown内容
+            max_tokens: 每块的token预算
+        """
+        # 先切出(仓库标题, 章节)序列
+        sections = []
+        for repo_block in re.split(r'(?m)^(?=## )', markdown_content):
+            if not repo_block.strip():
+                continue
+            heading = repo_block.split('\n', 1)[0] + '\n\n' if repo_block.startswith('## ') else ''
+            body = repo_block[len(heading.rstrip()):] if heading else repo_block
+            for section in re.split(r'(?m)^(?=### )', body):
+                if section.strip():
+                    sections.append((heading, section))
+        
+        chunks = []
+        current, current_heading, current_tokens = [], None, 0
+        
+        def flush():
+            if current:
+                chunks.append(''.join(current))
+        
+        for heading, section in sections:
+            pieces = [section]
+            if estimate_tokens(heading + section) > max_tokens:
+                # 章节过大，按行切分
+                pieces, piece, piece_tokens = [], '', 0
+                for line in section.splitlines(keepends=True):
+                    line_tokens = estimate_tokens(line)
+                    if piece and piece_tokens + line_tokens > max_tokens - estimate_tokens(heading):
+                        pieces.append(piece)
+                        piece, piece_tokens = '', 0
+                    piece += line
+                    piece_tokens += line_tokens
+                if piece:
+                    pieces.append(piece)
+            
+            for piece in pieces:
+                piece_tokens = estimate_tokens(piece)
+                if current and current_tokens + piece_tokens > max_tokens:
+                    flush()
+                    current, current_heading, current_tokens = [], None, 0
+                if heading != current_heading:
+                    current.append(heading)
+                    current_tokens += estimate_tokens(heading)
+                    current_heading = heading
+                current.append(piece)
+                current_tokens += piece_tokens
+        flush()
+        return chunks
+
+    def _map_reduce_prompt(self, markdown_content: str, use_cache: bool = True) -> str:
+        """分块并行摘要，返回最终合并调用的prompt
+        
+        Map阶段把报告切分成token预算内的块并行摘要，Reduce阶段合并各块的要点；
+        要点合计仍超出预算时按组用reduce_summaries.txt逐层合并成更精简的要点，直到可以一次完成。
+        """
+        map_reduce = getattr(self.config, 'openai_map_reduce_config', {})
+        chunk_tokens = map_reduce.get('chunk_tokens', 6000)
+        max_workers = max(1, map_reduce.get('max_workers', 4))
+        
+        chunk_template = self.load_prompt('summarize_chunk.txt')
+        reduce_template = self.load_prompt('reduce_summaries.txt')
+        merge_template = self.load_prompt('merge_summaries.txt')
+        
+        chunks = self.split_report(markdown_content, chunk_tokens)
+        prompts = [
+            chunk_template.format(index=i + 1, total=len(chunks), content=chunk)
+            for i, chunk in enumerate(chunks)
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-map') as executor:
+            summaries = list(executor.map(lambda prompt: self.complete(prompt, use_cache), prompts))
+        
+        # 逐层合并，直到所有要点可以放进一次合并调用
+        while len(summaries) > 1 and estimate_tokens('\n\n'.join(summaries)) > chunk_tokens:
+            groups, group, group_tokens = [], [], 0
+            for summary in summaries:
+                tokens = estimate_tokens(summary)
+                if group and group_tokens + tokens > chunk_tokens:
+                    groups.append(group)
+                    group, group_tokens = [], 0
+                group.append(summary)
+                group_tokens += tokens
+            groups.append(group)
+            if len(groups) == len(summaries):
+                break
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-reduce') as executor:
+                summaries = list(executor.map(
+                    lambda group: self.complete(reduce_template.format(summaries='\n\n'.join(group)), use_cache),
+                    groups
+                ))
+        
+        return merge_template.format(summaries='\n\n'.join(summaries))
+
+    def _summary_prompt(self, markdown_content: str, use_cache: bool = True) -> str:
+        """返回生成摘要的最后一次调用所用的prompt
+        
+        超出单次调用预算的报告先完成分块摘要，返回合并各块要点的prompt。
+        """
+        prompt = self.load_prompt('generate_daily_report.txt').format(content=markdown_content)
+        map_reduce = getattr(self.config, 'openai_map_reduce_config', {})
+        if (map_reduce.get('enabled', True)
+                and estimate_tokens(prompt) > map_reduce.get('threshold_tokens', 12000)):
+            return self._map_reduce_prompt(markdown_content, use_cache)
+        return prompt
+
+    @staticmethod
+    def _title(repo: str, since: str, until: Optional[str] = None) -> str:
+        """生成摘要标题"""
+        if until:
+            return f"# {repo}-{since}-{until} 更新摘要\n\n"
+        return f"# {repo}-{since} 更新摘要\n\n"
+
+    def prepare_input(self, updates: Dict, original_markdown: str, use_cache: bool = True) -> str:
+        """生成发送给模型的报告内容
+        
+        summary_mode为items时先逐条目生成（并缓存）摘要，再由条目摘要汇总；
+        否则使用压缩后的完整报告。
+        
+        Args:
+            updates: 仓库 -> 更新数据的字典
+            original_markdown: 完整报告
+            use_cache: 是否读取缓存
+        """
+        if getattr(self.config, 'openai_summary_mode', 'report') == 'items' and self.client:
+            content, misses = self.item_summarizer.build_input(updates, use_cache)
+            print(f"Item summaries composed: {misses} items needed an LLM call")
+            return content
+        compaction = self.compactor.compact(updates, original_markdown)
+        print(compaction.describe())
+        return compaction.markdown
+
+    def prepare_summary(self, markdown_content: str, repo: str, since: str, until: Optional[str] = None,
+                        use_cache: bool = True) -> SummaryRequest:
+        """准备摘要请求但不发送最后一次调用
+        
+        超大报告的分块摘要在这里同步完成；命中缓存时cached为缓存的摘要。
+        调用方拿到回复后应通过save_summary写入缓存。参数同generate_daily_report。
+        """
+        prompt = self._summary_prompt(markdown_content, use_cache)
+        key = self.cache_key(prompt)
+        cached = self.cache.get(key) if use_cache and self.cache else None
+        return SummaryRequest(self._title(repo, since, until), key, self._request_params(prompt), cached)
+
+    def save_summary(self, request: SummaryRequest, summary: str):
+        """缓存prepare_summary所准备请求的回复"""
+        if self.cache:
+            self.cache.set(request.key, summary)
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """获取摘要缓存的命中统计"""
+        return self.cache.get_stats() if self.cache else {}
+
+    def generate_daily_report(self, markdown_content: str, repo: str, since: str, until: Optional[str] = None,
+                              use_cache: bool = True) -> str:
         """使用OpenAI生成每日报告摘要
         
         Args:
@@ -28,76 +297,46 @@ class LLMProcessor:
             repo: 仓库名称
             since: 开始日期
             until: 结束日期（可选）
+            use_cache: 是否使用摘要缓存（可选），为False时强制重新生成
         """
         if not self.client:
             return "AI摘要生成器未正确初始化，跳过摘要生成。"
         
         try:
-            # 读取prompt模板
-            prompt_path = os.path.join('prompt', 'generate_daily_report.txt')
-            with open(prompt_path, 'r', encoding='utf-8') as f:
-                prompt_template = f.read()
-            
-            # 生成标题
-            if until:
-                title = f"# {repo}-{since}-{until} 更新摘要\n\n"
-            else:
-                title = f"# {repo}-{since} 更新摘要\n\n"
-            
-            # 填充内容
-            prompt = prompt_template.format(content=markdown_content)
-            
-            response = self.client.chat.completions.create(
-                model=self.config.openai_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self.config.openai_system_prompt,
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=self.config.openai_temperature,
-                max_tokens=self.config.openai_max_tokens,
-            )
+            # 填充prompt，超出单次调用预算的报告先分块摘要
+            prompt = self._summary_prompt(markdown_content, use_cache)
+            summary = self.complete(prompt, use_cache)
             
             # 在摘要前添加标题
-            return title + response.choices[0].message.content
+            return self._title(repo, since, until) + summary
 
-        except FileNotFoundError:
-            print(f"Error: Prompt template file not found at {prompt_path}")
+        except FileNotFoundError as e:
+            print(f"Error: Prompt template file not found at {e.filename}")
             return "无法加载提示词模板。"
         except Exception as e:
             print(f"Error generating report with OpenAI: {str(e)}")
             return "AI摘要生成失败，请检查网络连接和API配置。"
 
-    def append_summary(self, markdown_file: str, repo: str, since: str, until: Optional[str] = None) -> Optional[str]:
-        """读取markdown文件并添加AI生成的摘要"""
+    def stream_daily_report(self, markdown_content: str, repo: str, since: str, until: Optional[str] = None,
+                            use_cache: bool = True) -> Iterator[str]:
+        """以流式方式生成每日报告摘要，逐段产出标题和模型输出
+        
+        参数同generate_daily_report。分块摘要时只有最后的合并调用是流式的。
+        """
         if not self.client:
-            print("Warning: OpenAI client not initialized, skipping summary generation")
-            return None
-
+            yield "AI摘要生成器未正确初始化，跳过摘要生成。"
+            return
+        
         try:
-            # 读取原始文件内容
-            with open(markdown_file, "r", encoding="utf-8") as f:
-                content = f.read()
-
-            # 生成摘要
-            summary = self.generate_daily_report(content, repo, since, until)
-
-            # 创建新的文件名
-            new_file = self.config.get_summary_filepath(markdown_file)
-
-            # 写入新文件
-            with open(new_file, "w", encoding="utf-8") as f:
-                f.write(summary)
-                f.write("\n\n---\n\n# 详细内容\n\n")
-                f.write(content)
-
-            return new_file
-
+            prompt = self._summary_prompt(markdown_content, use_cache)
+            yield self._title(repo, since, until)
+            yield from self._stream_complete(prompt, use_cache)
+        except FileNotFoundError as e:
+            print(f"Error: Prompt template file not found at {e.filename}")
+            yield "无法加载提示词模板。"
         except Exception as e:
-            print(f"Error processing markdown file: {str(e)}")
-            return None
+            print(f"Error generating report with OpenAI: {str(e)}")
+            yield "AI摘要生成失败，请检查网络连接和API配置。"
 
 
 if __name__ == "__main__":
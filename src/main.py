@@ -4,8 +4,13 @@ from scheduler import Scheduler
 from github_client import GitHubClient
 from notifier import Notifier
 from report_generator import ReportGenerator
+from export_catalog import ExportCatalog
 from subscription_manager import SubscriptionManager
 from cli import CLI
+from report_jobs import ReportJobs, create_job_queue, create_worker_pool
+from sharding import LeaseTable, ShardedSubscriptions, default_node_id
+from checkpoint_store import SQLiteCheckpointStore
+import os
 
 def run_scheduler(scheduler):
     scheduler.start()
@@ -15,16 +20,62 @@ def main():
     config = Config()
     github_client = GitHubClient(config)
     notifier = Notifier(config.notification_settings)
-    report_generator = ReportGenerator(config)
+    # 导出目录只打开一次，调度器、任务和CLI通过报告生成器共用
+    catalog = ExportCatalog.for_config(config)
+    report_generator = ReportGenerator(config, catalog)
     subscription_manager = SubscriptionManager(config.subscriptions_file)
+    subscription_manager.start_watching()
+    
+    # 分片模式下调度器只轮询本节点在一致性哈希环上负责的仓库
+    sharding = config.sharding_config
+    scheduled_subscriptions = subscription_manager
+    checkpoints = None
+    node_id = None
+    if sharding.get('enabled'):
+        node_id = sharding.get('node_id') or default_node_id()
+        lease_path = sharding.get('lease_path', os.path.join(config.cache_dir, 'leases.db'))
+        lease_table = LeaseTable(lease_path, node_id, ttl=sharding.get('lease_ttl', 60))
+        scheduled_subscriptions = ShardedSubscriptions(
+            subscription_manager,
+            lease_table,
+            vnodes=sharding.get('vnodes', 64)
+        )
+        scheduled_subscriptions.start()
+        # 所有节点共用与租约表同一数据库中的检查点，重启或仓库迁移后从同一位置继续
+        checkpoints = SQLiteCheckpointStore(lease_path)
+    
+    # 报告生成统一通过任务队列执行，共享同一组客户端
+    job_queue = create_job_queue(config, node_id=node_id)
+    if sharding.get('enabled'):
+        # 其他节点可能正在执行任务，只回收租约已过期的节点和本节点上次运行遗留的任务
+        job_queue.recover(live_nodes=set(lease_table.live_nodes()) - {node_id})
+        # 分片成员变化（有节点失去租约）时回收它遗留的任务
+        scheduled_subscriptions.add_listener(
+            lambda added, removed: job_queue.recover(live_nodes=lease_table.live_nodes())
+        )
+    else:
+        job_queue.recover()
+    jobs = ReportJobs(
+        config,
+        queue=job_queue,
+        github_client=github_client,
+        report_generator=report_generator,
+        llm_processor=report_generator.llm_processor,
+        notifier=notifier
+    )
+    worker_pool = create_worker_pool(config, jobs)
+    worker_pool.start()
     
     # Setup and start scheduler
     scheduler = Scheduler(
         github_client=github_client,
         notifier=notifier,
         report_generator=report_generator,
-        subscription_manager=subscription_manager,
-        interval=config.update_interval
+        subscription_manager=scheduled_subscriptions,
+        interval=config.update_interval,
+        scheduler_config=config.scheduler_config,
+        checkpoints=checkpoints,
+        jobs=jobs
     )
     
     scheduler_thread = threading.Thread(target=run_scheduler, args=(scheduler,))
@@ -36,9 +87,14 @@ def main():
         github_client=github_client,
         subscription_manager=subscription_manager,
         report_generator=report_generator,
-        config=config
+        config=config,
+        jobs=jobs
     )
     cli.run()
+    worker_pool.stop(timeout=30)
+    notifier.close(timeout=30)
+    if scheduled_subscriptions is not subscription_manager:
+        scheduled_subscriptions.release()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,159 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+GITHUB_TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def utc_now() -> datetime:
+    """当前UTC时间（naive），与GitHub返回的时间和传给接口的时间窗口一致"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def parse_github_time(value: Optional[str]) -> Optional[datetime]:
+    """解析GitHub API返回的UTC时间字符串"""
+    return datetime.strptime(value, GITHUB_TIME_FORMAT) if value else None
+
+
+def format_github_time(value: Optional[datetime]) -> Optional[str]:
+    """将时间格式化为GitHub API的UTC时间字符串"""
+    return value.strftime(GITHUB_TIME_FORMAT) if value else None
+
+
+class Record:
+    """紧凑的记录基类
+
+    子类用__slots__声明字段，只保留报告需要的少数字段，时间在构造时解析为datetime。
+    """
+
+    __slots__ = ()
+    # 需要在序列化时转换格式的时间字段
+    TIME_FIELDS: Tuple[str, ...] = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可JSON序列化的字典"""
+        data = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if name in self.TIME_FIELDS:
+                value = format_github_time(value)
+            elif isinstance(value, tuple):
+                value = list(value)
+            data[name] = value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Record':
+        """从to_dict的结果还原记录"""
+        fields = dict(data)
+        for name in cls.TIME_FIELDS:
+            fields[name] = parse_github_time(fields.get(name))
+        if 'labels' in fields:
+            fields['labels'] = tuple(fields['labels'] or ())
+        return cls(**fields)
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__[:3])
+        return f"{type(self).__name__}({fields})"
+
+
+class Release(Record):
+    """发布记录"""
+
+    __slots__ = ('id', 'tag_name', 'name', 'published_at', 'html_url')
+    TIME_FIELDS = ('published_at',)
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> 'Release':
+        return cls(
+            id=data.get('id'),
+            tag_name=data.get('tag_name'),
+            name=data.get('name'),
+            published_at=parse_github_time(data.get('published_at')),
+            html_url=data.get('html_url'),
+        )
+
+
+class Commit(Record):
+    """提交记录，message只保留首行"""
+
+    __slots__ = ('sha', 'message', 'author', 'author_login', 'date', 'parent_count', 'html_url')
+    TIME_FIELDS = ('date',)
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> 'Commit':
+        commit = data.get('commit') or {}
+        author = commit.get('author') or {}
+        committer = commit.get('committer') or {}
+        return cls(
+            sha=data.get('sha', ''),
+            message=(commit.get('message') or '').split('\n')[0],
+            author=author.get('name') or 'Unknown',
+            author_login=(data.get('author') or {}).get('login'),
+            date=parse_github_time(committer.get('date') or author.get('date')),
+            parent_count=len(data.get('parents') or []),
+            html_url=data.get('html_url'),
+        )
+
+
+class Issue(Record):
+    """议题记录；REST的/issues接口也会返回PR，用is_pull_request区分"""
+
+    __slots__ = ('id', 'number', 'title', 'state', 'html_url', 'user', 'labels',
+                 'created_at', 'updated_at', 'is_pull_request')
+    TIME_FIELDS = ('created_at', 'updated_at')
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> 'Issue':
+        return cls(
+            id=data.get('id'),
+            number=data.get('number'),
+            title=data.get('title'),
+            state=data.get('state', 'unknown'),
+            html_url=data.get('html_url'),
+            user=(data.get('user') or {}).get('login') or 'Unknown',
+            labels=tuple(label.get('name') for label in data.get('labels') or []),
+            created_at=parse_github_time(data.get('created_at')),
+            updated_at=parse_github_time(data.get('updated_at')),
+            is_pull_request='pull_request' in data,
+        )
+
+
+class PullRequest(Record):
+    """拉取请求记录"""
+
+    __slots__ = ('id', 'number', 'title', 'state', 'html_url', 'user', 'labels',
+                 'created_at', 'updated_at', 'merged_at')
+    TIME_FIELDS = ('created_at', 'updated_at', 'merged_at')
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> 'PullRequest':
+        return cls(
+            id=data.get('id'),
+            number=data.get('number'),
+            title=data.get('title'),
+            state=data.get('state', 'unknown'),
+            html_url=data.get('html_url'),
+            user=(data.get('user') or {}).get('login') or 'Unknown',
+            labels=tuple(label.get('name') for label in data.get('labels') or []),
+            created_at=parse_github_time(data.get('created_at')),
+            updated_at=parse_github_time(data.get('updated_at')),
+            merged_at=parse_github_time(data.get('merged_at')),
+        )
+
+
+# updates字典中各接口对应的记录类型
+ENDPOINT_MODELS = {
+    'releases': Release,
+    'commits': Commit,
+    'issues': Issue,
+    'pull_requests': PullRequest,
+}
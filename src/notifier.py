@@ -1,7 +1,260 @@
+import os
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.message import EmailMessage
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from utils import atomic_write
+
+
+class Channel:
+    """通知渠道基类
+
+    子类实现send。concurrency限制同一渠道同时进行的发送数，
+    rate_per_minute限制每分钟最多发送的摘要数，0表示不限制。
+    """
+
+    def __init__(self, name: str, concurrency: int = 1, rate_per_minute: float = 0):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.rate_per_minute = rate_per_minute
+
+    def send(self, subject: str, body: str):
+        raise NotImplementedError
+
+
+class FileChannel(Channel):
+    """把摘要写入目录中的markdown文件"""
+
+    def __init__(self, directory: str, **kwargs):
+        super().__init__(kwargs.pop('name', 'file'), **kwargs)
+        self.directory = directory
+
+    def send(self, subject: str, body: str):
+        filename = f"notification_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.md"
+        with atomic_write(os.path.join(self.directory, filename)) as f:
+            f.write(f"# {subject}\n\n{body}")
+
+
+class WebhookChannel(Channel):
+    """以JSON向通用webhook发送摘要：{"subject": ..., "text": ...}"""
+
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 10,
+                 transport: Optional[httpx.BaseTransport] = None, **kwargs):
+        super().__init__(kwargs.pop('name', 'webhook'), **kwargs)
+        self.url = url
+        self.client = httpx.Client(headers=headers or {}, timeout=timeout, transport=transport)
+
+    def send(self, subject: str, body: str):
+        response = self.client.post(self.url, json={'subject': subject, 'text': body})
+        response.raise_for_status()
+
+
+class SMTPChannel(Channel):
+    """通过SMTP发送邮件；密码默认从SMTP_PASSWORD环境变量读取"""
+
+    def __init__(self, host: str, port: int, from_addr: str, to_addrs: List[str],
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 starttls: bool = False, timeout: float = 30, **kwargs):
+        super().__init__(kwargs.pop('name', 'smtp'), **kwargs)
+        self.host = host
+        self.port = port
+        self.from_addr = from_addr
+        self.to_addrs = to_addrs
+        self.username = username
+        self.password = password if password is not None else os.getenv('SMTP_PASSWORD')
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def send(self, subject: str, body: str):
+        message = EmailMessage()
+        message['Subject'] = subject
+        message['From'] = self.from_addr
+        message['To'] = ', '.join(self.to_addrs)
+        message.set_content(body)
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or '')
+            smtp.send_message(message)
+
+
+CHANNEL_TYPES = {
+    'file': FileChannel,
+    'webhook': WebhookChannel,
+    'smtp': SMTPChannel,
+}
+
+
+def create_channels(channel_settings: List[Dict]) -> List[Channel]:
+    """根据配置创建通知渠道，跳过enabled为false的渠道"""
+    channels = []
+    for settings in channel_settings:
+        settings = dict(settings)
+        if not settings.pop('enabled', True):
+            continue
+        channel_type = settings.pop('type')
+        if channel_type not in CHANNEL_TYPES:
+            print(f"Unknown notification channel type: {channel_type}")
+            continue
+        channels.append(CHANNEL_TYPES[channel_type](**settings))
+    return channels
+
+
+class _ChannelState:
+    """单个渠道的待发送报告、发送线程池和速率限制状态"""
+
+    def __init__(self, channel: Channel):
+        self.channel = channel
+        self.pending: List[str] = []
+        self.first_pending_at: Optional[float] = None
+        self.executor = ThreadPoolExecutor(max_workers=channel.concurrency,
+                                           thread_name_prefix=f'notify-{channel.name}')
+        self.next_send_at = 0.0
+        self.rate_lock = threading.Lock()
+
+
 class Notifier:
-    def __init__(self, settings):
+    """后台批量通知分发器
+
+    notify只把报告放入各渠道的待发送队列并立即返回，不会阻塞调用方。
+    后台分发线程把同一渠道在coalesce_window秒内收到的报告合并成一份摘要，
+    交给该渠道自己的线程池发送，按渠道限制并发和速率，失败时按指数退避重试。
+    """
+
+    def __init__(self, settings: Dict, channels: Optional[List[Channel]] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """初始化通知器
+
+        Args:
+            settings: notification_settings配置段
+            channels: 可选，通知渠道列表，默认按settings中的channels创建
+            clock: 可选，单调时钟，便于测试注入
+            sleep: 可选，重试和限速时的等待函数
+        """
         self.settings = settings
-    
-    def notify(self, report):
-        # Implement notification logic, e.g., send email or Slack message
-        pass
+        self.enabled = settings.get('enabled', True)
+        self.coalesce_window = settings.get('coalesce_window', 60)
+        self.max_retries = settings.get('max_retries', 3)
+        self.backoff_base = settings.get('backoff_base', 2.0)
+        self.backoff_max = settings.get('backoff_max', 60)
+        self.clock = clock
+        self.sleep = sleep
+        if channels is None:
+            channels = create_channels(settings.get('channels', []))
+        self._states = [_ChannelState(channel) for channel in channels]
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._closed = False
+        self._dispatcher: Optional[threading.Thread] = None
+        self.stats = {'reports': 0, 'digests_sent': 0, 'failures': 0}
+
+    def notify(self, report: str):
+        """提交一份报告，立即返回"""
+        if not self.enabled or not self._states or not report:
+            return
+        with self._cond:
+            if self._closed:
+                return
+            now = self.clock()
+            for state in self._states:
+                if not state.pending:
+                    state.first_pending_at = now
+                state.pending.append(report)
+            self.stats['reports'] += 1
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name='notify-dispatcher',
+                                                    daemon=True)
+                self._dispatcher.start()
+            self._cond.notify_all()
+
+    def _dispatch_loop(self):
+        with self._cond:
+            while not self._closed:
+                wait = self._dispatch_due(force=False)
+                self._cond.wait(timeout=wait)
+
+    def _dispatch_due(self, force: bool) -> Optional[float]:
+        """发送到期的批次，返回距离下一个批次到期的秒数；调用时需持有锁"""
+        now = self.clock()
+        next_wait = None
+        for state in self._states:
+            if not state.pending:
+                continue
+            remaining = state.first_pending_at + self.coalesce_window - now
+            if force or remaining <= 0:
+                reports, state.pending, state.first_pending_at = state.pending, [], None
+                self._inflight += 1
+                state.executor.submit(self._deliver, state, reports)
+            else:
+                next_wait = remaining if next_wait is None else min(next_wait, remaining)
+        return next_wait
+
+    @staticmethod
+    def build_digest(reports: List[str]):
+        """把多份报告合并为一份摘要，返回(标题, 正文)"""
+        if len(reports) == 1:
+            return "GitHub Sentinel update", reports[0]
+        return f"GitHub Sentinel digest: {len(reports)} reports", "\n\n---\n\n".join(reports)
+
+    def _wait_for_rate(self, state: _ChannelState):
+        """按渠道的速率限制预约发送时间并等待"""
+        if not state.channel.rate_per_minute:
+            return
+        with state.rate_lock:
+            now = self.clock()
+            send_at = max(now, state.next_send_at)
+            state.next_send_at = send_at + 60.0 / state.channel.rate_per_minute
+        if send_at > now:
+            self.sleep(send_at - now)
+
+    def _deliver(self, state: _ChannelState, reports: List[str]):
+        subject, body = self.build_digest(reports)
+        try:
+            for attempt in range(self.max_retries + 1):
+                self._wait_for_rate(state)
+                try:
+                    state.channel.send(subject, body)
+                    with self._cond:
+                        self.stats['digests_sent'] += 1
+                    return
+                except Exception as e:
+                    if attempt >= self.max_retries:
+                        print(f"Notification via {state.channel.name} failed after {attempt + 1} attempts: {str(e)}")
+                        with self._cond:
+                            self.stats['failures'] += 1
+                        return
+                    delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                    print(f"Notification via {state.channel.name} failed: {str(e)}, retrying in {delay:.0f} seconds...")
+                    self.sleep(delay)
+        finally:
+            with self._cond:
+                self._inflight -= 1
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """立即发送所有待发送的报告并等待发送结束，超时返回False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._dispatch_due(force=True)
+            while self._inflight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(timeout=remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        """发送剩余报告并停止分发线程"""
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for state in self._states:
+            state.executor.shutdown(wait=False)
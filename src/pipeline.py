@@ -0,0 +1,230 @@
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from llm import SUMMARY_SEPARATOR
+from utils import atomic_write
+
+# 流水线的各个阶段，按执行顺序排列
+STAGES = ('fetch', 'render', 'summarize', 'persist')
+
+
+class PipelineResult(NamedTuple):
+    """一次报告流水线的结果"""
+    updates: Dict
+    report: str
+    summary: Optional[str]
+    filepath: str
+    summary_file: Optional[str]
+    timings: Dict[str, float]
+
+    @property
+    def content(self) -> str:
+        """与带摘要的报告文件相同的完整markdown，无摘要时为原始报告"""
+        if self.summary:
+            return self.summary + SUMMARY_SEPARATOR + self.report
+        return self.report
+
+    def describe(self) -> str:
+        return ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in self.timings.items())
+
+
+class _TeeWriter:
+    """写入文件的同时保留写入的内容"""
+
+    def __init__(self, f):
+        self.f = f
+        self.chunks: List[str] = []
+
+    def write(self, chunk: str) -> int:
+        self.chunks.append(chunk)
+        return self.f.write(chunk)
+
+    def getvalue(self) -> str:
+        return ''.join(self.chunks)
+
+
+class ReportPipeline:
+    """报告生成流水线：fetch → render → summarize → persist → return
+
+    每个阶段只执行一次。获取和渲染交错进行：GitHubClient.iter_updates每产出一个仓库，
+    就由ReportGenerator.write_report渲染并写入原始报告，无需等待全部仓库获取完成。
+    渲染后的报告直接交给摘要阶段，带摘要的报告原子写入，不再回读刚写入的文件。
+    结果中包含每个阶段的耗时。CLI的export/daily和Gradio都通过它生成报告。
+    """
+
+    def __init__(self, config, github_client=None, report_generator=None, llm_processor=None):
+        """初始化流水线
+
+        Args:
+            config: 配置对象
+            github_client: fetch阶段使用的GitHub客户端
+            report_generator: render阶段使用的报告生成器
+            llm_processor: summarize阶段使用的LLM处理器，默认使用report_generator的
+        """
+        self.config = config
+        self.github_client = github_client
+        self.report_generator = report_generator
+        self.llm_processor = llm_processor or getattr(report_generator, 'llm_processor', None)
+
+    @staticmethod
+    @contextmanager
+    def _timed(timings: Dict[str, float], stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[stage] += time.perf_counter() - start
+
+    def fetch(self, repos: List[str], since: Optional[datetime] = None,
+              until: Optional[datetime] = None) -> Dict:
+        """获取仓库在窗口内的更新"""
+        return self.github_client.fetch_updates(repos, since=since, until=until)
+
+    def can_summarize(self) -> bool:
+        return self.llm_processor is not None and self.llm_processor.client is not None
+
+    def summarize(self, updates: Dict, report: str, title: str, since: str, until: Optional[str] = None,
+                  use_cache: bool = True) -> str:
+        """生成AI摘要，输入按summary_mode压缩或由条目摘要组成"""
+        llm_input = self.llm_processor.prepare_input(updates, report, use_cache)
+        return self.llm_processor.generate_daily_report(llm_input, title, since, until, use_cache)
+
+    def stream_summarize(self, updates: Dict, report: str, title: str, since: str,
+                         until: Optional[str] = None, use_cache: bool = True) -> Iterator[str]:
+        """流式生成AI摘要，参数同summarize"""
+        llm_input = self.llm_processor.prepare_input(updates, report, use_cache)
+        yield from self.llm_processor.stream_daily_report(llm_input, title, since, until, use_cache)
+
+    def write_report(self, filepath: str, updates: Union[Dict, Iterable[Tuple[str, Dict]]],
+                     repo: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                     timings: Optional[Dict[str, float]] = None) -> Tuple[Dict, str]:
+        """边渲染边原子写入原始报告，并登记到导出目录
+
+        Args:
+            filepath: 原始报告路径
+            updates: 更新数据，可以是字典，也可以是GitHubClient.iter_updates产出的(仓库, 数据)序列
+            repo: 可选，导出目录中记录的仓库，多仓库报告为None
+            since: 可选，开始日期
+            until: 可选，结束日期
+            timings: 可选，累加等待更新（fetch）和渲染写入（render）的耗时
+
+        Returns:
+            Tuple[Dict, str]: (按仓库收集的更新, 报告markdown)
+        """
+        timings = timings if timings is not None else dict.fromkeys(STAGES, 0.0)
+        items = iter(updates.items() if isinstance(updates, dict) else updates)
+        collected: Dict = {}
+
+        def tracked():
+            while True:
+                with self._timed(timings, 'fetch'):
+                    item = next(items, None)
+                if item is None:
+                    return
+                collected[item[0]] = item[1]
+                yield item
+
+        start, fetch_before = time.perf_counter(), timings['fetch']
+        with atomic_write(filepath) as f:
+            sink = _TeeWriter(f)
+            self.report_generator.write_report(tracked(), sink)
+        # 等待获取的时间计入fetch阶段，其余为渲染和写入
+        timings['render'] += time.perf_counter() - start - (timings['fetch'] - fetch_before)
+        self.report_generator.catalog.record(filepath, repo=repo, since=since, until=until, kind='raw')
+        return collected, sink.getvalue()
+
+    def persist_summary(self, filepath: str, report: str, summary: str, repo: Optional[str] = None,
+                        since: Optional[str] = None, until: Optional[str] = None) -> str:
+        """原子写入带摘要的报告并登记到导出目录，返回其路径
+
+        Args:
+            filepath: 原始报告路径，带摘要的报告路径由它生成
+            report: 原始报告
+            summary: AI摘要
+        """
+        summary_file = self.config.get_summary_filepath(filepath)
+        with atomic_write(summary_file) as f:
+            f.write(summary)
+            f.write(SUMMARY_SEPARATOR)
+            f.write(report)
+        self.report_generator.catalog.record(summary_file, repo=repo, since=since, until=until, kind='summary')
+        return summary_file
+
+    def _prepare(self, repos: Union[str, List[str]], since: Optional[datetime], until: Optional[datetime],
+                 filepath: Optional[str], title_since: Optional[str], title_until: Optional[str]):
+        """统一参数：仓库列表、单仓库名称、输出路径和摘要标题中的日期"""
+        repos = [repos] if isinstance(repos, str) else list(repos)
+        repo = repos[0] if len(repos) == 1 else None
+        title_since = title_since or (since.strftime('%Y-%m-%d') if since else '')
+        if filepath is None:
+            filepath = self.config.get_export_filepath(repo=repo, since=since,
+                                                       until=until if title_until else None)
+        return repos, repo, filepath, title_since
+
+    def run(self, repos: Union[str, List[str]], since: Optional[datetime] = None,
+            until: Optional[datetime] = None, summarize: bool = True, filepath: Optional[str] = None,
+            title_since: Optional[str] = None, title_until: Optional[str] = None,
+            use_cache: bool = True, updates: Optional[Dict] = None) -> PipelineResult:
+        """依次执行所有阶段并返回结果
+
+        Args:
+            repos: 仓库或仓库列表
+            since: 可选，开始时间
+            until: 可选，结束时间
+            summarize: 是否生成AI摘要，LLM客户端不可用时跳过
+            filepath: 可选，原始报告路径，默认按仓库和日期生成
+            title_since: 可选，摘要标题和导出目录中的开始日期，默认取since的日期
+            title_until: 可选，摘要标题和导出目录中的结束日期；提供时文件名包含日期范围
+            use_cache: 是否使用摘要缓存
+            updates: 可选，已获取的更新数据，提供时跳过fetch阶段
+        """
+        stream = self.stream(repos, since, until, summarize, filepath, title_since, title_until,
+                             use_cache, updates, streaming=False)
+        for item in stream:
+            if isinstance(item, PipelineResult):
+                return item
+
+    def stream(self, repos: Union[str, List[str]], since: Optional[datetime] = None,
+               until: Optional[datetime] = None, summarize: bool = True, filepath: Optional[str] = None,
+               title_since: Optional[str] = None, title_until: Optional[str] = None,
+               use_cache: bool = True, updates: Optional[Dict] = None,
+               streaming: bool = True) -> Iterator[Union[str, PipelineResult]]:
+        """依次执行所有阶段，摘要边生成边产出
+
+        参数同run。原始报告在获取的同时逐个仓库写入；随后逐段产出摘要文本（str），最后产出PipelineResult。
+        streaming为False时摘要一次性生成，不产出片段。
+        """
+        repos, repo, filepath, title_since = self._prepare(repos, since, until, filepath, title_since, title_until)
+        timings = dict.fromkeys(STAGES, 0.0)
+
+        if updates is None:
+            updates = self.github_client.iter_updates(repos, since=since, until=until)
+        updates, report = self.write_report(filepath, updates, repo=repo, since=title_since or None,
+                                            until=title_until, timings=timings)
+
+        summary = None
+        if summarize and self.can_summarize():
+            title = repo or ', '.join(repos)
+            if streaming:
+                parts = []
+                start = time.perf_counter()
+                for part in self.stream_summarize(updates, report, title, title_since, title_until, use_cache):
+                    parts.append(part)
+                    # 产出片段期间调用方的处理时间不计入摘要阶段
+                    timings['summarize'] += time.perf_counter() - start
+                    yield part
+                    start = time.perf_counter()
+                timings['summarize'] += time.perf_counter() - start
+                summary = ''.join(parts)
+            else:
+                with self._timed(timings, 'summarize'):
+                    summary = self.summarize(updates, report, title, title_since, title_until, use_cache)
+
+        summary_file = None
+        if summary:
+            with self._timed(timings, 'persist'):
+                summary_file = self.persist_summary(filepath, report, summary, repo=repo,
+                                                    since=title_since or None, until=title_until)
+        yield PipelineResult(updates, report, summary or None, filepath, summary_file, timings)
@@ -1,96 +1,99 @@
-from typing import Dict, List
+from typing import Dict, List, Iterable, Iterator, Optional, TextIO, Tuple, Union
 from llm import LLMProcessor
+from export_catalog import ExportCatalog
 import os
 from config import Config
+from models import format_github_time
 
 class ReportGenerator:
-    def __init__(self, config: Config):
-        """初始化报告生成器"""
+    def __init__(self, config: Config, catalog: Optional[ExportCatalog] = None):
+        """初始化报告生成器
+        
+        Args:
+            config: 配置对象
+            catalog: 可选，登记导出文件的导出目录；同一进程中的组件应共用一个，默认按配置打开
+        """
         self.llm_processor = LLMProcessor(config)
+        self.catalog = catalog if catalog is not None else ExportCatalog.for_config(config)
 
-    def generate(self, updates):
+    def generate(self, updates) -> str:
         """生成更新报告"""
-        report = ""
-        for repo, data in updates.items():
-            report += f"\n## {repo}\n\n"
-            
-            # 处理releases信息
-            release = data.get('releases', {})
-            if release:
-                report += "### Latest Release\n"
-                report += f"- Version: {release.get('tag_name', 'N/A')}\n"
-                report += f"- Title: {release.get('name', 'N/A')}\n"
-                report += f"- Published at: {release.get('published_at', 'N/A')}\n"
-                report += f"- URL: {release.get('html_url', 'N/A')}\n\n"
-            else:
-                report += "### No releases found\n\n"
-            
-            # 处理commits信息
-            commits = data.get('commits', [])
-            if commits:
-                report += "### Recent Commits\n"
-                for commit in commits:
-                    sha = commit.get('sha', '')[:7]
-                    message = commit.get('commit', {}).get('message', '').split('\n')[0]
-                    author = commit.get('commit', {}).get('author', {}).get('name', 'Unknown')
-                    report += f"- [`{sha}`] {message} (by {author})\n"
-                report += "\n"
-            
-            # 处理issues信息
-            issues = data.get('issues', [])
-            if issues:
-                report += "### Recent Issues\n"
-                for issue in issues:
-                    number = issue.get('number', 'N/A')
-                    title = issue.get('title', 'N/A')
-                    state = issue.get('state', 'unknown')
-                    url = issue.get('html_url', '#')
-                    report += f"- #{number} [{title}]({url}) ({state})\n"
-                report += "\n"
-            
-            # 处理pull requests信息
-            prs = data.get('pull_requests', [])
-            if prs:
-                report += "### Recent Pull Requests\n"
-                for pr in prs:
-                    number = pr.get('number', 'N/A')
-                    title = pr.get('title', 'N/A')
-                    state = pr.get('state', 'unknown')
-                    url = pr.get('html_url', '#')
-                    user = pr.get('user', {}).get('login', 'Unknown')
-                    report += f"- #{number} [{title}]({url}) by @{user} ({state})\n"
-                report += "\n"
-            
-        return report
+        return ''.join(self.iter_report(updates))
 
-    def generate_and_save(self, updates: Dict, filepath: str, with_summary: bool = True) -> str:
-        """生成报告并保存到文件
+    def iter_report(self, updates: Union[Dict, Iterable[Tuple[str, Dict]]]) -> Iterator[str]:
+        """逐个仓库、逐个章节产出报告的markdown片段
         
         Args:
-            updates: 更新数据
-            filepath: 输出文件路径
-            with_summary: 是否生成AI摘要
-            
-        Returns:
-            str: 最终生成的文件路径
+            updates: 更新数据，可以是字典，也可以是GitHubClient.iter_updates产出的(仓库, 数据)序列
         """
-        # 确保输出目录存在
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        items = updates.items() if isinstance(updates, dict) else updates
+        for repo, data in items:
+            yield f"\n## {repo}\n\n"
+            yield from self._iter_repo_sections(data)
+
+    def _iter_repo_sections(self, data: Dict) -> Iterator[str]:
+        """产出单个仓库的各个章节"""
+        # 处理获取失败的接口
+        errors = data.get('errors', {})
+        if errors:
+            lines = ["### Fetch Errors\n"]
+            for endpoint, error in errors.items():
+                lines.append(f"- {endpoint}: {error}\n")
+            lines.append("\n")
+            yield ''.join(lines)
+        
+        # 处理releases信息
+        release = data.get('releases')
+        if release:
+            yield (
+                "### Latest Release\n"
+                f"- Version: {release.tag_name or 'N/A'}\n"
+                f"- Title: {release.name or 'N/A'}\n"
+                f"- Published at: {format_github_time(release.published_at) or 'N/A'}\n"
+                f"- URL: {release.html_url or 'N/A'}\n\n"
+            )
+        else:
+            yield "### No releases found\n\n"
         
-        # 生成报告
-        report = self.generate(updates)
+        # 处理commits信息
+        commits = data.get('commits', [])
+        if commits:
+            lines = ["### Recent Commits\n"]
+            for commit in commits:
+                lines.append(f"- [`{commit.sha[:7]}`] {commit.message} (by {commit.author})\n")
+            lines.append("\n")
+            yield ''.join(lines)
         
-        # 写入原始报告
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(report)
+        # 处理issues信息
+        issues = data.get('issues', [])
+        if issues:
+            lines = ["### Recent Issues\n"]
+            for issue in issues:
+                lines.append(f"- #{issue.number} [{issue.title}]({issue.html_url or '#'}) ({issue.state})\n")
+            lines.append("\n")
+            yield ''.join(lines)
+        
+        # 处理pull requests信息
+        prs = data.get('pull_requests', [])
+        if prs:
+            lines = ["### Recent Pull Requests\n"]
+            for pr in prs:
+                lines.append(f"- #{pr.number} [{pr.title}]({pr.html_url or '#'}) by @{pr.user} ({pr.state})\n")
+            lines.append("\n")
+            yield ''.join(lines)
+
+    def write_report(self, updates, sink: TextIO) -> int:
+        """将报告逐块写入文件或任意可写对象，生成一块写一块
+        
+        Args:
+            updates: 更新数据，同iter_report
+            sink: 具有write方法的对象
             
-        if with_summary:
-            try:
-                # 生成带摘要的报告
-                summary_file = self.llm_processor.append_summary(filepath)
-                if summary_file:
-                    return summary_file
-            except Exception as e:
-                print(f"Failed to generate AI summary: {str(e)}")
-                
-        return filepath
+        Returns:
+            int: 写入的字符数
+        """
+        written = 0
+        for chunk in self.iter_report(updates):
+            sink.write(chunk)
+            written += len(chunk)
+        return written
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from job_queue import Job, JobQueue, WorkerPool
+from models import ENDPOINT_MODELS, format_github_time, parse_github_time
+from pipeline import ReportPipeline
+from utils import atomic_write
+
+JOB_TYPES = ('fetch', 'render', 'summarize', 'notify')
+
+
+def save_updates(path: str, updates: Dict[str, Dict]):
+    """将updates字典保存为JSON，记录对象转换为字典"""
+    data = {}
+    for repo, repo_updates in updates.items():
+        data[repo] = {}
+        for endpoint, value in repo_updates.items():
+            if endpoint == 'releases':
+                value = value.to_dict() if value else None
+            elif endpoint in ENDPOINT_MODELS:
+                value = [record.to_dict() for record in value]
+            data[repo][endpoint] = value
+    with atomic_write(path) as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def load_updates(path: str) -> Dict[str, Dict]:
+    """读取save_updates保存的updates字典"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    updates = {}
+    for repo, repo_updates in data.items():
+        updates[repo] = {}
+        for endpoint, value in repo_updates.items():
+            model = ENDPOINT_MODELS.get(endpoint)
+            if endpoint == 'releases':
+                value = model.from_dict(value) if value else None
+            elif model:
+                value = [model.from_dict(item) for item in value]
+            updates[repo][endpoint] = value
+    return updates
+
+
+class ReportJobs:
+    """报告生成的任务类型和处理函数
+
+    一份仓库报告拆成 fetch → render → summarize → notify 的任务链，每一步成功后提交下一步。
+    任务的幂等键由任务类型、仓库和时间窗口组成，同一窗口的报告不会被并发重复生成。
+    任务之间通过data_dir中的JSON文件传递获取到的更新数据。
+    """
+
+    def __init__(self, config, queue: Optional[JobQueue] = None, github_client=None,
+                 report_generator=None, llm_processor=None, notifier=None):
+        """初始化报告任务
+
+        Args:
+            config: 配置对象
+            queue: 任务队列，只执行处理函数时可以为None
+            github_client: fetch任务使用的GitHub客户端
+            report_generator: render任务使用的报告生成器
+            llm_processor: summarize任务使用的LLM处理器
+            notifier: notify任务使用的通知器
+        """
+        self.config = config
+        self.queue = queue
+        self.github_client = github_client
+        self.report_generator = report_generator
+        self.llm_processor = llm_processor
+        self.notifier = notifier
+        self.pipeline = ReportPipeline(config, github_client, report_generator, llm_processor)
+        jobs_config = getattr(config, 'jobs_config', {})
+        self.data_dir = jobs_config.get('data_dir', os.path.join(config.cache_dir, 'jobs'))
+        self.max_attempts = jobs_config.get('max_attempts', 3)
+        # 交互式调用方（CLI、Gradio）等待任务链结束的最长秒数
+        self.wait_timeout = jobs_config.get('wait_timeout', 1800)
+
+    def handlers(self) -> Dict[str, Any]:
+        """任务类型 -> 处理函数"""
+        return {
+            'fetch': self.fetch,
+            'render': self.render,
+            'summarize': self.summarize,
+            'notify': self.notify,
+        }
+
+    @staticmethod
+    def job_key(job_type: str, payload: Dict) -> str:
+        """任务的幂等键：(任务类型, 仓库, 时间窗口)"""
+        return f"{job_type}:{payload['repo']}:{payload.get('since')}:{payload.get('until')}"
+
+    def _next(self, job_type: str, payload: Dict) -> Dict:
+        return {
+            'type': job_type,
+            'payload': payload,
+            'key': self.job_key(job_type, payload),
+            'force': payload.get('force', False),
+        }
+
+    def submit_report(self, repo: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                      summarize: bool = True, notify: bool = False, updates: Optional[Dict] = None,
+                      force: bool = False, title_since: Optional[str] = None,
+                      title_until: Optional[str] = None) -> int:
+        """提交一份仓库报告的任务链
+
+        Args:
+            repo: 仓库
+            since: 可选，开始时间
+            until: 可选，结束时间
+            summarize: 是否生成AI摘要
+            notify: 是否发送通知
+            updates: 可选，已获取的更新数据，提供时跳过fetch任务
+            force: 同一窗口的任务已完成时是否重新生成
+            title_since: 可选，摘要标题中的开始日期，默认取since的日期
+            title_until: 可选，摘要标题中的结束日期
+
+        Returns:
+            int: 任务链第一个任务的id，可传给JobQueue.wait
+        """
+        payload = {
+            'repo': repo,
+            'since': format_github_time(since),
+            'until': format_github_time(until),
+            'summarize': summarize,
+            'notify': notify,
+            'force': force,
+            'title_since': title_since or (since.strftime('%Y-%m-%d') if since else None),
+            'title_until': title_until,
+        }
+        job_type = 'fetch'
+        if updates is not None:
+            payload['data_file'] = self._data_file(payload)
+            save_updates(payload['data_file'], updates)
+            job_type = 'render'
+        return self.queue.submit(job_type, payload, self.job_key(job_type, payload), self.max_attempts, force)
+
+    def run_report(self, repo: str, timeout: Optional[float] = None, **kwargs) -> Optional[Job]:
+        """提交报告任务链并等待结束，返回最后一个任务，超时时返回None"""
+        return self.wait(self.submit_report(repo, **kwargs), timeout)
+
+    def wait(self, job_id: int, timeout: Optional[float] = None) -> Optional[Job]:
+        """等待任务链结束，返回最后一个任务；timeout默认为jobs.wait_timeout，超时时返回None"""
+        return self.queue.wait(job_id, self.wait_timeout if timeout is None else timeout)
+
+    def _data_file(self, payload: Dict) -> str:
+        digest = hashlib.sha1(self.job_key('data', payload).encode('utf-8')).hexdigest()
+        return os.path.join(self.data_dir, f"{digest}.json")
+
+    def fetch(self, payload: Dict) -> Dict:
+        """获取仓库在窗口内的更新"""
+        repo = payload['repo']
+        updates = self.github_client.fetch_updates(
+            [repo], since=parse_github_time(payload['since']), until=parse_github_time(payload['until'])
+        )
+        errors = updates[repo].get('errors')
+        if errors:
+            raise RuntimeError(f"failed to fetch {', '.join(errors)} for {repo}")
+        payload = dict(payload, data_file=self._data_file(payload))
+        save_updates(payload['data_file'], updates)
+        return {'data_file': payload['data_file'], 'next': self._next('render', payload)}
+
+    def render(self, payload: Dict) -> Dict:
+        """生成markdown报告文件"""
+        updates = load_updates(payload['data_file'])
+        filepath = self.config.get_export_filepath(
+            repo=payload['repo'],
+            since=parse_github_time(payload['since']),
+            until=parse_github_time(payload['until']) if payload.get('title_until') else None
+        )
+        self.pipeline.write_report(filepath, updates, repo=payload['repo'],
+                                   since=payload.get('title_since'), until=payload.get('title_until'))
+        payload = dict(payload, filepath=filepath)
+        result = {'filepath': filepath}
+        if payload.get('summarize'):
+            result['next'] = self._next('summarize', payload)
+        elif payload.get('notify'):
+            result['next'] = self._next('notify', payload)
+        return result
+
+    def summarize(self, payload: Dict) -> Dict:
+        """为报告生成AI摘要"""
+        if not self.pipeline.can_summarize():
+            raise RuntimeError(f"failed to summarize {payload['filepath']}: OpenAI client not initialized")
+        # 报告由上一个任务写入，任务之间只能通过文件传递
+        with open(payload['filepath'], 'r', encoding='utf-8') as f:
+            report = f.read()
+        repo, since, until = payload['repo'], payload.get('title_since') or '', payload.get('title_until')
+        summary = self.pipeline.summarize(load_updates(payload['data_file']), report, repo, since, until)
+        summary_file = self.pipeline.persist_summary(payload['filepath'], report, summary, repo, since or None, until)
+        payload = dict(payload, filepath=summary_file)
+        result = {'filepath': summary_file}
+        if payload.get('notify'):
+            result['next'] = self._next('notify', payload)
+        return result
+
+    def notify(self, payload: Dict) -> Dict:
+        """发送报告通知"""
+        with open(payload['filepath'], 'r', encoding='utf-8') as f:
+            self.notifier.notify(f.read())
+        return {'filepath': payload['filepath']}
+
+    def report_failure(self, job: Job, error: str, final: bool):
+        """任务最终失败时通过通知器上报，重试中的失败只记录日志"""
+        if not final or self.notifier is None:
+            return
+        repo = job.payload.get('repo', '')
+        window = ' ~ '.join(filter(None, (job.payload.get('since'), job.payload.get('until'))))
+        self.notifier.notify(
+            f"# 报告任务失败\n\n"
+            f"- 任务: {job.id} ({job.type})\n"
+            f"- 仓库: {repo}\n"
+            f"- 时间窗口: {window or '无'}\n"
+            f"- 尝试次数: {job.attempts}\n"
+            f"- 错误: {error}\n"
+        )
+
+
+# 进程池中按需创建的报告任务，每个进程只创建一次
+_process_jobs: Optional[ReportJobs] = None
+
+
+def run_in_process(job_type: str, payload: Dict) -> Optional[Dict]:
+    """在worker进程中执行CPU密集的任务（目前为render）"""
+    global _process_jobs
+    if _process_jobs is None:
+        from config import Config
+        from report_generator import ReportGenerator
+        config = Config()
+        _process_jobs = ReportJobs(config, report_generator=ReportGenerator(config))
+    return _process_jobs.handlers()[job_type](payload)
+
+
+def create_worker_pool(config, jobs: ReportJobs) -> WorkerPool:
+    """按jobs配置创建报告任务的worker池"""
+    jobs_config = getattr(config, 'jobs_config', {})
+    return WorkerPool(
+        jobs.queue,
+        jobs.handlers(),
+        threads=jobs_config.get('threads', 4),
+        processes=jobs_config.get('processes', 0),
+        process_handler=run_in_process,
+        process_job_types=jobs_config.get('process_job_types', ['render']),
+        on_failure=jobs.report_failure if jobs_config.get('notify_failures', True) else None,
+    )
+
+
+def create_job_queue(config, node_id: Optional[str] = None) -> JobQueue:
+    """按jobs配置打开任务队列，分片模式下传入本节点id"""
+    jobs_config = getattr(config, 'jobs_config', {})
+    return JobQueue(
+        jobs_config.get('path', os.path.join(config.cache_dir, 'jobs.db')),
+        backoff_base=jobs_config.get('backoff_base', 2.0),
+        backoff_max=jobs_config.get('backoff_max', 300.0),
+        node_id=node_id,
+    )
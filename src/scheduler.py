@@ -1,21 +1,223 @@
-import time
+import heapq
+import itertools
+import random
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from checkpoint_store import CheckpointStore
+
+
+class PollResult(NamedTuple):
+    """一次仓库轮询的结果"""
+    repo: str
+    activity: int
+    interval: float
+    error: Optional[str]
+
 
 class Scheduler:
-    def __init__(self, github_client, notifier, report_generator, subscription_manager, interval):
+    """基于优先队列的仓库轮询调度器
+
+    每个仓库有自己的下次到期时间，保存在按到期时间排序的堆中。
+    有新动态的仓库缩短轮询间隔，安静的仓库逐步拉长，间隔限制在[min_interval, max_interval]内，
+    并加入随机抖动避免请求集中。多个到期的仓库在线程池中并发执行。
+    时钟可以注入，测试时可以不依赖真实时间逐步驱动调度。
+    """
+
+    def __init__(self, github_client, notifier, report_generator, subscription_manager, interval,
+                 scheduler_config: Optional[Dict] = None, clock: Callable[[], float] = time.time,
+                 rng: Optional[random.Random] = None, checkpoints: Optional[CheckpointStore] = None,
+                 jobs=None):
+        """初始化调度器
+
+        Args:
+            github_client: GitHub客户端
+            notifier: 通知器
+            report_generator: 报告生成器
+            subscription_manager: 订阅管理器
+            interval: 仓库的初始轮询间隔（秒）
+            scheduler_config: 可选，scheduler配置段
+            clock: 可选，返回当前epoch秒数的时钟
+            rng: 可选，用于抖动的随机数生成器
+            checkpoints: 可选，检查点存储，默认使用配置中的checkpoint_file
+            jobs: 可选，ReportJobs实例；提供时报告生成和通知提交到任务队列执行
+        """
         self.github_client = github_client
         self.notifier = notifier
         self.report_generator = report_generator
         self.subscription_manager = subscription_manager
         self.interval = interval
-    
+        self.jobs = jobs
+
+        scheduler_config = scheduler_config or {}
+        self.min_interval = scheduler_config.get('min_interval', min(interval, 15 * 60))
+        self.max_interval = scheduler_config.get('max_interval', max(interval, 24 * 60 * 60))
+        self.speedup = scheduler_config.get('speedup', 0.5)
+        self.slowdown = scheduler_config.get('slowdown', 1.5)
+        self.jitter = scheduler_config.get('jitter', 0.1)
+        self.max_workers = max(1, scheduler_config.get('max_workers', 4))
+        self.checkpoints = checkpoints or CheckpointStore(
+            scheduler_config.get('checkpoint_file', '.cache/checkpoints.json')
+        )
+
+        self.clock = clock
+        self.rng = rng or random.Random()
+        # 堆中为(到期时间, 序号, 仓库)，仓库被取消订阅或重新排期后旧条目惰性丢弃
+        self._heap: List = []
+        self._counter = itertools.count()
+        self._intervals: Dict[str, float] = {}
+        self._due: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # 订阅变化时唤醒调度循环，无需等到下一个任务到期
+        self._wakeup = threading.Event()
+        if hasattr(subscription_manager, 'add_listener'):
+            subscription_manager.add_listener(lambda added, removed: self._wakeup.set())
+
+    def _push(self, repo: str, due: float):
+        self._due[repo] = due
+        heapq.heappush(self._heap, (due, next(self._counter), repo))
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + self.rng.uniform(-self.jitter, self.jitter))
+
+    def sync_subscriptions(self):
+        """同步订阅列表：新仓库在[现在, 现在 + jitter × 初始间隔]内随机错开到期，取消订阅的仓库不再调度"""
+        subscriptions = set(self.subscription_manager.get_subscriptions())
+        now = self.clock()
+        with self._lock:
+            for repo in sorted(subscriptions - set(self._due)):
+                interval = self._initial_interval(repo)
+                self._intervals[repo] = interval
+                self._push(repo, now + self.rng.uniform(0, self.jitter * interval))
+            for repo in set(self._due) - subscriptions:
+                del self._due[repo]
+                del self._intervals[repo]
+                # 分片模式下仓库可能只是迁移到了其他节点，接管的节点仍需要它的检查点
+                if not self._still_subscribed(repo):
+                    self.checkpoints.remove(repo)
+
+    def _still_subscribed(self, repo: str) -> bool:
+        """不在本节点的调度列表中的仓库是否仍被订阅"""
+        if hasattr(self.subscription_manager, 'has_subscription'):
+            return self.subscription_manager.has_subscription(repo)
+        return False
+
+    def _initial_interval(self, repo: str) -> float:
+        """仓库的初始轮询间隔，订阅元数据中设置了interval时优先使用"""
+        if hasattr(self.subscription_manager, 'get_metadata'):
+            interval = self.subscription_manager.get_metadata(repo).get('interval')
+            if interval:
+                return min(max(interval, self.min_interval), self.max_interval)
+        return self.interval
+
+    def _pop_due(self, now: float) -> List[str]:
+        """取出所有已到期的仓库"""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due_at, _, repo = heapq.heappop(self._heap)
+                if self._due.get(repo) == due_at:
+                    due.append(repo)
+        return due
+
+    def next_due(self) -> Optional[float]:
+        """最早的到期时间，没有任务时为None"""
+        with self._lock:
+            while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def run_pending(self) -> List[PollResult]:
+        """并发执行所有到期的仓库，并按观察到的活跃度重新排期"""
+        self.sync_subscriptions()
+        repos = self._pop_due(self.clock())
+        if not repos:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(repos)),
+                                thread_name_prefix='scheduler') as executor:
+            outcomes = list(executor.map(self._run_job, repos))
+
+        results = []
+        now = self.clock()
+        with self._lock:
+            for repo, (activity, error) in zip(repos, outcomes):
+                if repo not in self._intervals:
+                    continue  # 执行期间被取消订阅
+                interval = self._intervals[repo]
+                if error is None:
+                    factor = self.speedup if activity else self.slowdown
+                    interval = min(max(interval * factor, self.min_interval), self.max_interval)
+                    self._intervals[repo] = interval
+                self._push(repo, now + self._jittered(interval))
+                results.append(PollResult(repo, activity, interval, error))
+        return results
+
+    def _run_job(self, repo: str):
+        """执行单个仓库的任务，返回(活跃度, 错误)"""
+        try:
+            return self.poll(repo), None
+        except Exception as e:
+            print(f"Error polling {repo}: {str(e)}")
+            return 0, str(e)
+
+    def poll(self, repo: str) -> int:
+        """获取仓库自检查点以来的更新，有新动态时发送通知，返回新条目数
+        
+        只获取(检查点, 现在]的窗口；首次运行时窗口为最近一个轮询间隔。
+        所有接口都成功后才推进检查点，失败的窗口会在下次轮询时重新获取。
+        """
+        until = datetime.fromtimestamp(self.clock(), timezone.utc).replace(tzinfo=None, microsecond=0)
+        since = self.checkpoints.get(repo)
+        if since is None:
+            since = until - timedelta(seconds=self._intervals.get(repo, self.interval))
+        
+        updates = self.github_client.fetch_updates([repo], since=since, until=until)
+        data = updates[repo]
+        errors = data.get('errors')
+        if errors:
+            raise RuntimeError(f"failed to fetch {', '.join(errors)}")
+        
+        # 没有新动态的仓库不生成报告也不通知
+        activity = self._activity(data)
+        if activity and self.jobs:
+            # 任务持久化后即可推进检查点，生成和通知由worker完成
+            self.jobs.submit_report(repo, since, until, summarize=False, notify=True, updates=updates)
+        elif activity:
+            report = self.report_generator.generate(updates)
+            self.notifier.notify(report)
+        self.checkpoints.set(repo, until)
+        return activity
+
+    @staticmethod
+    def _activity(data: Dict) -> int:
+        """统计仓库更新中的条目数"""
+        count = 1 if data.get('releases') else 0
+        for endpoint in ('commits', 'issues', 'pull_requests'):
+            count += len(data.get(endpoint) or [])
+        return count
+
     def start(self):
-        while True:
-            self.run()
-            time.sleep(self.interval)
-    
+        """持续调度直到stop被调用"""
+        self._stop.clear()
+        while not self._stop.is_set():
+            self.run_pending()
+            due = self.next_due()
+            # 没有订阅时定期检查订阅列表的变化
+            wait = self.min_interval if due is None else due - self.clock()
+            self._wakeup.wait(timeout=min(max(wait, 0), self.min_interval))
+            self._wakeup.clear()
+
+    def stop(self):
+        """停止调度循环"""
+        self._stop.set()
+        self._wakeup.set()
+
     def run(self):
-        subscriptions = self.subscription_manager.get_subscriptions()
-        updates = self.github_client.fetch_updates(subscriptions)
-        report = self.report_generator.generate(updates)
-        self.notifier.notify(report)
+        """立即轮询所有订阅仓库一次"""
+        for repo in self.subscription_manager.get_subscriptions():
+            self._run_job(repo)
@@ -0,0 +1,277 @@
+import os
+import re
+import sqlite3
+import threading
+from typing import Callable, Iterable, List, NamedTuple, Optional
+
+# 中日韩字符范围：连续的中日韩字符按二元组（bigram）切分，其余文字按单词切分
+CJK_RANGES = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+TOKEN_PATTERN = re.compile(rf'(?P<cjk>[{CJK_RANGES}]+)|(?P<word>[^\W{CJK_RANGES}]+)')
+
+# 摘要片段的最大长度
+SNIPPET_LENGTH = 160
+
+# 索引表结构版本，版本变化时清空旧索引，由导出目录重新补齐
+SCHEMA_VERSION = 2
+
+
+def read_file(path: str) -> Optional[str]:
+    """读取导出文件，文件不存在时返回None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def tokenize(text: str) -> List[str]:
+    """把文本切分为索引词
+
+    英文、数字等按单词切分并转为小写；连续的中日韩字符切分为重叠的二元组，
+    单个字符单独成词。例如"工作流重试"切分为["工作", "作流", "流重", "重试"]。
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        run = match.group('cjk')
+        if run is None:
+            tokens.append(match.group('word'))
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class SearchHit(NamedTuple):
+    path: str
+    filename: str
+    repo: Optional[str]
+    since: Optional[str]
+    until: Optional[str]
+    kind: str
+    score: float
+    snippet: str
+
+
+class SearchIndex:
+    """导出报告的全文检索索引
+
+    基于SQLite FTS5的倒排索引。文本在写入前按tokenize预先切分，
+    中文摘要也能按词命中；查询按BM25排序，标题（仓库和文件名）权重高于正文。
+    FTS5表使用外部内容（documents表），索引中只保存一份切分后的文本，不保存报告原文；
+    结果的摘要片段通过reader读取原文生成，已转入压缩存储的报告同样可以读取。
+    文件大小和修改时间未变化时跳过重复索引，报告写入时增量更新。
+    """
+
+    def __init__(self, path: str, reader: Optional[Callable[[str], Optional[str]]] = None):
+        """初始化检索索引
+
+        Args:
+            path: SQLite数据库文件路径
+            reader: 可选，按路径读取报告原文的函数，报告不存在时返回None；默认直接读取文件
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.reader = reader or read_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS documents_fts")
+                self._conn.execute("DROP TABLE IF EXISTS documents")
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            # title和body为切分后的文本，只用于建立索引
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT UNIQUE NOT NULL,
+                    filename TEXT NOT NULL,
+                    repo TEXT,
+                    since TEXT,
+                    until TEXT,
+                    kind TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    title TEXT NOT NULL,
+                    body TEXT NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5("
+                "title, body, content='documents', content_rowid='id', tokenize='unicode61')"
+            )
+
+    @classmethod
+    def for_config(cls, config, reader: Optional[Callable[[str], Optional[str]]] = None) -> 'SearchIndex':
+        """按配置打开检索索引"""
+        exports_config = getattr(config, 'exports_config', {})
+        return cls(exports_config.get('search_index_path', os.path.join(config.cache_dir, 'search_index.db')),
+                   reader)
+
+    def _delete(self, doc_id: int):
+        """删除文档及其索引，调用方需持有锁并处于事务中"""
+        # 外部内容表需要用原来的文本删除索引项
+        self._conn.execute(
+            "INSERT INTO documents_fts (documents_fts, rowid, title, body) "
+            "SELECT 'delete', id, title, body FROM documents WHERE id = ?", (doc_id,)
+        )
+        self._conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+    def add(self, path: str, repo: Optional[str] = None, since: Optional[str] = None,
+            until: Optional[str] = None, kind: str = 'raw', text: Optional[str] = None,
+            size: Optional[int] = None, mtime: Optional[float] = None) -> bool:
+        """索引一个导出文件，内容未变化时跳过
+
+        Args:
+            path: 文件路径
+            repo: 可选，仓库名称
+            since: 可选，开始日期（YYYY-MM-DD）
+            until: 可选，结束日期（YYYY-MM-DD）
+            kind: raw或summary
+            text: 可选，文件内容，未提供时通过reader读取
+            size: 可选，文件大小，与mtime一起判断内容是否变化，未提供时读取文件状态
+            mtime: 可选，文件修改时间
+
+        Returns:
+            bool: 是否更新了索引；报告已不存在时返回False
+        """
+        path = os.path.abspath(path)
+        if size is None or mtime is None:
+            st = os.stat(path)
+            size, mtime = st.st_size, st.st_mtime
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime FROM documents WHERE path = ?", (path,)).fetchone()
+        if row == (size, mtime):
+            return False
+
+        if text is None:
+            text = self.reader(path)
+            if text is None:
+                return False
+        filename = os.path.basename(path)
+        title = ' '.join(tokenize(f"{repo or ''} {filename}"))
+        body = ' '.join(tokenize(text))
+        with self._lock, self._conn:
+            old = self._conn.execute("SELECT id FROM documents WHERE path = ?", (path,)).fetchone()
+            if old:
+                self._delete(old[0])
+            cursor = self._conn.execute(
+                "INSERT INTO documents (path, filename, repo, since, until, kind, size, mtime, title, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, filename, repo, since, until, kind, size, mtime, title, body)
+            )
+            self._conn.execute(
+                "INSERT INTO documents_fts (rowid, title, body) VALUES (?, ?, ?)",
+                (cursor.lastrowid, title, body)
+            )
+        return True
+
+    def remove(self, path: str):
+        with self._lock, self._conn:
+            old = self._conn.execute("SELECT id FROM documents WHERE path = ?", (os.path.abspath(path),)).fetchone()
+            if old:
+                self._delete(old[0])
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    @staticmethod
+    def _match_expression(query: str) -> Optional[str]:
+        """把用户输入转为FTS5查询：所有词都需命中"""
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        return ' AND '.join(f'"{token}"' for token in dict.fromkeys(tokens))
+
+    @staticmethod
+    def _snippet(body: str, query: str) -> str:
+        """返回正文中第一处包含查询词的行作为摘要片段"""
+        terms = [match.group(0) for match in TOKEN_PATTERN.finditer(query.lower())]
+        for line in body.splitlines():
+            lowered = line.lower()
+            if any(term in lowered for term in terms):
+                line = line.strip()
+                return line if len(line) <= SNIPPET_LENGTH else line[:SNIPPET_LENGTH] + '...'
+        # 只命中标题时返回正文的第一行
+        first = next((line.strip() for line in body.splitlines() if line.strip()), '')
+        return first if len(first) <= SNIPPET_LENGTH else first[:SNIPPET_LENGTH] + '...'
+
+    def search(self, query: str, repo: Optional[str] = None, kind: Optional[str] = None,
+               date_from: Optional[str] = None, date_to: Optional[str] = None,
+               limit: int = 20, offset: int = 0) -> List[SearchHit]:
+        """全文检索，按相关度排序
+
+        Args:
+            query: 查询文本，中英文均可，多个词之间为AND关系
+            repo: 可选，按仓库过滤
+            kind: 可选，raw或summary
+            date_from: 可选，报告结束日期不早于该日期（YYYY-MM-DD）
+            date_to: 可选，报告开始日期不晚于该日期（YYYY-MM-DD）
+            limit: 返回的条数
+            offset: 跳过的条数
+
+        Returns:
+            List[SearchHit]: 命中的报告
+        """
+        expression = self._match_expression(query)
+        if expression is None:
+            return []
+        conditions, params = ["documents_fts MATCH ?"], [expression]
+        if repo:
+            conditions.append("d.repo = ?")
+            params.append(repo)
+        if kind:
+            conditions.append("d.kind = ?")
+            params.append(kind)
+        if date_from:
+            conditions.append("COALESCE(d.until, d.since) >= ?")
+            params.append(date_from)
+        if date_to:
+            conditions.append("d.since <= ?")
+            params.append(date_to)
+        # 先在子查询中只按rowid和分数排序取前N条，再关联文档信息；
+        # 没有过滤条件时子查询不关联documents表
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.path, d.filename, d.repo, d.since, d.until, d.kind, ranked.score FROM ("
+                "SELECT documents_fts.rowid AS id, bm25(documents_fts, 2.0, 1.0) AS score "
+                f"FROM documents_fts {'JOIN documents d ON d.id = documents_fts.rowid' if len(conditions) > 1 else ''} "
+                f"WHERE {' AND '.join(conditions)} ORDER BY score LIMIT ? OFFSET ?"
+                ") AS ranked JOIN documents d ON d.id = ranked.id ORDER BY ranked.score",
+                params + [limit, offset]
+            ).fetchall()
+        # bm25越小越相关，取负数使分数越大越相关；只为当前页的结果读取原文生成摘要片段
+        return [SearchHit(*row[:6], -row[6], self._snippet(self._read(row[0]), query)) for row in rows]
+
+    def _read(self, path: str) -> str:
+        """读取报告原文用于摘要片段，读取失败时返回空字符串"""
+        try:
+            return self.reader(path) or ''
+        except Exception as e:
+            print(f"Error reading {path}: {str(e)}")
+            return ''
+
+    def sync(self, entries: Iterable[dict]) -> int:
+        """按导出目录的条目补齐索引，删除已不在目录中的报告，返回新索引的文件数
+
+        条目中的大小和修改时间来自导出目录，已转入压缩存储的报告通过reader读取，不再访问导出文件。
+        """
+        indexed = 0
+        paths = set()
+        for entry in entries:
+            paths.add(os.path.abspath(entry['path']))
+            try:
+                if self.add(entry['path'], entry.get('repo'), entry.get('since'), entry.get('until'),
+                            entry.get('kind', 'raw'), size=entry['size'], mtime=entry['mtime']):
+                    indexed += 1
+            except Exception as e:
+                print(f"Error indexing {entry['path']}: {str(e)}")
+        with self._lock:
+            stale = [row[0] for row in self._conn.execute("SELECT path FROM documents")
+                     if row[0] not in paths]
+        for path in stale:
+            self.remove(path)
+        return indexed
@@ -0,0 +1,184 @@
+import bisect
+import hashlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    """一致性哈希环
+
+    每个节点在环上放置vnodes个虚拟节点，键归属于顺时针方向的第一个虚拟节点。
+    节点加入或离开时只有约1/N的键需要迁移。
+    """
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = 64):
+        self.nodes = sorted(set(nodes))
+        self._ring = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._points = [point for point, _ in self._ring]
+
+    def node_for(self, key: str) -> Optional[str]:
+        """返回负责该键的节点，环为空时返回None"""
+        if not self._ring:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+
+class LeaseTable:
+    """基于SQLite的节点成员租约表
+
+    每个节点定期续约，租约过期的节点视为已离开，它负责的仓库由其余节点接管。
+    同一台机器上的多个实例共享同一个数据库文件。
+    """
+
+    def __init__(self, path: str, node_id: str, ttl: float = 60, clock: Callable[[], float] = time.time):
+        """初始化租约表
+
+        Args:
+            path: SQLite数据库文件路径
+            node_id: 本节点的唯一标识
+            ttl: 租约有效期（秒）
+            clock: 可选，返回当前epoch秒数的时钟
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.node_id = node_id
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    node_id TEXT PRIMARY KEY,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    def heartbeat(self):
+        """续约本节点的租约"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO leases (node_id, expires_at) VALUES (?, ?)",
+                (self.node_id, self.clock() + self.ttl)
+            )
+
+    def live_nodes(self) -> List[str]:
+        """租约未过期的节点"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT node_id FROM leases WHERE expires_at > ? ORDER BY node_id", (self.clock(),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def release(self):
+        """主动释放本节点的租约，其他节点立即接管"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM leases WHERE node_id = ?", (self.node_id,))
+
+
+def default_node_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ShardedSubscriptions:
+    """只返回本节点负责的订阅的SubscriptionManager包装
+
+    按owner/repo在存活节点组成的一致性哈希环上分片。每次读取时按需续约，
+    存活节点变化后重建哈希环，可直接替代SubscriptionManager传给Scheduler。
+    """
+
+    def __init__(self, subscription_manager, lease_table: LeaseTable, vnodes: int = 64):
+        """初始化分片订阅
+
+        Args:
+            subscription_manager: 完整的订阅管理器
+            lease_table: 节点租约表
+            vnodes: 每个节点的虚拟节点数
+        """
+        self.subscription_manager = subscription_manager
+        self.lease_table = lease_table
+        self.vnodes = vnodes
+        self._ring: Optional[HashRing] = None
+        self._last_heartbeat = float('-inf')
+        self._lock = threading.Lock()
+        self._listeners: List[Callable] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def node_id(self) -> str:
+        return self.lease_table.node_id
+
+    def _current_ring(self) -> HashRing:
+        changed = False
+        with self._lock:
+            # 在租约的三分之一有效期内续约，留出时间应对短暂的延迟
+            now = self.lease_table.clock()
+            if now - self._last_heartbeat >= self.lease_table.ttl / 3:
+                self.lease_table.heartbeat()
+                self._last_heartbeat = now
+            nodes = self.lease_table.live_nodes()
+            if self._ring is None or self._ring.nodes != sorted(set(nodes)):
+                changed = self._ring is not None
+                if changed:
+                    print(f"Shard membership changed: {', '.join(nodes)}")
+                self._ring = HashRing(nodes, self.vnodes)
+            ring = self._ring
+        if changed:
+            # 成员变化后本节点负责的仓库可能变化，通知调度器重新同步
+            for callback in list(self._listeners):
+                callback(set(), set())
+        return ring
+
+    def start(self):
+        """启动后台续约线程，调度器长时间休眠时租约也不会过期"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def renew():
+            while not self._stop.wait(self.lease_table.ttl / 3):
+                try:
+                    self._current_ring()
+                except Exception as e:
+                    print(f"Error renewing shard lease: {str(e)}")
+
+        self._current_ring()
+        self._thread = threading.Thread(target=renew, name='shard-lease', daemon=True)
+        self._thread.start()
+
+    def owns(self, repo: str) -> bool:
+        return self._current_ring().node_for(repo) == self.node_id
+
+    def get_subscriptions(self) -> List[str]:
+        """本节点负责的订阅"""
+        ring = self._current_ring()
+        return [repo for repo in self.subscription_manager.get_subscriptions()
+                if ring.node_for(repo) == self.node_id]
+
+    def has_subscription(self, repo: str) -> bool:
+        """仓库是否仍被订阅（不论由哪个节点负责）"""
+        return self.subscription_manager.has_subscription(repo)
+
+    def get_metadata(self, repo: str) -> Dict:
+        return self.subscription_manager.get_metadata(repo)
+
+    def add_listener(self, callback):
+        """注册监听者，订阅变化和分片成员变化时都会调用"""
+        self._listeners.append(callback)
+        self.subscription_manager.add_listener(callback)
+
+    def release(self):
+        """停止续约并释放租约"""
+        self._stop.set()
+        self._thread = None
+        self.lease_table.release()
@@ -1,27 +1,229 @@
 import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from utils import atomic_write
+
+try:
+    import fcntl
+except ImportError:  # Windows上没有fcntl，退化为只有进程内加锁
+    fcntl = None
+
+# 支持的仓库元数据字段：interval为该仓库的初始轮询间隔（秒），由Scheduler读取；
+# 上次同步时间由检查点存储记录，不保存在订阅文件中
+METADATA_FIELDS = ('interval',)
+
 
 class SubscriptionManager:
-    def __init__(self, subscriptions_file):
+    """订阅仓库管理
+
+    订阅在内存中以有序字典保存（仓库 -> 元数据），查找和增删为O(1)。
+    文件写入使用临时文件加重命名的原子替换，修改时持有文件锁，
+    并先合并其他进程（例如Gradio服务和CLI）写入的变化，避免相互覆盖。
+    文件被外部修改后，下一次读取或后台监视会重新加载并通知监听者，无需重启。
+    兼容旧格式：文件内容为仓库名列表时按无元数据的订阅读取，
+    第一次修改订阅时改写为 {"subscriptions": {仓库: 元数据}} 格式。
+    """
+
+    def __init__(self, subscriptions_file: str):
         self.subscriptions_file = subscriptions_file
-        self.subscriptions = self.load_subscriptions()
-    
-    def load_subscriptions(self):
-        with open(self.subscriptions_file, 'r') as f:
-            return json.load(f)
-    
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[Set[str], Set[str]], None]] = []
+        self._stat = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        self.subscriptions: Dict[str, Dict] = self.load_subscriptions()
+
+    def _file_stat(self):
+        try:
+            st = os.stat(self.subscriptions_file)
+            return st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return None
+
+    def load_subscriptions(self) -> Dict[str, Dict]:
+        """从文件读取订阅"""
+        self._stat = self._file_stat()
+        if self._stat is None:
+            return {}
+        with open(self.subscriptions_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            return {repo: {} for repo in data}
+        return {repo: dict(metadata or {}) for repo, metadata in data.get('subscriptions', {}).items()}
+
     def save_subscriptions(self):
-        with open(self.subscriptions_file, 'w') as f:
-            json.dump(self.subscriptions, f, indent=4)
-    
-    def get_subscriptions(self):
-        return self.subscriptions
-    
-    def add_subscription(self, repo):
-        if repo not in self.subscriptions:
-            self.subscriptions.append(repo)
-            self.save_subscriptions()
-    
-    def remove_subscription(self, repo):
-        if repo in self.subscriptions:
-            self.subscriptions.remove(repo)
+        """原子写入订阅文件"""
+        with atomic_write(self.subscriptions_file) as f:
+            json.dump({'subscriptions': self.subscriptions}, f, indent=4, ensure_ascii=False)
+        self._stat = self._file_stat()
+
+    @contextmanager
+    def _file_lock(self):
+        """跨进程的排他文件锁"""
+        if fcntl is None:
+            yield
+            return
+        lock_path = f"{self.subscriptions_file}.lock"
+        os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _modify(self):
+        """加锁、合并外部修改、执行修改、写回文件并通知监听者"""
+        with self._lock, self._file_lock():
+            # 持有文件锁时总是重新读取：粗粒度的mtime可能让另一进程刚写入的同样大小的文件看起来没有变化
+            before = set(self._reload_if_changed(notify=True, force=True))
+            yield
             self.save_subscriptions()
+            after = set(self.subscriptions)
+        self._notify(after - before, before - after)
+
+    def _reload_if_changed(self, notify: bool, force: bool = False) -> Dict[str, Dict]:
+        """文件被其他进程修改过（或force为True）时重新加载；调用时需持有self._lock"""
+        if force or self._file_stat() != self._stat:
+            before = set(self.subscriptions)
+            self.subscriptions = self.load_subscriptions()
+            after = set(self.subscriptions)
+            if notify and before != after:
+                self._notify(after - before, before - after)
+        return self.subscriptions
+
+    def refresh(self) -> bool:
+        """检查文件是否被外部修改并重新加载，返回是否有变化"""
+        with self._lock:
+            changed = self._file_stat() != self._stat
+            self._reload_if_changed(notify=True)
+        return changed
+
+    def add_listener(self, callback: Callable[[Set[str], Set[str]], None]):
+        """注册订阅变化的监听者，回调参数为(新增的仓库, 删除的仓库)"""
+        self._listeners.append(callback)
+
+    def _notify(self, added: Set[str], removed: Set[str]):
+        if not added and not removed:
+            return
+        for callback in list(self._listeners):
+            try:
+                callback(added, removed)
+            except Exception as e:
+                print(f"Error in subscription listener: {str(e)}")
+
+    def start_watching(self, interval: float = 5.0):
+        """启动后台线程定期检查文件变化，及时通知监听者"""
+        if self._watcher is not None:
+            return
+        self._stop_watching.clear()
+
+        def watch():
+            while not self._stop_watching.wait(interval):
+                self.refresh()
+
+        self._watcher = threading.Thread(target=watch, name='subscription-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_watching.set()
+        self._watcher = None
+
+    def get_subscriptions(self) -> List[str]:
+        """获取订阅列表，文件被外部修改时先重新加载"""
+        with self._lock:
+            return list(self._reload_if_changed(notify=True))
+
+    def has_subscription(self, repo: str) -> bool:
+        with self._lock:
+            return repo in self._reload_if_changed(notify=True)
+
+    def add_subscription(self, repo: str, **metadata):
+        """添加订阅，已存在时只更新提供的元数据"""
+        self.add_subscriptions([repo], **metadata)
+
+    def remove_subscription(self, repo: str):
+        self.remove_subscriptions([repo])
+
+    def add_subscriptions(self, repos: Iterable[str], **metadata):
+        """批量添加订阅，只写一次文件"""
+        self._check_metadata(metadata)
+        with self._modify():
+            for repo in repos:
+                self.subscriptions.setdefault(repo, {}).update(metadata)
+
+    def remove_subscriptions(self, repos: Iterable[str]):
+        """批量删除订阅，只写一次文件"""
+        with self._modify():
+            for repo in repos:
+                self.subscriptions.pop(repo, None)
+
+    @staticmethod
+    def _check_metadata(metadata: Dict):
+        unknown = set(metadata) - set(METADATA_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown subscription metadata: {', '.join(sorted(unknown))}")
+
+    def get_metadata(self, repo: str) -> Dict:
+        """获取仓库的元数据（目前只有interval），未订阅时返回空字典"""
+        with self._lock:
+            return dict(self._reload_if_changed(notify=True).get(repo, {}))
+
+    def update_metadata(self, repo: str, **metadata):
+        """更新已订阅仓库的元数据，值为None时删除该字段"""
+        self._check_metadata(metadata)
+        with self._modify():
+            if repo not in self.subscriptions:
+                raise KeyError(f"Not subscribed: {repo}")
+            for key, value in metadata.items():
+                if value is None:
+                    self.subscriptions[repo].pop(key, None)
+                else:
+                    self.subscriptions[repo][key] = value
+
+    def import_subscriptions(self, path: str, replace: bool = False) -> int:
+        """从文件批量导入订阅，返回新增的仓库数
+
+        文件可以是export_subscriptions导出的JSON、仓库名列表的JSON，
+        或每行一个仓库名的文本（忽略空行和#开头的行）。
+
+        Args:
+            path: 导入文件路径
+            replace: 是否用导入内容替换现有订阅
+
+        Raises:
+            ValueError: 导入的元数据包含不支持的字段
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = [line.strip() for line in text.splitlines()
+                    if line.strip() and not line.strip().startswith('#')]
+        if isinstance(data, list):
+            imported = {repo: {} for repo in data}
+        else:
+            imported = {repo: dict(metadata or {}) for repo, metadata in data.get('subscriptions', {}).items()}
+        for metadata in imported.values():
+            self._check_metadata(metadata)
+
+        with self._modify():
+            before = set(self.subscriptions)
+            if replace:
+                self.subscriptions = {}
+            for repo, metadata in imported.items():
+                self.subscriptions.setdefault(repo, {}).update(metadata)
+            added = len(set(self.subscriptions) - before)
+        return added
+
+    def export_subscriptions(self, path: str):
+        """把订阅和元数据导出为JSON文件"""
+        with self._lock:
+            data = {'subscriptions': dict(self._reload_if_changed(notify=True))}
+        with atomic_write(path) as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
@@ -0,0 +1,109 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class RateLimitExhausted(Exception):
+    """所有token的速率限制额度均已用尽，且等待时间超过上限"""
+
+    def __init__(self, message: str, reset_at: float):
+        super().__init__(message)
+        self.reset_at = reset_at
+
+
+class TokenPool:
+    """多个GitHub token的速率限制额度调度器
+
+    按token和资源类型（core、graphql等）记录剩余额度和重置时间，
+    每次请求分配给剩余额度最多的token。只有所有token都耗尽时调用方才会等待，
+    等待基于条件变量，不会阻塞其他线程；等待时间超过上限时抛出RateLimitExhausted。
+    """
+
+    def __init__(self, tokens: List[str], max_wait: Optional[float] = None,
+                 clock: Callable[[], float] = time.time):
+        """初始化token池
+
+        Args:
+            tokens: token列表，忽略其中的空值，至少需要一个有效token
+            max_wait: 可选，所有token耗尽时最长等待秒数，None表示一直等到重置
+            clock: 可选，返回当前epoch秒数的时钟，便于测试注入
+        """
+        # 去掉空值，去重并保持顺序
+        self.tokens = list(dict.fromkeys(token for token in tokens if token))
+        if not self.tokens:
+            raise ValueError("TokenPool requires at least one token")
+        self.max_wait = max_wait
+        self.clock = clock
+        # (token, resource) -> [remaining, reset_at]，remaining为None表示未知
+        self._budgets: Dict[Tuple[str, str], List] = {}
+        self._cond = threading.Condition()
+
+    def _budget(self, token: str, resource: str) -> List:
+        budget = self._budgets.setdefault((token, resource), [None, 0.0])
+        # 已过重置时间的额度视为恢复
+        if budget[0] is not None and budget[1] <= self.clock():
+            budget[0] = None
+        return budget
+
+    def acquire(self, resource: str = 'core') -> str:
+        """获取剩余额度最多的token
+
+        Args:
+            resource: 速率限制资源类型
+
+        Raises:
+            RateLimitExhausted: 所有token都已耗尽且需要等待的时间超过max_wait
+        """
+        deadline = None
+        with self._cond:
+            while True:
+                best, best_remaining = None, -1
+                for token in self.tokens:
+                    remaining = self._budget(token, resource)[0]
+                    # 未知额度的token视为满额
+                    headroom = float('inf') if remaining is None else remaining
+                    if headroom > best_remaining:
+                        best, best_remaining = token, headroom
+
+                if best_remaining > 0:
+                    budget = self._budget(best, resource)
+                    if budget[0] is not None:
+                        budget[0] -= 1  # 预扣额度，让并发请求分散到不同token
+                    return best
+
+                now = self.clock()
+                reset_at = min(self._budget(token, resource)[1] for token in self.tokens)
+                if deadline is None:
+                    deadline = now + self.max_wait if self.max_wait is not None else float('inf')
+                if reset_at > deadline:
+                    raise RateLimitExhausted(
+                        f"All {len(self.tokens)} GitHub tokens exhausted for '{resource}', "
+                        f"next reset in {reset_at - now:.0f} seconds",
+                        reset_at
+                    )
+                print(f"Rate limit exhausted for all tokens. Waiting {reset_at - now:.0f} seconds...")
+                self._cond.wait(timeout=max(reset_at - now, 0.01))
+
+    def update(self, token: str, headers) -> None:
+        """根据响应头更新token的额度"""
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None:
+            return
+        resource = headers.get('X-RateLimit-Resource', 'core')
+        with self._cond:
+            self._budgets[(token, resource)] = [int(remaining), float(reset)]
+            self._cond.notify_all()
+
+    def get_status(self) -> List[Dict]:
+        """获取各token的额度状态，token只显示末四位，过短的token完全隐藏"""
+        with self._cond:
+            return [
+                {
+                    'token': f"...{token[-4:]}" if len(token) > 8 else '...',
+                    'resource': resource,
+                    'remaining': budget[0],
+                    'reset': budget[1],
+                }
+                for (token, resource), budget in self._budgets.items()
+            ]
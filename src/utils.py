@@ -1 +1,39 @@
-# Add utility functions as needed
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, TextIO
+
+# 中日韩文字、全角标点等，每个字符大约对应一个token
+CJK_PATTERN = re.compile(r'[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]')
+
+
+def estimate_tokens(text: str) -> int:
+    """在本地粗略估算文本的token数，无需网络或分词器
+
+    中日韩字符按每字一个token计算，其余字符按每4个字符一个token计算，结果偏保守。
+    """
+    if not text:
+        return 0
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+@contextmanager
+def atomic_write(path: str, encoding: str = 'utf-8', binary: bool = False) -> Iterator[TextIO]:
+    """原子写入文件，binary为True时以二进制模式写入
+
+    先写入同目录下的临时文件，全部写完后再替换目标文件；
+    写入过程中出错时删除临时文件，目标文件保持不变。
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with (os.fdopen(fd, 'wb') if binary else os.fdopen(fd, 'w', encoding=encoding)) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
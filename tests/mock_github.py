@@ -0,0 +1,96 @@
+import json
+import re
+from typing import Dict, List, Optional
+
+import httpx
+
+from models import parse_github_time
+
+ALIAS_PATTERN = re.compile(r'(r(\d+)(?:_(\w+))?): repository\(owner: \$o\d+, name: \$n\d+\)')
+CONNECTIONS = ('releases', 'commits', 'issues', 'pull_requests')
+
+
+class MockGraphQLEndpoint:
+    """离线测试用的GraphQL模拟端点
+
+    理解GraphQLBackend生成的批量查询：按别名解析仓库和连接，
+    按时间窗口过滤、按游标分页返回预置的节点数据，并记录收到的每个查询。
+
+    用法:
+        endpoint = MockGraphQLEndpoint({'owner/repo': {'issues': [...]}})
+        client = GitHubClient(config, transport=endpoint.transport())
+    """
+
+    def __init__(self, repositories: Dict[str, Dict[str, List[Dict]]]):
+        """初始化模拟端点
+
+        Args:
+            repositories: 仓库 -> 连接名称 -> GraphQL节点列表（按时间倒序）
+        """
+        self.repositories = repositories
+        self.queries: List[Dict] = []
+
+    def transport(self) -> httpx.MockTransport:
+        """返回可传给httpx.Client的传输层"""
+        return httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        """处理一个GraphQL请求"""
+        payload = json.loads(request.content)
+        self.queries.append(payload)
+        query, variables = payload['query'], payload.get('variables', {})
+
+        data, errors = {}, []
+        for alias, index, only in ALIAS_PATTERN.findall(query):
+            repo = f"{variables[f'o{index}']}/{variables[f'n{index}']}"
+            if repo not in self.repositories:
+                data[alias] = None
+                errors.append({
+                    'path': [alias],
+                    'message': f"Could not resolve to a Repository with the name '{repo}'.",
+                })
+                continue
+            connections = (only,) if only else CONNECTIONS
+            cursor = variables.get(f'a{index}') if only else None
+            data[alias] = self._repository(repo, connections, cursor, variables)
+
+        body = {'data': data}
+        if errors:
+            body['errors'] = errors
+        return httpx.Response(200, json=body, headers={
+            'X-RateLimit-Resource': 'graphql',
+            'X-RateLimit-Remaining': '4999',
+            'X-RateLimit-Reset': '0',
+        })
+
+    def _repository(self, repo: str, connections, cursor: Optional[str], variables: Dict) -> Dict:
+        fixtures = self.repositories[repo]
+        result = {}
+        for name in connections:
+            nodes = list(fixtures.get(name, []))
+            if name == 'commits':
+                nodes = self._filter(nodes, 'committedDate', variables.get('since'), variables.get('until'))
+            elif name == 'issues':
+                nodes = self._filter(nodes, 'updatedAt', variables.get('issuesSince'), None)
+
+            start = int(cursor) if cursor else 0
+            end = start + variables['first']
+            connection = {
+                'pageInfo': {'hasNextPage': end < len(nodes), 'endCursor': str(end)},
+                'nodes': nodes[start:end],
+            }
+            if name == 'commits':
+                result['defaultBranchRef'] = {'target': {'history': connection}}
+            elif name == 'pull_requests':
+                result['pullRequests'] = connection
+            else:
+                result[name] = connection
+        return result
+
+    @staticmethod
+    def _filter(nodes: List[Dict], field: str, since: Optional[str], until: Optional[str]) -> List[Dict]:
+        if since:
+            nodes = [n for n in nodes if parse_github_time(n[field]) >= parse_github_time(since)]
+        if until:
+            nodes = [n for n in nodes if parse_github_time(n[field]) <= parse_github_time(until)]
+        return nodes
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+import httpx
+from openai import RateLimitError
+from async_pipeline import AsyncDailyPipeline
+from models import Commit
+from report_generator import ReportGenerator
+from test_llm import make_llm
+
+
+def rate_limit_error(retry_after=None):
+    request = httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')
+    headers = {'Retry-After': retry_after} if retry_after else {}
+    return RateLimitError('rate limited', response=httpx.Response(429, headers=headers, request=request), body=None)
+
+
+class FakeAsyncCompletions:
+    """异步chat completions替身：记录最大并发数，可按顺序先抛出若干次429"""
+
+    def __init__(self, rate_limits=0, retry_after='0.01'):
+        self.rate_limits = rate_limits
+        self.retry_after = retry_after
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        if self.rate_limits:
+            self.rate_limits -= 1
+            raise rate_limit_error(self.retry_after)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.02)
+        finally:
+            self.active -= 1
+        repo = params['messages'][-1]['content'].split('\n## ')[1].split('\n')[0]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"摘要 {repo}"))])
+
+
+class FakeGitHubClient:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+
+    def fetch_updates(self, repos, since=None, until=None):
+        repo = repos[0]
+        if repo in self.failing:
+            raise RuntimeError('HTTP 502')
+        return {repo: {'releases': None, 'issues': [], 'pull_requests': [],
+                       'commits': [Commit(sha='abcdef1234', message=f'Change {repo}', author='dev')]}}
+
+
+def make_pipeline(github_client=None, **daily_config):
+    llm = make_llm()
+    config = llm.config
+    config.daily_config = daily_config
+    os.makedirs(config.exports_dir, exist_ok=True)
+    config.get_export_filepath = lambda repo=None, since=None, until=None: os.path.join(
+        config.exports_dir, f"{repo.replace('/', '_')}_{since:%Y%m%d}.md")
+    config.get_summary_filepath = lambda path: path.replace('.md', '-with-summary.md')
+    return AsyncDailyPipeline(config, github_client or FakeGitHubClient(), ReportGenerator(config), llm)
+
+
+class TestAsyncDailyPipeline(unittest.TestCase):
+    since = datetime(2024, 1, 1)
+    until = datetime(2024, 1, 2)
+
+    def test_results_follow_repo_order_within_llm_concurrency(self):
+        pipeline = make_pipeline(llm_concurrency=2)
+        completions = FakeAsyncCompletions()
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        repos = [f'o/r{i}' for i in range(5)]
+
+        results = pipeline.run(repos, self.since, self.until, client=client)
+
+        self.assertEqual([r.repo for r in results], repos)
+        self.assertTrue(all(r.error is None for r in results))
+        self.assertEqual(completions.max_active, 2)
+        with open(results[3].filepath, encoding='utf-8') as f:
+            self.assertTrue(f.read().startswith('# o/r3-2024-01-01 更新摘要\n\n摘要 o/r3'))
+
+    def test_rate_limit_is_retried_after_retry_after(self):
+        pipeline = make_pipeline()
+        completions = FakeAsyncCompletions(rate_limits=2)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+        results = pipeline.run(['o/a'], self.since, self.until, client=client)
+
+        self.assertIsNone(results[0].error)
+        self.assertEqual(completions.calls, 3)
+        self.assertEqual(pipeline._retry_delay(rate_limit_error('7'), 0), 7.0)
+        # Retry-After超过上限时按llm_backoff_max截断
+        self.assertEqual(pipeline._retry_delay(rate_limit_error('600'), 0), 60)
+
+    def test_rate_limit_gives_up_after_max_retries(self):
+        pipeline = make_pipeline(llm_max_retries=1)
+        completions = FakeAsyncCompletions(rate_limits=5)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+        result = pipeline.run(['o/a'], self.since, self.until, client=client)[0]
+
+        self.assertEqual(completions.calls, 2)
+        self.assertIn('rate limited', result.error)
+        # 原始报告已写入，结果中保留其路径
+        self.assertTrue(os.path.exists(result.filepath))
+
+    def test_failed_repo_does_not_stop_batch(self):
+        pipeline = make_pipeline(FakeGitHubClient(failing=['o/bad']))
+        client = SimpleNamespace(chat=SimpleNamespace(completions=FakeAsyncCompletions()))
+
+        results = pipeline.run(['o/a', 'o/bad', 'o/c'], self.since, self.until, client=client)
+
+        self.assertEqual([r.error for r in results], [None, 'HTTP 502', None])
+
+    def test_cached_summary_skips_api(self):
+        pipeline = make_pipeline()
+        completions = FakeAsyncCompletions()
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+        first = pipeline.run(['o/a'], self.since, self.until, client=client)[0]
+        second = pipeline.run(['o/a'], self.since, self.until, client=client)[0]
+
+        self.assertEqual(completions.calls, 1)
+        self.assertEqual(first.filepath, second.filepath)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import time
+import unittest
+from cache import DiskCache
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'cache.db')
+
+    def test_ttl_expiry(self):
+        cache = DiskCache(self.path, 1024)
+        cache.set('fresh', {'n': 1}, ttl=60)
+        cache.set('expired', {'n': 2}, ttl=0)
+        cache.set('forever', [1, 2])
+
+        self.assertEqual(cache.get('fresh'), {'n': 1})
+        self.assertIsNone(cache.get('expired'))
+        self.assertEqual(cache.get('forever'), [1, 2])
+        # 过期条目在读取时删除，不再计入大小
+        self.assertEqual(cache.get_stats()['size'], len('{"n": 1}') + len('[1, 2]'))
+
+    def test_evicts_least_recently_accessed(self):
+        # 每个值序列化后12字节，容量可容纳三个
+        cache = DiskCache(self.path, 40)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, 'x' * 10)
+            time.sleep(0.01)
+        cache.get('a')
+        time.sleep(0.01)
+
+        cache.set('d', 'x' * 10)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual([key for key in ('a', 'c', 'd') if cache.get(key)], ['a', 'c', 'd'])
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_oversized_value_is_not_stored(self):
+        cache = DiskCache(self.path, 10)
+        cache.set('big', 'x' * 20)
+
+        self.assertIsNone(cache.get('big'))
+        self.assertEqual(cache.get_stats()['size'], 0)
+
+    def test_entries_are_shared_between_instances(self):
+        DiskCache(self.path, 1024).set('k', 'v')
+
+        cache = DiskCache(self.path, 1024)
+
+        self.assertEqual(cache.get('k'), 'v')
+        self.assertEqual(cache.get_stats()['size'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
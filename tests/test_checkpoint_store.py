@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+import checkpoint_store
+from checkpoint_store import CheckpointStore, SQLiteCheckpointStore
+
+
+class TestCheckpointStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'checkpoints.json')
+
+    def test_reload_after_restart(self):
+        store = CheckpointStore(self.path)
+        store.set('o/a', datetime(2024, 1, 1, 8))
+        store.set('o/b', datetime(2024, 1, 2, 8))
+        store.remove('o/b')
+
+        reloaded = CheckpointStore(self.path)
+
+        self.assertEqual(reloaded.get('o/a'), datetime(2024, 1, 1, 8))
+        self.assertIsNone(reloaded.get('o/b'))
+
+    def test_failed_write_keeps_previous_file(self):
+        store = CheckpointStore(self.path)
+        store.set('o/a', datetime(2024, 1, 1, 8))
+
+        with mock.patch.object(checkpoint_store.json, 'dump', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                store.set('o/a', datetime(2024, 1, 3, 8))
+
+        self.assertEqual(os.listdir(self.directory), ['checkpoints.json'])
+        self.assertEqual(CheckpointStore(self.path).get('o/a'), datetime(2024, 1, 1, 8))
+
+    def test_corrupt_file_starts_empty(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('{"o/a": "2024-01-01T08:')
+
+        store = CheckpointStore(self.path)
+        self.assertIsNone(store.get('o/a'))
+
+        store.set('o/a', datetime(2024, 1, 1, 8))
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'o/a': '2024-01-01T08:00:00Z'})
+
+
+class TestSQLiteCheckpointStore(unittest.TestCase):
+    def test_shared_between_nodes_and_only_moves_forward(self):
+        path = os.path.join(tempfile.mkdtemp(), 'leases.db')
+        node_a, node_b = SQLiteCheckpointStore(path), SQLiteCheckpointStore(path)
+
+        node_a.set('o/r', datetime(2024, 1, 2))
+        node_b.set('o/r', datetime(2024, 1, 1))
+
+        self.assertEqual(node_b.get('o/r'), datetime(2024, 1, 2))
+        node_b.remove('o/r')
+        self.assertIsNone(node_a.get('o/r'))
+
+
+if __name__ == '__main__':
+    unittest.main()
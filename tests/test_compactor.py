@@ -0,0 +1,45 @@
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from compactor import Compactor
+from models import Commit, Issue, PullRequest
+
+
+def make_updates():
+    commits = [Commit(sha=f'{i:07d}', message=f'Change {i}', author='dev', date=datetime(2024, 1, 1, i))
+               for i in range(20)]
+    commits += [Commit(sha='bot0001', message='Bump deps', author='dependabot[bot]', author_login='dependabot[bot]'),
+                Commit(sha='merge01', message='Merge pull request #7', author='dev', parent_count=2)]
+    return {'o/r': {
+        'releases': None,
+        'commits': commits,
+        'pull_requests': [PullRequest(number=7, title='Feature', state='open', user='dev', labels=())],
+        'issues': [Issue(number=7, title='Feature', state='open', labels=(), is_pull_request=True),
+                   Issue(number=8, title='Bug', state='open', labels=('bug',), is_pull_request=False)],
+    }}
+
+
+class TestCompactor(unittest.TestCase):
+    def test_default_keeps_all_items_and_counts_collapsed(self):
+        compactor = Compactor(SimpleNamespace(compaction_config={}))
+
+        result = compactor.compact(make_updates(), 'x' * 4000)
+
+        self.assertEqual(result.omitted_items, 0)
+        # 一个机器人提交、一个合并提交和一个重复的PR
+        self.assertEqual(result.collapsed_items, 3)
+        self.assertIn('Change 0', result.markdown)
+        self.assertIn('3 duplicate or bot/merge items collapsed', result.describe())
+
+    def test_token_budget_truncates_low_priority_items(self):
+        compactor = Compactor(SimpleNamespace(compaction_config={'token_budget': 40}))
+
+        result = compactor.compact(make_updates(), 'x' * 4000)
+
+        self.assertGreater(result.omitted_items, 0)
+        self.assertIn('#7 Feature', result.markdown)
+        self.assertIn('low-priority items omitted', result.describe())
+
+
+if __name__ == '__main__':
+    unittest.main()
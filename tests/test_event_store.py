@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from event_store import EventStore
+from models import Commit, Issue
+
+
+def day(n, hour=0):
+    return datetime(2024, 1, n, hour)
+
+
+class TestCoverage(unittest.TestCase):
+    def setUp(self):
+        self.store = EventStore(os.path.join(tempfile.mkdtemp(), 'events.db'))
+
+    def intervals(self):
+        return self.store._intervals('o/a', 'issues')
+
+    def test_empty_store_misses_whole_window(self):
+        self.assertEqual(self.store.missing_ranges('o/a', 'issues', day(1), day(5)), [(day(1), day(5))])
+        self.assertIsNone(self.store.get_watermark('o/a', 'issues'))
+
+    def test_missing_ranges_returns_gaps_around_coverage(self):
+        self.store.add_coverage('o/a', 'issues', day(2), day(3))
+        self.store.add_coverage('o/a', 'issues', day(5), day(6))
+
+        self.assertEqual(self.store.missing_ranges('o/a', 'issues', day(1), day(7)),
+                         [(day(1), day(2)), (day(3), day(5)), (day(6), day(7))])
+        self.assertEqual(self.store.missing_ranges('o/a', 'issues', day(2, 6), day(3)), [])
+        self.assertEqual(self.store.missing_ranges('o/a', 'issues', day(3, 6), day(5, 6)),
+                         [(day(3, 6), day(5))])
+        # 其他接口的区间互不影响
+        self.assertEqual(self.store.missing_ranges('o/a', 'commits', day(2), day(3)), [(day(2), day(3))])
+
+    def test_overlapping_intervals_are_merged(self):
+        self.store.add_coverage('o/a', 'issues', day(1), day(3))
+        self.store.add_coverage('o/a', 'issues', day(5), day(7))
+        self.store.add_coverage('o/a', 'issues', day(2), day(6))
+
+        self.assertEqual(self.intervals(), [('2024-01-01T00:00:00Z', '2024-01-07T00:00:00Z')])
+        self.assertEqual(self.store.get_watermark('o/a', 'issues'), day(7))
+
+    def test_adjacent_intervals_are_merged(self):
+        self.store.add_coverage('o/a', 'issues', day(1), day(2))
+        self.store.add_coverage('o/a', 'issues', day(2), day(3))
+
+        self.assertEqual(self.intervals(), [('2024-01-01T00:00:00Z', '2024-01-03T00:00:00Z')])
+
+    def test_disjoint_intervals_are_kept_apart(self):
+        self.store.add_coverage('o/a', 'issues', day(4), day(5))
+        self.store.add_coverage('o/a', 'issues', day(1), day(2))
+
+        self.assertEqual(len(self.intervals()), 2)
+        self.assertEqual(self.store.get_watermark('o/a', 'issues'), day(5))
+
+
+class TestUpsert(unittest.TestCase):
+    def setUp(self):
+        self.store = EventStore(os.path.join(tempfile.mkdtemp(), 'events.db'))
+
+    def test_newer_update_replaces_item_and_moves_it_in_time(self):
+        self.store.upsert('o/a', 'issues', [Issue(id=1, number=3, title='Crash', updated_at=day(2))])
+        self.store.upsert('o/a', 'issues', [Issue(id=1, number=3, title='Crash (fixed)', updated_at=day(4))])
+
+        self.assertEqual(self.store.query('o/a', 'issues', day(1), day(3)), [])
+        item, = self.store.query('o/a', 'issues', day(1), day(5))
+        self.assertEqual((item.title, item.updated_at), ('Crash (fixed)', day(4)))
+
+    def test_query_filters_window_and_orders_newest_first(self):
+        self.store.upsert('o/a', 'commits', [
+            Commit(sha='a1', message='first', date=day(1)),
+            Commit(sha='a2', message='second', date=day(2)),
+            Commit(sha='a3', message='third', date=day(3)),
+        ])
+        self.store.upsert('o/b', 'commits', [Commit(sha='b1', message='other', date=day(2))])
+
+        self.assertEqual([c.sha for c in self.store.query('o/a', 'commits', day(2), day(3))], ['a3', 'a2'])
+
+    def test_items_survive_reopen(self):
+        self.store.upsert('o/a', 'issues', [Issue(id=1, number=3, title='Crash', updated_at=day(2))])
+        self.store.add_coverage('o/a', 'issues', day(1), day(3))
+
+        reopened = EventStore(self.store.path)
+
+        self.assertEqual(len(reopened.query('o/a', 'issues', day(1), day(3))), 1)
+        self.assertEqual(reopened.missing_ranges('o/a', 'issues', day(1), day(3)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+from export_catalog import ExportCatalog
+
+
+class TestExportCatalog(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.exports_dir = os.path.join(directory, 'exports')
+        os.makedirs(self.exports_dir)
+        self.catalog = ExportCatalog(os.path.join(directory, 'catalog.db'), self.exports_dir)
+
+    def write(self, filename, text='report', mtime=None):
+        path = os.path.join(self.exports_dir, filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def record_samples(self):
+        """按生成时间先后登记：o/a三天的报告和摘要，o/b一份周报摘要"""
+        names = []
+        for day in ('20240101', '20240102', '20240103'):
+            names.append(f'o_a_{day}.md')
+            names.append(f'o_a_{day}-with-summary.md')
+        names.append('o_b_20240101-20240107-with-summary.md')
+        for i, name in enumerate(names):
+            self.catalog.record(self.write(name, mtime=1700000000 + i))
+
+    def filenames(self, **filters):
+        rows, total = self.catalog.query(**filters)
+        self.assertEqual(len(rows), total)
+        return [row['filename'] for row in rows]
+
+    def test_infers_repo_dates_and_kind_from_filename(self):
+        self.catalog.record(self.write('owner_my_repo_20240101-20240107-with-summary.md'))
+
+        entry, = self.catalog.entries()
+        self.assertEqual(entry['repo'], 'owner/my_repo')
+        self.assertEqual((entry['since'], entry['until']), ('2024-01-01', '2024-01-07'))
+        self.assertEqual(entry['kind'], 'summary')
+
+    def test_multi_repo_report_has_no_repo(self):
+        self.catalog.record(self.write('github_updates_20240101.md'), repo=None)
+
+        entry, = self.catalog.entries()
+        self.assertIsNone(entry['repo'])
+        self.assertEqual(self.catalog.repos(), [])
+
+    def test_query_pages_newest_first_with_total(self):
+        self.record_samples()
+
+        pages = [self.catalog.query(offset=offset, limit=2) for offset in (0, 2, 4)]
+
+        self.assertEqual([total for _, total in pages], [4, 4, 4])
+        self.assertEqual([[row['filename'] for row in rows] for rows, _ in pages], [
+            ['o_b_20240101-20240107-with-summary.md', 'o_a_20240103-with-summary.md'],
+            ['o_a_20240102-with-summary.md', 'o_a_20240101-with-summary.md'],
+            [],
+        ])
+
+    def test_query_filters(self):
+        self.record_samples()
+
+        self.assertEqual(len(self.filenames(kind=None)), 7)
+        self.assertEqual(self.filenames(kind='raw', repo='o/a'),
+                         ['o_a_20240103.md', 'o_a_20240102.md', 'o_a_20240101.md'])
+        self.assertEqual(self.filenames(repo='o/b'), ['o_b_20240101-20240107-with-summary.md'])
+        # date_from按报告的结束日期比较，周报覆盖到1月7日
+        self.assertEqual(self.filenames(date_from='2024-01-03'),
+                         ['o_b_20240101-20240107-with-summary.md', 'o_a_20240103-with-summary.md'])
+        self.assertEqual(self.filenames(date_to='2024-01-01'),
+                         ['o_b_20240101-20240107-with-summary.md', 'o_a_20240101-with-summary.md'])
+        self.assertEqual(self.filenames(repo='o/a', date_from='2024-01-02', date_to='2024-01-02'),
+                         ['o_a_20240102-with-summary.md'])
+
+    def test_rebuild_picks_up_files_added_and_deleted_outside_the_app(self):
+        self.record_samples()
+        os.remove(os.path.join(self.exports_dir, 'o_a_20240101.md'))
+        self.write('o_c_20240105.md')
+
+        self.assertEqual(self.catalog.rebuild(), 7)
+
+        filenames = self.filenames(kind=None)
+        self.assertIn('o_c_20240105.md', filenames)
+        self.assertNotIn('o_a_20240101.md', filenames)
+        self.assertEqual(self.catalog.repos(), ['o/a', 'o/b', 'o/c'])
+
+    def test_rebuild_keeps_entries_that_still_exist_elsewhere(self):
+        self.record_samples()
+        stored = os.path.abspath(os.path.join(self.exports_dir, 'o_a_20240101.md'))
+        os.remove(stored)
+        # 转入导出存储的报告文件已删除，但仍可读取
+        self.catalog.exists = lambda path: path == stored
+
+        self.catalog.rebuild()
+
+        self.assertEqual(len(self.filenames(kind=None)), 7)
+
+    def test_empty_catalog_is_backfilled_from_exports_dir(self):
+        self.write('o_a_20240101.md')
+        self.write('notes.txt')
+
+        catalog = ExportCatalog(os.path.join(os.path.dirname(self.exports_dir), 'other.db'), self.exports_dir)
+
+        self.assertEqual([entry['filename'] for entry in catalog.entries()], ['o_a_20240101.md'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import tempfile
+import unittest
+from export_store import BlobStore
+
+
+class TestBlobStore(unittest.TestCase):
+    def test_round_trip_and_dedupe(self):
+        store = BlobStore(tempfile.mkdtemp(), codec='gzip')
+
+        digest = store.put('报告内容'.encode('utf-8'))
+
+        self.assertEqual(store.put('报告内容'.encode('utf-8')), digest)
+        self.assertEqual(store.get(digest).decode('utf-8'), '报告内容')
+        with self.assertRaises(KeyError):
+            store.get('0' * 64)
+
+    def test_reads_objects_packed_by_another_instance(self):
+        directory = tempfile.mkdtemp()
+        reader = BlobStore(directory, codec='gzip')
+        writer = BlobStore(directory, codec='gzip')
+        digest = writer.put(b'archived report')
+
+        self.assertEqual(writer.pack([digest], '2024-01'), 1)
+
+        # reader打开时归档包还不存在，未命中时重新扫描归档包目录
+        self.assertEqual(reader.get(digest), b'archived report')
+        self.assertGreater(reader.stored_size(digest), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from fetch_cache import FetchCache
+
+NOW = datetime(2024, 6, 1, 12, 0, 0)
+
+
+class MemoryCache:
+    """记录写入时ttl的内存缓存"""
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.values[key] = value
+        self.ttls[key] = ttl
+
+
+class TestFetchCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = MemoryCache()
+        self.fetch_cache = FetchCache(self.cache, open_ttl=300, settle_seconds=600, clock=lambda: NOW)
+        self.since, self.until = NOW - timedelta(days=2), NOW - timedelta(days=1)
+
+    def test_closed_complete_window_is_cached_permanently(self):
+        self.fetch_cache.get_or_fetch('o/r', 'commits', self.since, self.until, lambda *args: ([], True))
+
+        self.assertEqual(list(self.cache.ttls.values()), [None])
+
+    def test_truncated_result_is_not_cached_permanently(self):
+        self.fetch_cache.get_or_fetch('o/r', 'commits', self.since, self.until, lambda *args: ([], False))
+
+        self.assertEqual(list(self.cache.ttls.values()), [300])
+
+    def test_open_window_uses_open_ttl(self):
+        self.fetch_cache.get_or_fetch('o/r', 'commits', self.since, NOW, lambda *args: ([], True))
+
+        self.assertEqual(list(self.cache.ttls.values()), [300])
+
+    def run_concurrently(self, fetch, callers=4):
+        """第一个调用方进入fetch后再启动其余调用方，等它们都合并到同一次获取后放行"""
+        release, started = threading.Event(), threading.Event()
+        outcomes = []
+
+        def blocking_fetch(*args):
+            started.set()
+            release.wait(5)
+            return fetch(*args)
+
+        def call():
+            try:
+                outcomes.append(self.fetch_cache.get_or_fetch('o/r', 'commits', self.since, self.until,
+                                                              blocking_fetch))
+            except Exception as e:
+                outcomes.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        deadline = time.time() + 5
+        while self.fetch_cache.get_stats()['coalesced'] < callers - 1 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_concurrent_misses_share_one_fetch(self):
+        calls = []
+
+        def fetch(*args):
+            calls.append(args)
+            return [], True
+
+        outcomes = self.run_concurrently(fetch)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(outcomes, [[]] * 4)
+        self.assertEqual(self.fetch_cache.get_stats(), {'hits': 0, 'misses': 1, 'coalesced': 3})
+
+    def test_fetch_error_reaches_all_waiters_and_is_not_cached(self):
+        def fetch(*args):
+            raise RuntimeError('HTTP 502')
+
+        outcomes = self.run_concurrently(fetch)
+
+        self.assertEqual([str(outcome) for outcome in outcomes], ['HTTP 502'] * 4)
+        self.assertEqual(self.cache.values, {})
+        self.assertEqual(self.fetch_cache.get_or_fetch('o/r', 'commits', self.since, self.until,
+                                                       lambda *args: ([], True)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
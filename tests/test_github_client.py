@@ -1,10 +1,243 @@
+import os
+import tempfile
+import time
 import unittest
-from src.github_client import GitHubClient
+import httpx
+from datetime import datetime
+from types import SimpleNamespace
+from github_client import GitHubAPIError, GitHubClient
+from mock_github import MockGraphQLEndpoint
+
+
+def make_config(**github):
+    github_config = {'api_base_url': 'https://api.github.com', 'items_per_page': 2, 'max_pages': 10}
+    github_config.update(github)
+    return SimpleNamespace(
+        github_token='test-token',
+        github_tokens=['test-token'],
+        github_config=github_config,
+        cache_config={'http_enabled': False},
+        cache_dir=tempfile.mkdtemp(),
+    )
+
+
+def issue_node(number, updated_at):
+    return {
+        'databaseId': number, 'number': number, 'title': f'Issue {number}', 'state': 'OPEN',
+        'url': f'https://github.com/o/r/issues/{number}', 'createdAt': updated_at,
+        'updatedAt': updated_at, 'author': {'login': 'dev'}, 'labels': {'nodes': []},
+    }
+
+
+def pulls_handler(pages, requests):
+    """按page参数返回预置的PR页面，除最后一页外都带rel="next"链接"""
+    def handler(request):
+        requests.append(request.url)
+        page = int(request.url.params.get('page', '1'))
+        headers = {}
+        if page < len(pages):
+            headers['Link'] = (f'<https://api.github.com/repos/o/r/pulls?page={page + 1}&per_page=2>; rel="next", '
+                               f'<https://api.github.com/repos/o/r/pulls?page={len(pages)}&per_page=2>; rel="last"')
+        return httpx.Response(200, json=pages[page - 1], headers=headers)
+    return handler
+
+
+def pr(number, updated_at):
+    return {'id': number, 'number': number, 'title': f'PR {number}', 'state': 'open',
+            'user': {'login': 'dev'}, 'updated_at': updated_at}
+
 
 class TestGitHubClient(unittest.TestCase):
-    def test_fetch_updates(self):
-        # Add test cases for GitHubClient
-        pass
+    def test_paginate_follows_link_header(self):
+        pages = [[pr(1, '2024-01-05T00:00:00Z'), pr(2, '2024-01-04T00:00:00Z')],
+                 [pr(3, '2024-01-03T00:00:00Z'), pr(4, '2024-01-02T00:00:00Z')],
+                 [pr(5, '2024-01-01T12:00:00Z')]]
+        requests = []
+        client = GitHubClient(make_config(), transport=httpx.MockTransport(pulls_handler(pages, requests)))
+
+        prs = client.fetch_pull_requests('o/r', since=datetime(2024, 1, 1))
+
+        self.assertEqual([p.number for p in prs], [1, 2, 3, 4, 5])
+        self.assertEqual([url.params.get('page') for url in requests], [None, '2', '3'])
+        # 首页带排序参数，后续页直接使用next链接
+        self.assertEqual(requests[0].params.get('sort'), 'updated')
+        self.assertEqual(client.truncated_pages(), 0)
+
+    def test_paginate_stops_at_first_item_older_than_since(self):
+        pages = [[pr(1, '2024-01-05T00:00:00Z'), pr(2, '2024-01-04T00:00:00Z')],
+                 [pr(3, '2024-01-03T00:00:00Z'), pr(4, '2023-12-30T00:00:00Z')],
+                 [pr(5, '2023-12-29T00:00:00Z')]]
+        requests = []
+        client = GitHubClient(make_config(), transport=httpx.MockTransport(pulls_handler(pages, requests)))
+
+        prs = client.fetch_pull_requests('o/r', since=datetime(2024, 1, 1))
+
+        self.assertEqual([p.number for p in prs], [1, 2, 3])
+        self.assertEqual(len(requests), 2)
+
+    def test_paginate_respects_max_pages(self):
+        pages = [[pr(n * 2 + i, '2024-01-05T00:00:00Z') for i in range(2)] for n in range(5)]
+        requests = []
+        client = GitHubClient(make_config(max_pages=2),
+                              transport=httpx.MockTransport(pulls_handler(pages, requests)))
+
+        prs = client.fetch_pull_requests('o/r', since=datetime(2024, 1, 1))
+
+        self.assertEqual(len(prs), 4)
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(client.truncated_pages(), 1)
+
+        # 没有时间窗口时只取最新一页，不算截断
+        requests.clear()
+        self.assertEqual(len(client.fetch_pull_requests('o/r')), 2)
+        self.assertEqual((len(requests), client.truncated_pages()), (1, 1))
+
+    def test_iter_updates_dedupes_and_records_fetch_errors(self):
+        client = GitHubClient(make_config())
+        calls = []
+
+        def fetch(repo, since=None, until=None):
+            calls.append(repo)
+            return []
+
+        def broken(repo, since=None, until=None):
+            raise KeyError('sha')
+
+        client._fetch_latest_release = lambda repo, since=None, until=None: None
+        client.fetch_commits = broken
+        client.fetch_issues = fetch
+        client.fetch_pull_requests = fetch
+
+        updates = list(client.iter_updates(['o/r', 'o/r']))
+
+        self.assertEqual([repo for repo, _ in updates], ['o/r'])
+        self.assertEqual(calls, ['o/r', 'o/r'])
+        self.assertIn('commits', updates[0][1]['errors'])
+        self.assertEqual(updates[0][1]['issues'], [])
+
+    def test_retries_server_errors_then_gives_up(self):
+        statuses = []
+
+        def handler(request):
+            statuses.append(502)
+            return httpx.Response(502)
+
+        client = GitHubClient(make_config(max_retries=2, backoff_base=0), transport=httpx.MockTransport(handler))
+
+        with self.assertRaises(GitHubAPIError) as raised:
+            client._execute('GET', 'https://api.github.com/repos/o/r', {})
+        self.assertEqual(raised.exception.status_code, 502)
+        self.assertEqual(len(statuses), 3)
+
+    def test_rate_limit_switches_tokens_then_counts_against_retries(self):
+        seen = []
+
+        def handler(request):
+            token = request.headers['Authorization']
+            seen.append(token)
+            # 重置时间已过但仍被限流，token池不会等待
+            return httpx.Response(403, headers={'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '0'})
+
+        config = make_config(max_retries=2, backoff_base=0)
+        config.github_tokens = ['token-a', 'token-b']
+        client = GitHubClient(config, transport=httpx.MockTransport(handler))
+
+        with self.assertRaises(GitHubAPIError) as raised:
+            client._execute('GET', 'https://api.github.com/repos/o/r', {})
+        self.assertEqual(raised.exception.status_code, 403)
+        # 前两次限流（每个token一次）只换用token，之后与5xx一样：一次请求加两次重试
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(client.get_stats().get('retries'), 2)
+
+    def test_rate_limited_token_is_replaced_without_retry(self):
+        def handler(request):
+            if request.headers['Authorization'] == 'Bearer token-a':
+                return httpx.Response(403, headers={'X-RateLimit-Remaining': '0',
+                                                    'X-RateLimit-Reset': str(int(time.time()) + 3600)})
+            return httpx.Response(200, json={}, headers={'X-RateLimit-Remaining': '10',
+                                                         'X-RateLimit-Reset': str(int(time.time()) + 3600)})
+
+        config = make_config()
+        config.github_tokens = ['token-a', 'token-b']
+        client = GitHubClient(config, transport=httpx.MockTransport(handler))
+
+        self.assertEqual(client._execute('GET', 'https://api.github.com/repos/o/r', {}).status_code, 200)
+        self.assertEqual(client.get_stats().get('retries', 0), 0)
+
+    def test_event_store_skips_coverage_for_truncated_pagination(self):
+        def handler(request):
+            page = int(request.url.params.get('page', '1'))
+            commits = [{'sha': f'{page}{i:06d}', 'commit': {'message': 'Change',
+                                                              'author': {'name': 'dev', 'date': '2024-01-01T12:00:00Z'}}}
+                       for i in range(2)]
+            return httpx.Response(200, json=commits, headers={
+                'Link': f'<https://api.github.com/repos/o/r/commits?page={page + 1}>; rel="next"'})
+
+        config = make_config(max_pages=2)
+        config.store_config = {'enabled': True, 'path': os.path.join(config.cache_dir, 'events.db'),
+                               'settle_seconds': 0}
+        config.cache_config['fetch_enabled'] = False
+        client = GitHubClient(config, transport=httpx.MockTransport(handler))
+        since, until = datetime(2024, 1, 1), datetime(2024, 1, 2)
+
+        commits = client._fetch_from_store('commits', 'o/r', since, until)
+
+        self.assertEqual(len(commits), 4)
+        self.assertEqual(client.truncated_pages(), 1)
+        self.assertEqual(client.event_store.missing_ranges('o/r', 'commits', since, until), [(since, until)])
+
+    def test_conditional_request_ignores_until(self):
+        seen = []
+
+        def handler(request):
+            seen.append(request.headers.get('If-None-Match'))
+            if request.headers.get('If-None-Match') == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, json=[], headers={'ETag': '"v1"'})
+
+        config = make_config()
+        config.cache_config = {'http_enabled': True, 'fetch_enabled': False}
+        client = GitHubClient(config, transport=httpx.MockTransport(handler))
+        since = datetime(2024, 1, 1)
+
+        client.fetch_commits('o/r', since, datetime(2024, 1, 2, 10))
+        client.fetch_commits('o/r', since, datetime(2024, 1, 2, 11))
+
+        self.assertEqual(seen, [None, '"v1"'])
+        self.assertEqual(client.get_stats().get('not_modified'), 1)
+
+    def test_graphql_backend_batches_and_paginates(self):
+        endpoint = MockGraphQLEndpoint({
+            'o/r': {
+                'releases': [{'databaseId': 1, 'tagName': 'v1.0', 'name': 'v1.0', 'isDraft': False,
+                              'publishedAt': '2024-12-20T08:00:00Z', 'url': 'https://github.com/o/r/releases/v1.0'}],
+                'issues': [issue_node(n, f'2024-12-2{9 - n}T00:00:00Z') for n in range(5)],
+                'pull_requests': [],
+                'commits': [],
+            },
+        })
+        client = GitHubClient(make_config(backend='graphql', graphql_batch_size=2),
+                              transport=endpoint.transport())
+
+        updates = client.fetch_updates(['o/r', 'o/missing'], since=datetime(2024, 12, 26))
+
+        self.assertEqual([i.number for i in updates['o/r']['issues']], [0, 1, 2, 3])
+        self.assertIsNone(updates['o/r']['releases'])
+        self.assertIn('errors', updates['o/missing'])
+        # 首页批量查询一次，之后只有issues需要再翻一页
+        self.assertEqual(len(endpoint.queries), 2)
+
+    def test_graphql_releases_page_past_releases_newer_than_until(self):
+        releases = [{'databaseId': n, 'tagName': f'v{n}', 'name': f'v{n}', 'isDraft': False,
+                     'publishedAt': f'2024-12-{day}T08:00:00Z', 'url': f'https://github.com/o/r/releases/v{n}'}
+                    for n, day in ((3, 30), (2, 29), (1, 27))]
+        endpoint = MockGraphQLEndpoint({'o/r': {'releases': releases}})
+        client = GitHubClient(make_config(backend='graphql'), transport=endpoint.transport())
+
+        updates = client.fetch_updates(['o/r'], since=datetime(2024, 12, 26), until=datetime(2024, 12, 28))
+
+        self.assertEqual(updates['o/r']['releases'].tag_name, 'v1')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from llm import LLMProcessor
+from models import Issue
+
+PROMPT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'prompt')
+
+
+class FakeCompletions:
+    """记录请求次数的chat completions替身"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **params):
+        self.calls += 1
+        message = SimpleNamespace(content=f"摘要 {self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def make_llm(**overrides):
+    directory = tempfile.mkdtemp()
+    config = SimpleNamespace(
+        openai_api_key='test-key', openai_base_url=None, openai_model='gpt-test',
+        openai_system_prompt='system', openai_temperature=0.2, openai_max_tokens=500,
+        prompt_dir=PROMPT_DIR, cache_dir=directory, exports_dir=os.path.join(directory, 'exports'),
+    )
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    llm = LLMProcessor(config)
+    llm.completions = FakeCompletions()
+    llm.client = SimpleNamespace(chat=SimpleNamespace(completions=llm.completions))
+    return llm
+
+
+def make_updates(count):
+    issues = [Issue(number=n, title=f'Bug {n}', state='open', labels=(), is_pull_request=False,
+                    updated_at=datetime(2024, 1, 1, n)) for n in range(count)]
+    return {'o/r': {'releases': None, 'commits': [], 'pull_requests': [], 'issues': issues}}
+
+
+class TestItemSummarizer(unittest.TestCase):
+    def test_misses_count_actual_llm_calls(self):
+        llm = make_llm()
+        summarizer = llm.item_summarizer
+
+        _, misses = summarizer.build_input(make_updates(2))
+        self.assertEqual((misses, llm.completions.calls), (2, 2))
+
+        content, misses = summarizer.build_input(make_updates(3))
+        self.assertEqual((misses, llm.completions.calls), (1, 3))
+        self.assertIn('议题 #0: 摘要', content)
+
+    def test_cache_key_includes_request_params(self):
+        llm = make_llm()
+        llm.item_summarizer.build_input(make_updates(1))
+
+        llm.config.openai_temperature = 0.9
+        _, misses = llm.item_summarizer.build_input(make_updates(1))
+        self.assertEqual(misses, 1)
+
+        llm.config.openai_max_tokens = 100
+        _, misses = llm.item_summarizer.build_input(make_updates(1))
+        self.assertEqual((misses, llm.completions.calls), (1, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from job_queue import DONE, FAILED, PENDING, RUNNING, JobQueue, WorkerPool
+from report_jobs import ReportJobs
+
+
+def make_path():
+    return os.path.join(tempfile.mkdtemp(), 'jobs.db')
+
+
+class TestJobQueue(unittest.TestCase):
+    def test_each_job_is_claimed_once_across_threads_and_connections(self):
+        path = make_path()
+        queues = [JobQueue(path), JobQueue(path)]
+        ids = {queues[0].submit('render', {'n': n}) for n in range(40)}
+        claimed, lock = [], threading.Lock()
+
+        def worker(queue):
+            while True:
+                job = queue.claim()
+                if job is None:
+                    return
+                with lock:
+                    claimed.append(job.id)
+
+        threads = [threading.Thread(target=worker, args=(queues[i % 2],)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(claimed), sorted(ids))
+
+    def test_failure_requeues_with_backoff_until_max_attempts(self):
+        queue = JobQueue(make_path(), backoff_base=10.0)
+        job_id = queue.submit('fetch', {}, max_attempts=2)
+
+        before = time.time()
+        self.assertTrue(queue.fail(queue.claim(), 'timeout'))
+        self.assertEqual(queue.get(job_id).status, PENDING)
+        # 退避期间不能领取
+        row = queue._conn.execute("SELECT run_after FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        self.assertTrue(before <= row[0] <= time.time() + 10.0)
+
+        queue._conn.execute("UPDATE jobs SET run_after = 0 WHERE id = ?", (job_id,))
+        job = queue.claim()
+        self.assertEqual(job.attempts, 2)
+        self.assertFalse(queue.fail(job, 'timeout'))
+        self.assertEqual((queue.get(job_id).status, queue.get(job_id).error), (FAILED, 'timeout'))
+
+    def test_recover_only_requeues_jobs_of_dead_nodes(self):
+        path = make_path()
+        alive, dead = JobQueue(path, node_id='alive'), JobQueue(path, node_id='dead')
+        mine = alive.submit('fetch', {'n': 1})
+        theirs = alive.submit('fetch', {'n': 2})
+        alive.claim()
+        dead.claim()
+
+        self.assertEqual(alive.recover(live_nodes=['alive']), 1)
+        self.assertEqual(alive.get(mine).status, RUNNING)
+        self.assertEqual(alive.get(theirs).status, PENDING)
+
+        self.assertEqual(alive.recover(), 1)
+        self.assertEqual(alive.get(mine).status, PENDING)
+
+    def test_idempotency_key(self):
+        queue = JobQueue(make_path())
+        job_id = queue.submit('fetch', {'v': 1}, key='fetch:o/r')
+        self.assertEqual(queue.submit('fetch', {'v': 2}, key='fetch:o/r'), job_id)
+        self.assertEqual(queue.get(job_id).payload, {'v': 1})
+
+        queue.complete(queue.claim().id, {'ok': True})
+        queue.submit('fetch', {'v': 3}, key='fetch:o/r')
+        self.assertEqual(queue.get(job_id).status, DONE)
+
+        queue.submit('fetch', {'v': 4}, key='fetch:o/r', force=True)
+        job = queue.get(job_id)
+        self.assertEqual((job.status, job.payload, job.attempts), (PENDING, {'v': 4}, 0))
+
+
+class TestWorkerPool(unittest.TestCase):
+    def test_next_job_chaining(self):
+        queue = JobQueue(make_path())
+        handlers = {
+            'fetch': lambda payload: {'next': {'type': 'render', 'payload': {'repo': payload['repo']}}},
+            'render': lambda payload: {'report': f"{payload['repo']}.md"},
+        }
+        pool = WorkerPool(queue, handlers)
+        job_id = queue.submit('fetch', {'repo': 'o/r'})
+
+        while pool.run_once():
+            pass
+
+        last = queue.wait(job_id, timeout=1)
+        self.assertEqual((last.type, last.result), ('render', {'report': 'o/r.md'}))
+        self.assertEqual(queue.get(job_id).result['next_job'], last.id)
+
+    def test_failures_are_reported_through_callback(self):
+        queue = JobQueue(make_path(), backoff_base=0.0)
+        reported = []
+
+        def broken(payload):
+            raise RuntimeError('rate limited')
+
+        pool = WorkerPool(queue, {'fetch': broken},
+                          on_failure=lambda job, error, final: reported.append((job.attempts, error, final)))
+        queue.submit('fetch', {}, max_attempts=2)
+
+        while pool.run_once():
+            pass
+
+        self.assertEqual(reported, [(1, 'rate limited', False), (2, 'rate limited', True)])
+
+
+class TestReportJobs(unittest.TestCase):
+    def test_wait_times_out_with_configured_timeout(self):
+        directory = tempfile.mkdtemp()
+        config = SimpleNamespace(cache_dir=directory, jobs_config={'wait_timeout': 0.1})
+        jobs = ReportJobs(config, queue=JobQueue(os.path.join(directory, 'jobs.db')))
+        # 没有worker，任务一直处于排队状态
+        job_id = jobs.queue.submit('fetch', {'repo': 'o/r'})
+
+        start = time.time()
+        self.assertIsNone(jobs.wait(job_id))
+        self.assertLess(time.time() - start, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from llm import LLMProcessor
+from utils import estimate_tokens
+
+PROMPT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'prompt')
+
+
+class FakeCompletions:
+    """记录请求的chat completions替身，流式请求按字符分块返回"""
+
+    def __init__(self, reply=None):
+        self.requests = []
+        self.reply = reply
+
+    def prompts(self):
+        return [params['messages'][-1]['content'] for params in self.requests]
+
+    def create(self, stream=False, **params):
+        self.requests.append(params)
+        content = f"回复 {len(self.requests)}" + (self.reply or '')
+        if stream:
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=ch))])
+                         for ch in content])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def make_llm(reply=None, **overrides):
+    directory = tempfile.mkdtemp()
+    config = SimpleNamespace(
+        openai_api_key='test-key', openai_base_url=None, openai_model='gpt-test',
+        openai_system_prompt='system', openai_temperature=0.2, openai_max_tokens=500,
+        prompt_dir=PROMPT_DIR, cache_dir=directory, exports_dir=os.path.join(directory, 'exports'),
+    )
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    llm = LLMProcessor(config)
+    llm.completions = FakeCompletions(reply)
+    llm.client = SimpleNamespace(chat=SimpleNamespace(completions=llm.completions))
+    return llm
+
+
+class TestLLMCache(unittest.TestCase):
+    def test_repeated_prompt_is_served_from_cache(self):
+        llm = make_llm()
+
+        self.assertEqual(llm.complete('prompt'), '回复 1')
+        self.assertEqual(llm.complete('prompt'), '回复 1')
+
+        self.assertEqual(len(llm.completions.requests), 1)
+        self.assertEqual(llm.get_cache_stats()['hits'], 1)
+
+    def test_use_cache_false_refreshes_entry(self):
+        llm = make_llm()
+        llm.complete('prompt')
+
+        self.assertEqual(llm.complete('prompt', use_cache=False), '回复 2')
+        self.assertEqual(llm.complete('prompt'), '回复 2')
+
+    def test_request_params_are_part_of_key(self):
+        llm = make_llm()
+        llm.complete('prompt')
+
+        llm.config.openai_temperature = 0.9
+        llm.complete('prompt')
+        llm.config.openai_max_tokens = 100
+        llm.complete('prompt')
+
+        self.assertEqual(len(llm.completions.requests), 3)
+
+    def test_stream_is_cached_only_after_completion(self):
+        llm = make_llm()
+
+        stream = llm._stream_complete('prompt')
+        next(stream)
+        stream.close()
+        self.assertIsNone(llm.cache.get(llm.cache_key('prompt')))
+
+        self.assertEqual(''.join(llm._stream_complete('prompt')), '回复 2')
+        self.assertEqual(list(llm._stream_complete('prompt')), ['回复 2'])
+        self.assertEqual(len(llm.completions.requests), 2)
+
+
+def make_report(repos=2, sections=3, lines=10):
+    parts = []
+    for r in range(repos):
+        parts.append(f"\n## o/repo{r}\n\n")
+        for s in range(sections):
+            parts.append(f"### Section {s}\n" + ''.join(f"- item {r}-{s}-{i} fixes something\n" for i in range(lines))
+                         + "\n")
+    return ''.join(parts)
+
+
+class TestSplitReport(unittest.TestCase):
+    def test_chunks_fit_budget_and_keep_repo_heading(self):
+        report = make_report()
+
+        chunks = LLMProcessor.split_report(report, 60)
+
+        self.assertGreater(len(chunks), 2)
+        for chunk in chunks:
+            self.assertLessEqual(estimate_tokens(chunk), 60)
+            self.assertTrue(chunk.startswith('## o/repo'), chunk[:20])
+        # 去掉重复的仓库标题后内容完整且顺序不变
+        lines = [line for chunk in chunks for line in chunk.splitlines() if line and not line.startswith('## ')]
+        self.assertEqual(lines, [line for line in report.splitlines() if line and not line.startswith('## ')])
+
+    def test_small_sections_share_a_chunk(self):
+        report = make_report(repos=1, sections=3, lines=1)
+
+        self.assertEqual(LLMProcessor.split_report(report, 1000), [report.lstrip('\n')])
+
+    def test_oversized_section_is_split_by_lines(self):
+        report = make_report(repos=1, sections=1, lines=40)
+
+        chunks = LLMProcessor.split_report(report, 50)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(chunk.startswith('## o/repo0\n\n') for chunk in chunks))
+        self.assertTrue(all(estimate_tokens(chunk) <= 50 for chunk in chunks))
+
+
+class TestMapReduce(unittest.TestCase):
+    def test_partial_summaries_over_budget_are_reduced_in_levels(self):
+        # 每个部分的要点约100个token，8块的要点需要两层合并才能放进250个token
+        llm = make_llm(reply='x' * 400, openai_map_reduce_config={
+            'chunk_tokens': 250, 'threshold_tokens': 0, 'max_workers': 2})
+        report = make_report(repos=8, sections=1, lines=25)
+
+        llm.generate_daily_report(report, 'o/r', '2024-01-01')
+
+        prompts = llm.completions.prompts()
+        maps = [p for p in prompts if p.startswith('以下是一个GitHub仓库更新报告的第')]
+        reduces = [p for p in prompts if p.startswith('以下是同一份GitHub仓库更新报告中若干部分')]
+        self.assertEqual(len(maps), 8)
+        self.assertEqual(len(reduces), 4 + 2)
+        self.assertEqual(len(prompts), 8 + 6 + 1)
+        self.assertTrue(prompts[-1].startswith('以下是同一份GitHub仓库更新报告各部分的要点摘要'))
+        self.assertFalse(any('第1部分（共1部分）' in p for p in prompts))
+
+    def test_small_report_uses_single_call(self):
+        llm = make_llm()
+
+        summary = llm.generate_daily_report(make_report(repos=1, sections=1, lines=2), 'o/r', '2024-01-01')
+
+        self.assertEqual(summary, '# o/r-2024-01-01 更新摘要\n\n回复 1')
+        self.assertEqual(len(llm.completions.requests), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
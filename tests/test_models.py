@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from models import Commit, Issue, PullRequest, Release, format_github_time, parse_github_time
+from report_jobs import load_updates, save_updates
+
+ISSUE_API = {
+    'id': 11, 'number': 3, 'title': 'Crash', 'state': 'open',
+    'html_url': 'https://github.com/o/a/issues/3', 'user': {'login': 'dev'},
+    'labels': [{'name': 'bug'}, {'name': 'p1'}],
+    'created_at': '2024-01-01T08:00:00Z', 'updated_at': '2024-01-02T09:30:00Z',
+    'pull_request': {}, 'body': 'long text that is not kept',
+}
+
+
+def make_records():
+    return [
+        Release.from_api({'id': 1, 'tag_name': 'v1.0', 'name': 'First',
+                          'published_at': '2024-01-01T08:00:00Z'}),
+        Commit.from_api({'sha': 'abcdef1234', 'commit': {
+            'message': 'Fix parser\n\nDetails', 'author': {'name': 'dev', 'date': '2024-01-01T07:00:00Z'}},
+            'author': {'login': 'dev'}, 'parents': [{}, {}]}),
+        Issue.from_api(ISSUE_API),
+        PullRequest.from_api({'id': 12, 'number': 4, 'title': 'Fix crash', 'state': 'closed',
+                              'user': {'login': 'dev'}, 'labels': [],
+                              'merged_at': '2024-01-03T10:00:00Z'}),
+    ]
+
+
+class TestGitHubTime(unittest.TestCase):
+    def test_round_trip(self):
+        value = parse_github_time('2024-01-02T09:30:00Z')
+
+        self.assertEqual(value, datetime(2024, 1, 2, 9, 30))
+        self.assertIsNone(value.tzinfo)
+        self.assertEqual(format_github_time(value), '2024-01-02T09:30:00Z')
+
+    def test_empty_values(self):
+        self.assertIsNone(parse_github_time(None))
+        self.assertIsNone(parse_github_time(''))
+        self.assertIsNone(format_github_time(None))
+
+    def test_rejects_other_formats(self):
+        with self.assertRaises(ValueError):
+            parse_github_time('2024-01-02 09:30:00')
+
+
+class TestRecords(unittest.TestCase):
+    def test_records_are_slotted(self):
+        for record in make_records():
+            self.assertFalse(hasattr(record, '__dict__'))
+            with self.assertRaises(AttributeError):
+                record.body = 'text'
+
+    def test_from_api_keeps_only_report_fields(self):
+        release, commit, issue, pull = make_records()
+
+        self.assertEqual(commit.message, 'Fix parser')
+        self.assertEqual((commit.author_login, commit.parent_count), ('dev', 2))
+        self.assertEqual(commit.date, datetime(2024, 1, 1, 7))
+        self.assertEqual(issue.labels, ('bug', 'p1'))
+        self.assertTrue(issue.is_pull_request)
+        self.assertEqual(pull.merged_at, datetime(2024, 1, 3, 10))
+        self.assertIsNone(pull.created_at)
+        self.assertEqual(release.published_at, datetime(2024, 1, 1, 8))
+
+    def test_dict_round_trip(self):
+        for record in make_records():
+            data = record.to_dict()
+
+            self.assertEqual(set(data), set(type(record).__slots__))
+            self.assertEqual(type(record).from_dict(data), record)
+        issue = make_records()[2]
+        self.assertEqual(issue.to_dict()['labels'], ['bug', 'p1'])
+        self.assertEqual(issue.to_dict()['updated_at'], '2024-01-02T09:30:00Z')
+
+    def test_save_and_load_updates(self):
+        release, commit, issue, pull = make_records()
+        updates = {'o/a': {'releases': release, 'commits': [commit], 'issues': [issue],
+                           'pull_requests': [pull], 'errors': {'issues': 'HTTP 502'}},
+                   'o/b': {'releases': None, 'commits': [], 'issues': [], 'pull_requests': []}}
+        path = os.path.join(tempfile.mkdtemp(), 'updates.json')
+
+        save_updates(path, updates)
+
+        self.assertEqual(load_updates(path), updates)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,133 @@
+import json
+import os
+import socketserver
+import tempfile
+import threading
 import unittest
-from src.notifier import Notifier
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from notifier import Channel, FileChannel, Notifier, SMTPChannel, WebhookChannel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FlakyChannel(Channel):
+    def __init__(self, failures):
+        super().__init__('flaky')
+        self.failures = failures
+        self.sent = []
+
+    def send(self, subject, body):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('temporarily unavailable')
+        self.sent.append((subject, body))
+
+
+class SMTPStandIn(socketserver.StreamRequestHandler):
+    """只实现发送所需命令的本地SMTP替身"""
+    messages = []
+
+    def handle(self):
+        self.wfile.write(b'220 localhost\r\n')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line.split(' ', 1)[0].upper()
+            if command in ('EHLO', 'HELO'):
+                self.wfile.write(b'250 localhost\r\n')
+            elif command == 'DATA':
+                self.wfile.write(b'354 end with .\r\n')
+                data = []
+                while True:
+                    chunk = self.rfile.readline().decode()
+                    if chunk in ('.\r\n', '.\n'):
+                        break
+                    data.append(chunk)
+                SMTPStandIn.messages.append(''.join(data))
+                self.wfile.write(b'250 OK\r\n')
+            elif command == 'QUIT' or not line:
+                self.wfile.write(b'221 bye\r\n')
+                return
+            else:
+                self.wfile.write(b'250 OK\r\n')
+
+
+class WebhookStandIn(BaseHTTPRequestHandler):
+    payloads = []
+
+    def do_POST(self):
+        WebhookStandIn.payloads.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
 
 class TestNotifier(unittest.TestCase):
     def test_notify(self):
-        # Add test cases for Notifier
-        pass
+        directory = tempfile.mkdtemp()
+        clock = FakeClock()
+        notifier = Notifier({'coalesce_window': 60}, channels=[FileChannel(directory)], clock=clock)
+
+        notifier.notify('## o/a\n')
+        notifier.notify('## o/b\n')
+        # 窗口未到期时不发送，flush强制发送合并后的摘要
+        self.assertEqual(os.listdir(directory), [])
+        self.assertTrue(notifier.flush(timeout=5))
+
+        files = os.listdir(directory)
+        self.assertEqual(len(files), 1)
+        with open(os.path.join(directory, files[0]), encoding='utf-8') as f:
+            content = f.read()
+        self.assertIn('digest: 2 reports', content)
+        self.assertIn('## o/a', content)
+        self.assertIn('## o/b', content)
+        notifier.close()
+
+    def test_retries_with_backoff(self):
+        channel = FlakyChannel(failures=2)
+        delays = []
+        notifier = Notifier({'max_retries': 3, 'backoff_base': 1}, channels=[channel], sleep=delays.append)
+
+        notifier.notify('report')
+        notifier.flush(timeout=5)
+
+        self.assertEqual(channel.sent, [('GitHub Sentinel update', 'report')])
+        self.assertEqual(delays, [1, 2])
+        self.assertEqual(notifier.stats['digests_sent'], 1)
+        notifier.close()
+
+    def test_webhook_and_smtp_channels(self):
+        http_server = serve(HTTPServer(('127.0.0.1', 0), WebhookStandIn))
+        smtp_server = serve(socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPStandIn))
+        try:
+            channels = [
+                WebhookChannel(f'http://127.0.0.1:{http_server.server_address[1]}/hook'),
+                SMTPChannel('127.0.0.1', smtp_server.server_address[1], 'sentinel@example.com', ['team@example.com']),
+            ]
+            notifier = Notifier({}, channels=channels)
+            notifier.notify('## o/r\n- new release\n')
+            self.assertTrue(notifier.flush(timeout=10))
+
+            self.assertEqual(WebhookStandIn.payloads[-1]['text'], '## o/r\n- new release\n')
+            self.assertIn('Subject: GitHub Sentinel update', SMTPStandIn.messages[-1])
+            self.assertIn('new release', SMTPStandIn.messages[-1])
+            notifier.close()
+        finally:
+            http_server.shutdown()
+            smtp_server.shutdown()
+
 
 if __name__ == '__main__':
     unittest.main()
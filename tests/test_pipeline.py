@@ -0,0 +1,121 @@
+import os
+import time
+import unittest
+from datetime import datetime
+from models import Commit
+from pipeline import STAGES, PipelineResult, ReportPipeline
+from report_generator import ReportGenerator
+from test_llm import make_llm
+
+
+class FakeGitHubClient:
+    """逐个仓库产出更新，每个仓库模拟一段获取耗时"""
+
+    def __init__(self, delay=0.0, fail_after=None):
+        self.delay = delay
+        self.fail_after = fail_after
+
+    def iter_updates(self, repos, since=None, until=None):
+        for i, repo in enumerate(repos):
+            if i == self.fail_after:
+                raise RuntimeError('HTTP 502')
+            time.sleep(self.delay)
+            yield repo, {'releases': None, 'issues': [], 'pull_requests': [],
+                         'commits': [Commit(sha='abcdef1234', message=f'Change {repo}', author='dev')]}
+
+
+def make_pipeline(github_client=None):
+    llm = make_llm(reply=' 摘要内容')
+    config = llm.config
+    os.makedirs(config.exports_dir, exist_ok=True)
+    config.get_export_filepath = lambda repo=None, since=None, until=None: os.path.join(
+        config.exports_dir, f"{(repo or 'github/updates').replace('/', '_')}_{since:%Y%m%d}.md")
+    config.get_summary_filepath = lambda path: path.replace('.md', '-with-summary.md')
+    return ReportPipeline(config, github_client or FakeGitHubClient(), ReportGenerator(config), llm)
+
+
+def exported_files(config):
+    """导出目录中的文件，不含导出存储的子目录"""
+    return sorted(name for name in os.listdir(config.exports_dir)
+                  if os.path.isfile(os.path.join(config.exports_dir, name)))
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+class TestReportPipeline(unittest.TestCase):
+    since = datetime(2024, 1, 1)
+
+    def test_run_writes_and_registers_raw_and_summary(self):
+        pipeline = make_pipeline()
+
+        result = pipeline.run('o/a', self.since)
+
+        self.assertEqual(read(result.filepath), result.report)
+        self.assertEqual(read(result.summary_file), result.content)
+        self.assertTrue(result.summary.startswith('# o/a-2024-01-01 更新摘要\n\n回复 1'))
+        entries = {e['kind']: e for e in pipeline.report_generator.catalog.entries()}
+        self.assertEqual(entries['raw']['path'], result.filepath)
+        self.assertEqual(entries['summary']['path'], result.summary_file)
+        self.assertEqual((entries['raw']['repo'], entries['raw']['since']), ('o/a', '2024-01-01'))
+        # 原子写入不留下临时文件
+        self.assertEqual(exported_files(pipeline.config),
+                         sorted(os.path.basename(p) for p in (result.filepath, result.summary_file)))
+
+    def test_failed_fetch_leaves_no_partial_report(self):
+        pipeline = make_pipeline(FakeGitHubClient(fail_after=1))
+
+        with self.assertRaises(RuntimeError):
+            pipeline.run(['o/a', 'o/b'], self.since)
+
+        self.assertEqual(exported_files(pipeline.config), [])
+        self.assertEqual(pipeline.report_generator.catalog.entries(), [])
+
+    def test_timings_cover_every_stage_and_attribute_fetch_waits(self):
+        pipeline = make_pipeline(FakeGitHubClient(delay=0.05))
+
+        result = pipeline.run(['o/a', 'o/b'], self.since)
+
+        self.assertEqual(tuple(result.timings), STAGES)
+        self.assertGreaterEqual(result.timings['fetch'], 0.1)
+        # 等待获取的时间不计入渲染
+        self.assertLess(result.timings['render'], 0.05)
+        self.assertGreater(result.timings['persist'], 0)
+        self.assertIn('fetch ', result.describe())
+
+    def test_stream_yields_summary_parts_then_result(self):
+        pipeline = make_pipeline()
+        filepath = pipeline.config.get_export_filepath(repo='o/a', since=self.since)
+
+        items = []
+        for item in pipeline.stream('o/a', self.since):
+            if not items:
+                # 第一段摘要产出时原始报告已经写入
+                self.assertTrue(os.path.exists(filepath))
+            items.append(item)
+            # 调用方处理片段的时间不计入摘要阶段
+            time.sleep(0.01)
+
+        *parts, result = items
+        self.assertIsInstance(result, PipelineResult)
+        self.assertGreater(len(parts), 2)
+        self.assertTrue(all(isinstance(part, str) for part in parts))
+        self.assertEqual(''.join(parts), result.summary)
+        self.assertLess(result.timings['summarize'], 0.01 * len(parts))
+        self.assertEqual(read(result.summary_file), result.content)
+
+    def test_run_without_llm_client_skips_summary(self):
+        pipeline = make_pipeline()
+        pipeline.llm_processor.client = None
+
+        result = pipeline.run('o/a', self.since)
+
+        self.assertIsNone(result.summary)
+        self.assertIsNone(result.summary_file)
+        self.assertEqual(result.content, result.report)
+
+
+if __name__ == '__main__':
+    unittest.main()
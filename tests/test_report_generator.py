@@ -1,10 +1,74 @@
+import io
+import os
+import tempfile
 import unittest
-from src.report_generator import ReportGenerator
+from datetime import datetime
+from types import SimpleNamespace
+from models import Commit, Issue, PullRequest, Release
+from export_catalog import ExportCatalog
+from report_generator import ReportGenerator
+
+
+def make_config():
+    directory = tempfile.mkdtemp()
+    return SimpleNamespace(
+        openai_api_key='test-key', openai_base_url=None, openai_model='gpt-test',
+        openai_system_prompt='system', openai_temperature=0.2, openai_max_tokens=500,
+        cache_dir=directory, exports_dir=os.path.join(directory, 'exports'),
+    )
+
+
+def make_updates():
+    return {
+        'o/a': {
+            'releases': Release(tag_name='v1.0', name='First', published_at=datetime(2024, 1, 1, 8),
+                                html_url='https://github.com/o/a/releases/v1.0'),
+            'commits': [Commit(sha='abcdef1234', message='Fix parser', author='dev')],
+            'issues': [Issue(number=3, title='Crash', state='open', html_url='https://github.com/o/a/issues/3')],
+            'pull_requests': [PullRequest(number=4, title='Fix crash', state='open', user='dev')],
+        },
+        'o/b': {'releases': None, 'commits': [], 'issues': [], 'pull_requests': [],
+                'errors': {'commits': 'HTTP 502'}},
+    }
+
 
 class TestReportGenerator(unittest.TestCase):
+    def setUp(self):
+        self.generator = ReportGenerator(make_config())
+
     def test_generate(self):
-        # Add test cases for ReportGenerator
-        pass
+        report = self.generator.generate(make_updates())
+
+        self.assertIn('\n## o/a\n\n### Latest Release\n- Version: v1.0\n', report)
+        self.assertIn('- Published at: 2024-01-01T08:00:00Z\n', report)
+        self.assertIn('- [`abcdef1`] Fix parser (by dev)\n', report)
+        self.assertIn('- #3 [Crash](https://github.com/o/a/issues/3) (open)\n', report)
+        # 缺少链接时使用占位符
+        self.assertIn('- #4 [Fix crash](#) by @dev (open)\n', report)
+        self.assertIn('\n## o/b\n\n### Fetch Errors\n- commits: HTTP 502\n\n### No releases found\n', report)
+        self.assertNotIn('Recent Commits', report.split('## o/b')[1])
+
+    def test_iter_report_accepts_pairs_and_yields_per_section(self):
+        chunks = list(self.generator.iter_report(iter(make_updates().items())))
+
+        self.assertEqual(chunks[0], '\n## o/a\n\n')
+        self.assertTrue(chunks[1].startswith('### Latest Release'))
+        self.assertEqual(''.join(chunks), self.generator.generate(make_updates()))
+
+    def test_write_report_streams_into_sink(self):
+        sink = io.StringIO()
+
+        written = self.generator.write_report(make_updates(), sink)
+
+        self.assertEqual(sink.getvalue(), self.generator.generate(make_updates()))
+        self.assertEqual(written, len(sink.getvalue()))
+
+    def test_uses_injected_catalog(self):
+        config = make_config()
+        catalog = ExportCatalog(os.path.join(config.cache_dir, 'shared.db'), config.exports_dir)
+
+        self.assertIs(ReportGenerator(config, catalog).catalog, catalog)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,143 @@
+import os
+import random
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from checkpoint_store import CheckpointStore
+from models import Commit
+from scheduler import Scheduler
+
+START = 1_700_000_000.0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = START
+
+    def __call__(self):
+        return self.now
+
+
+class FakeSubscriptions:
+    def __init__(self, intervals):
+        self.intervals = intervals
+
+    def get_subscriptions(self):
+        return list(self.intervals)
+
+    def get_metadata(self, repo):
+        return {'interval': self.intervals[repo]}
+
+
+class FakeGitHubClient:
+    """按仓库返回预置活跃度并记录请求窗口"""
+
+    def __init__(self):
+        self.activity = {}
+        self.failing = set()
+        self.windows = []
+
+    def fetch_updates(self, repos, since=None, until=None):
+        repo = repos[0]
+        self.windows.append((repo, since, until))
+        data = {'releases': None, 'issues': [], 'pull_requests': [],
+                'commits': [Commit(sha=f'{i:07d}', message='Change', author='dev')
+                            for i in range(self.activity.get(repo, 0))]}
+        if repo in self.failing:
+            data['errors'] = {'commits': 'boom'}
+        return {repo: data}
+
+
+class FakeReports:
+    def __init__(self):
+        self.reports = []
+
+    def generate(self, updates):
+        return 'report'
+
+    def notify(self, report):
+        self.reports.append(report)
+
+
+class TestScheduler(unittest.TestCase):
+    def make_scheduler(self, intervals, jitter=0.0, **config):
+        self.clock = FakeClock()
+        self.github = FakeGitHubClient()
+        self.reports = FakeReports()
+        scheduler_config = {'min_interval': 60, 'max_interval': 1000, 'jitter': jitter}
+        scheduler_config.update(config)
+        checkpoints = CheckpointStore(os.path.join(tempfile.mkdtemp(), 'checkpoints.json'))
+        return Scheduler(self.github, self.reports, self.reports, FakeSubscriptions(intervals), 100,
+                         scheduler_config, clock=self.clock, rng=random.Random(7), checkpoints=checkpoints)
+
+    def test_heap_pops_repos_in_due_order(self):
+        scheduler = self.make_scheduler({'o/a': 100, 'o/b': 150, 'o/c': 200})
+        self.assertEqual(sorted(r.repo for r in scheduler.run_pending()), ['o/a', 'o/b', 'o/c'])
+
+        # 没有动态时间隔放大1.5倍：150、225、300秒后到期
+        self.assertEqual(scheduler.next_due(), START + 150)
+        polled = []
+        for offset in (150, 225, 300):
+            self.clock.now = START + offset
+            polled += [r.repo for r in scheduler.run_pending()]
+        self.assertEqual(polled, ['o/a', 'o/b', 'o/c'])
+
+    def test_activity_speeds_up_and_quiet_slows_down_within_bounds(self):
+        scheduler = self.make_scheduler({'o/busy': 100, 'o/quiet': 800})
+        self.github.activity['o/busy'] = 3
+
+        intervals = {r.repo: r.interval for r in scheduler.run_pending()}
+        self.assertEqual(intervals, {'o/busy': 60, 'o/quiet': 1000})
+
+        self.clock.now = START + 1000
+        intervals = {r.repo: r.interval for r in scheduler.run_pending()}
+        self.assertEqual(intervals, {'o/busy': 60, 'o/quiet': 1000})
+        self.assertEqual(len(self.reports.reports), 2)
+
+    def test_failed_poll_keeps_interval(self):
+        scheduler = self.make_scheduler({'o/r': 100})
+        self.github.failing.add('o/r')
+
+        result, = scheduler.run_pending()
+
+        self.assertEqual((result.interval, result.error), (100, 'failed to fetch commits'))
+        self.assertEqual(scheduler.next_due(), START + 100)
+
+    def test_jitter_bounds(self):
+        repos = {f'o/r{i}': 500 for i in range(50)}
+        scheduler = self.make_scheduler(repos, jitter=0.1)
+
+        scheduler.sync_subscriptions()
+        initial = list(scheduler._due.values())
+        self.assertTrue(all(START <= due <= START + 50 for due in initial))
+        self.assertGreater(len(set(initial)), 1)
+
+        self.clock.now = START + 50
+        scheduler.run_pending()
+        rescheduled = list(scheduler._due.values())
+        self.assertTrue(all(START + 50 + 675 <= due <= START + 50 + 825 for due in rescheduled))
+
+    def test_checkpoint_windows_are_contiguous_and_retry_after_failure(self):
+        scheduler = self.make_scheduler({'o/r': 100})
+        until = datetime.fromtimestamp(START, timezone.utc).replace(tzinfo=None)
+
+        scheduler.run_pending()
+        self.clock.now = START + 150
+        self.github.failing.add('o/r')
+        scheduler.run_pending()
+        self.clock.now = START + 300
+        self.github.failing.clear()
+        scheduler.run_pending()
+
+        windows = [(since, end) for _, since, end in self.github.windows]
+        self.assertEqual(windows, [
+            (until - timedelta(seconds=100), until),
+            (until, until + timedelta(seconds=150)),
+            # 失败的窗口不推进检查点，下次从同一位置继续
+            (until, until + timedelta(seconds=300)),
+        ])
+        self.assertEqual(scheduler.checkpoints.get('o/r'), until + timedelta(seconds=300))
+
+
+if __name__ == '__main__':
+    unittest.main()
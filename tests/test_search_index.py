@@ -0,0 +1,68 @@
+import os
+import tempfile
+import time
+import unittest
+from search_index import SearchIndex, tokenize
+
+WORDS = ['retry', 'workflow', 'cache', 'release', 'parser', 'token', 'docs', 'memory', 'thread', 'queue']
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.texts = {}
+        self.index = SearchIndex(os.path.join(tempfile.mkdtemp(), 'search.db'), reader=self.texts.get)
+
+    def add(self, path, text, repo='o/r', mtime=1.0):
+        self.texts[os.path.abspath(path)] = text
+        return self.index.add(path, repo=repo, since='2024-01-01', kind='summary', size=len(text), mtime=mtime)
+
+    def test_tokenize_splits_cjk_into_bigrams(self):
+        self.assertEqual(tokenize('修复Workflow重试'), ['修复', 'workflow', '重试'])
+        self.assertEqual(tokenize('工作流重试'), ['工作', '作流', '流重', '重试'])
+
+    def test_search_reads_snippet_through_reader(self):
+        self.add('a.md', '# 摘要\n\n- 修复了工作流重试的问题\n')
+        self.add('b.md', '# 摘要\n\n- 更新文档\n', repo='o/docs')
+
+        hits = self.index.search('工作流')
+
+        self.assertEqual([hit.filename for hit in hits], ['a.md'])
+        self.assertEqual(hits[0].snippet, '- 修复了工作流重试的问题')
+        self.assertEqual([hit.repo for hit in self.index.search('文档', repo='o/docs')], ['o/docs'])
+
+    def test_reindex_and_remove_update_external_content_index(self):
+        self.add('a.md', 'cache eviction')
+        self.assertFalse(self.add('a.md', 'cache eviction'))
+        self.assertTrue(self.add('a.md', 'parser rewrite', mtime=2.0))
+
+        self.assertEqual(self.index.search('cache'), [])
+        self.assertEqual(len(self.index.search('parser')), 1)
+
+        self.index.remove('a.md')
+        self.assertEqual(self.index.search('parser'), [])
+        self.assertEqual(self.index.count(), 0)
+
+    def test_sync_uses_catalog_metadata_without_touching_files(self):
+        self.texts[os.path.abspath('stored.md')] = 'archived workflow report'
+        entries = [{'path': 'stored.md', 'repo': 'o/r', 'since': '2024-01-01', 'until': None,
+                    'kind': 'raw', 'size': 24, 'mtime': 1.0}]
+
+        self.assertEqual(self.index.sync(entries), 1)
+        self.assertEqual(self.index.sync(entries), 0)
+        self.assertEqual(len(self.index.search('archived')), 1)
+
+    def test_search_latency_under_100ms(self):
+        for i in range(2000):
+            body = '\n'.join(f"- {WORDS[(i + j) % len(WORDS)]} change {i}-{j} 修复工作流重试" for j in range(30))
+            self.add(f'report_{i}.md', body, repo=f'o/r{i % 20}')
+
+        for query in ('retry workflow', '工作流', 'cache', 'token queue'):
+            start = time.perf_counter()
+            hits = self.index.search(query, limit=20)
+            elapsed = time.perf_counter() - start
+            self.assertTrue(hits)
+            self.assertLess(elapsed, 0.1, f"search for {query!r} took {elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import tempfile
+import unittest
+from job_queue import PENDING, RUNNING, JobQueue
+from sharding import HashRing, LeaseTable, ShardedSubscriptions
+
+REPOS = [f'owner{i % 37}/repo{i}' for i in range(1000)]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeSubscriptions:
+    def __init__(self, repos):
+        self.repos = list(repos)
+        self.listeners = []
+
+    def get_subscriptions(self):
+        return list(self.repos)
+
+    def has_subscription(self, repo):
+        return repo in self.repos
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+
+class TestHashRing(unittest.TestCase):
+    def assignment(self, nodes):
+        ring = HashRing(nodes)
+        return {repo: ring.node_for(repo) for repo in REPOS}
+
+    def test_join_only_moves_keys_to_new_node(self):
+        before = self.assignment(['a', 'b', 'c', 'd'])
+        after = self.assignment(['a', 'b', 'c', 'd', 'e'])
+
+        moved = [repo for repo in REPOS if before[repo] != after[repo]]
+        self.assertTrue(all(after[repo] == 'e' for repo in moved))
+        # 期望迁移约1/5的键
+        self.assertLess(len(moved), len(REPOS) * 0.35)
+        self.assertGreater(len(moved), len(REPOS) * 0.08)
+
+    def test_leave_only_moves_keys_of_departed_node(self):
+        before = self.assignment(['a', 'b', 'c', 'd'])
+        after = self.assignment(['a', 'b', 'd'])
+
+        moved = {repo for repo in REPOS if before[repo] != after[repo]}
+        self.assertEqual(moved, {repo for repo in REPOS if before[repo] == 'c'})
+
+    def test_empty_ring(self):
+        self.assertIsNone(HashRing([]).node_for('o/r'))
+
+
+class TestLeases(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'leases.db')
+        self.clock = FakeClock()
+
+    def node(self, node_id, subscriptions):
+        table = LeaseTable(self.path, node_id, ttl=60, clock=self.clock)
+        return ShardedSubscriptions(subscriptions, table, vnodes=16)
+
+    def test_expired_lease_is_taken_over(self):
+        subscriptions = FakeSubscriptions(REPOS[:100])
+        node_a, node_b = self.node('a', subscriptions), self.node('b', subscriptions)
+        node_a.get_subscriptions()
+        # 两个节点都续约后，各自的哈希环包含对方
+        owned_b, owned_a = node_b.get_subscriptions(), node_a.get_subscriptions()
+        self.assertEqual(sorted(owned_a + owned_b), sorted(REPOS[:100]))
+        self.assertTrue(owned_a and owned_b)
+
+        changes = []
+        node_b.add_listener(lambda added, removed: changes.append((added, removed)))
+        # a停止续约，租约过期后b接管全部仓库并通知调度器
+        self.clock.now += 61
+        self.assertEqual(node_b.get_subscriptions(), REPOS[:100])
+        self.assertEqual(node_b.lease_table.live_nodes(), ['b'])
+        self.assertEqual(changes, [(set(), set())])
+
+    def test_release_hands_over_immediately(self):
+        subscriptions = FakeSubscriptions(REPOS[:50])
+        node_a, node_b = self.node('a', subscriptions), self.node('b', subscriptions)
+        node_a.get_subscriptions()
+        node_b.get_subscriptions()
+
+        node_a.release()
+
+        self.assertEqual(node_b.get_subscriptions(), REPOS[:50])
+
+    def test_reads_renew_lease_before_it_expires(self):
+        node = self.node('a', FakeSubscriptions(REPOS[:10]))
+        node.get_subscriptions()
+        expiries = []
+        for _ in range(6):
+            self.clock.now += 20
+            node.get_subscriptions()
+            expiries.append(node.lease_table._conn.execute("SELECT expires_at FROM leases").fetchone()[0])
+
+        # 每过ttl/3续约一次，租约始终有效
+        self.assertEqual(expiries, [self.clock.now - 100 + 60 + 20 * i for i in range(6)])
+        self.assertEqual(node.lease_table.live_nodes(), ['a'])
+
+    def test_recover_requeues_jobs_of_nodes_with_expired_leases(self):
+        queue_path = os.path.join(tempfile.mkdtemp(), 'jobs.db')
+        table_a = LeaseTable(self.path, 'a', ttl=60, clock=self.clock)
+        table_b = LeaseTable(self.path, 'b', ttl=60, clock=self.clock)
+        table_a.heartbeat()
+        table_b.heartbeat()
+        queue_a, queue_b = JobQueue(queue_path, node_id='a'), JobQueue(queue_path, node_id='b')
+        job_a = queue_a.submit('fetch', {'n': 1})
+        job_b = queue_a.submit('fetch', {'n': 2})
+        queue_a.claim()
+        queue_b.claim()
+
+        self.assertEqual(queue_a.recover(live_nodes=table_a.live_nodes()), 0)
+
+        self.clock.now += 61
+        table_a.heartbeat()
+        self.assertEqual(queue_a.recover(live_nodes=table_a.live_nodes()), 1)
+        self.assertEqual(queue_a.get(job_a).status, RUNNING)
+        self.assertEqual(queue_a.get(job_b).status, PENDING)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,110 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
 import unittest
-from src.subscription_manager import SubscriptionManager
+from subscription_manager import SubscriptionManager
+
+
+def add_and_remove(path, worker, count):
+    """在独立进程中交替添加和删除订阅"""
+    manager = SubscriptionManager(path)
+    for i in range(count):
+        manager.add_subscription(f'o/w{worker}-{i}')
+        manager.add_subscription(f'o/tmp{worker}-{i}')
+        manager.remove_subscription(f'o/tmp{worker}-{i}')
+
 
 class TestSubscriptionManager(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'subscriptions.json')
+
+    def expected(self, workers, count):
+        return {f'o/w{worker}-{i}' for worker in range(workers) for i in range(count)}
+
     def test_get_subscriptions(self):
-        # Add test cases for SubscriptionManager
-        pass
+        manager = SubscriptionManager(self.path)
+        manager.add_subscriptions(['o/a', 'o/b'], interval=600)
+        manager.remove_subscription('o/a')
+
+        reloaded = SubscriptionManager(self.path)
+        self.assertEqual(reloaded.get_subscriptions(), ['o/b'])
+        self.assertEqual(reloaded.get_metadata('o/b'), {'interval': 600})
+
+    def test_reads_legacy_list_and_migrates_on_first_write(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(['o/a', 'o/b'], f)
+
+        manager = SubscriptionManager(self.path)
+        self.assertEqual(manager.get_subscriptions(), ['o/a', 'o/b'])
+        self.assertEqual(manager.get_metadata('o/a'), {})
+
+        manager.update_metadata('o/a', interval=3600)
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'subscriptions': {'o/a': {'interval': 3600}, 'o/b': {}}})
+
+    def test_update_metadata(self):
+        manager = SubscriptionManager(self.path)
+        manager.add_subscription('o/a', interval=600)
+
+        manager.update_metadata('o/a', interval=None)
+        self.assertEqual(manager.get_metadata('o/a'), {})
+        with self.assertRaises(KeyError):
+            manager.update_metadata('o/missing', interval=60)
+        with self.assertRaises(ValueError):
+            manager.update_metadata('o/a', filters=['bug'])
+
+    def test_import_and_export(self):
+        manager = SubscriptionManager(self.path)
+        manager.add_subscription('o/a', interval=600)
+        directory = os.path.dirname(self.path)
+        text_file = os.path.join(directory, 'repos.txt')
+        with open(text_file, 'w', encoding='utf-8') as f:
+            f.write('# team repos\no/a\n\no/b\no/c\n')
+
+        self.assertEqual(manager.import_subscriptions(text_file), 2)
+        self.assertEqual(manager.get_metadata('o/a'), {'interval': 600})
+
+        export_file = os.path.join(directory, 'export.json')
+        manager.export_subscriptions(export_file)
+        other = SubscriptionManager(os.path.join(directory, 'other.json'))
+        other.add_subscription('o/old')
+        self.assertEqual(other.import_subscriptions(export_file, replace=True), 3)
+        self.assertEqual(other.get_subscriptions(), ['o/a', 'o/b', 'o/c'])
+        self.assertEqual(other.get_metadata('o/a'), {'interval': 600})
+
+        bad_file = os.path.join(directory, 'bad.json')
+        with open(bad_file, 'w', encoding='utf-8') as f:
+            json.dump({'subscriptions': {'o/x': {'last_synced': '2024-01-01'}}}, f)
+        with self.assertRaises(ValueError):
+            other.import_subscriptions(bad_file)
+        self.assertFalse(other.has_subscription('o/x'))
+
+    def test_concurrent_processes_do_not_lose_updates(self):
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=add_and_remove, args=(self.path, worker, 15)) for worker in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        self.assertEqual([process.exitcode for process in processes], [0] * 4)
+        self.assertEqual(set(SubscriptionManager(self.path).get_subscriptions()), self.expected(4, 15))
+
+    def test_concurrent_threads_and_external_observer(self):
+        manager = SubscriptionManager(self.path)
+        changes = []
+        manager.add_listener(lambda added, removed: changes.append((added, removed)))
+        threads = [threading.Thread(target=add_and_remove, args=(self.path, worker, 10)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(set(manager.get_subscriptions()), self.expected(4, 10))
+        self.assertTrue(changes)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,71 @@
+import threading
+import time
+import unittest
+from token_pool import RateLimitExhausted, TokenPool
+
+
+def headers(remaining, reset, resource='core'):
+    return {'X-RateLimit-Remaining': str(remaining), 'X-RateLimit-Reset': str(reset),
+            'X-RateLimit-Resource': resource}
+
+
+class TestTokenPool(unittest.TestCase):
+    def test_acquire_prefers_token_with_most_remaining(self):
+        pool = TokenPool(['a', 'b', 'a'])
+        reset = time.time() + 3600
+        pool.update('a', headers(5, reset))
+        pool.update('b', headers(2, reset))
+
+        # 预扣额度，额度相同时取靠前的token
+        self.assertEqual([pool.acquire() for _ in range(7)], ['a', 'a', 'a', 'a', 'b', 'a', 'b'])
+        self.assertEqual(pool.tokens, ['a', 'b'])
+
+    def test_resources_are_tracked_separately(self):
+        pool = TokenPool(['a', 'b'])
+        reset = time.time() + 3600
+        pool.update('a', headers(0, reset, 'core'))
+        pool.update('b', headers(0, reset, 'graphql'))
+
+        self.assertEqual(pool.acquire('core'), 'b')
+        self.assertEqual(pool.acquire('graphql'), 'a')
+
+    def test_budget_recovers_after_reset(self):
+        now = [1000.0]
+        pool = TokenPool(['a'], max_wait=0, clock=lambda: now[0])
+        pool.update('a', headers(0, 1010))
+
+        with self.assertRaises(RateLimitExhausted) as raised:
+            pool.acquire()
+        self.assertEqual(raised.exception.reset_at, 1010)
+
+        now[0] = 1010
+        self.assertEqual(pool.acquire(), 'a')
+
+    def test_waiter_wakes_when_another_thread_updates_budget(self):
+        pool = TokenPool(['a'])
+        pool.update('a', headers(0, time.time() + 3600))
+        timer = threading.Timer(0.1, pool.update, args=('a', headers(10, time.time() + 3600)))
+        timer.start()
+
+        start = time.perf_counter()
+        self.assertEqual(pool.acquire(), 'a')
+        self.assertLess(time.perf_counter() - start, 5)
+        timer.join()
+
+    def test_empty_tokens_are_ignored(self):
+        pool = TokenPool([None, 'a', ''])
+
+        self.assertEqual(pool.tokens, ['a'])
+        with self.assertRaises(ValueError):
+            TokenPool([None])
+
+    def test_status_masks_tokens(self):
+        pool = TokenPool(['ghp_0123456789abcd', 'short'])
+        pool.update('ghp_0123456789abcd', headers(5, 1010))
+        pool.update('short', headers(5, 1010))
+
+        self.assertEqual([status['token'] for status in pool.get_status()], ['...abcd', '...'])
+
+
+if __name__ == '__main__':
+    unittest.main()
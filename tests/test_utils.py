@@ -1,9 +1,47 @@
+import os
+import tempfile
 import unittest
-# Add imports for utility functions to test
+from utils import atomic_write, estimate_tokens
+
 
 class TestUtils(unittest.TestCase):
-    # Add test cases for utility functions
-    pass
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(''), 0)
+        self.assertEqual(estimate_tokens('abcd'), 1)
+        self.assertEqual(estimate_tokens('abcde'), 2)
+        # 中日韩字符每字一个token，其余按4个字符一个
+        self.assertEqual(estimate_tokens('修复重试 fix'), 4 + 1)
+
+    def test_atomic_write_replaces_file(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'nested', 'report.md')
+
+        with atomic_write(path) as f:
+            f.write('第一版')
+            # 写完之前目标文件还不存在
+            self.assertFalse(os.path.exists(path))
+        with atomic_write(path, binary=True) as f:
+            f.write('第二版'.encode('utf-8'))
+
+        with open(path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), '第二版')
+        self.assertEqual(os.listdir(os.path.dirname(path)), ['report.md'])
+
+    def test_atomic_write_keeps_target_on_error(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'report.md')
+        with atomic_write(path) as f:
+            f.write('old')
+
+        with self.assertRaises(RuntimeError):
+            with atomic_write(path) as f:
+                f.write('partial')
+                raise RuntimeError('interrupted')
+
+        with open(path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'old')
+        self.assertEqual(os.listdir(directory), ['report.md'])
+
 
 if __name__ == '__main__':
     unittest.main()